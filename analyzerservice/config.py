@@ -1,10 +1,8 @@
 import os
 import logging
+from functools import lru_cache
 from dotenv import find_dotenv, load_dotenv
 
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
-
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
@@ -18,10 +16,131 @@ PGPASSWORD = os.getenv("PGPASSWORD")
 PGHOST = os.getenv("PGHOST")
 PGPORT = os.getenv("PGPORT")
 PGDATABASE = os.getenv("PGDATABASE")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+# Результаты Celery хранятся отдельно от кэша отчётов и брокера
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://redis:6379/1")
+CELERY_RESULT_EXPIRES = int(os.getenv("CELERY_RESULT_EXPIRES", str(60 * 60)))  # Время жизни результатов задач, сек
+
+# Пул соединений с базой данных и цикл событий воркера
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+WORKER_LOOP_CONCURRENCY = int(os.getenv("WORKER_LOOP_CONCURRENCY", "8"))  # Одновременных задач на цикле воркера
+
+# Общий для кластера лимит запросов к LLM и повторные попытки
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))
+LLM_RATE_LIMIT_MAX_WAIT = float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT", "60"))  # Сколько секунд ждать в очереди лимитера
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_RETRY_BACKOFF_MAX = int(os.getenv("LLM_RETRY_BACKOFF_MAX", "600"))  # Верхняя граница паузы между попытками, сек
+
+# Бэкенды LLM: gemini или fake (локальная замена для нагрузочных тестов)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_BULK_BACKEND = os.getenv("LLM_BULK_BACKEND", LLM_BACKEND)  # Для прогрева кэша и отчётов за период
+FAKE_LLM_LATENCY_DISTRIBUTION = os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "lognormal")
+FAKE_LLM_LATENCY_MEAN = float(os.getenv("FAKE_LLM_LATENCY_MEAN", "5.0"))
+FAKE_LLM_LATENCY_STDDEV = float(os.getenv("FAKE_LLM_LATENCY_STDDEV", "2.0"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0.0"))
+FAKE_LLM_OUTPUT_WORDS = int(os.getenv("FAKE_LLM_OUTPUT_WORDS", "400"))
+FAKE_LLM_CHUNKS = int(os.getenv("FAKE_LLM_CHUNKS", "10"))
+
+# Очереди Celery: interactive (отчёты по запросу пользователя), bulk (прогрев
+# кэша и отчёты за период) и ingest (фоновая загрузка XML). Каждую очередь
+# обслуживает свой воркер; параметры переопределяются переменными вида
+# CELERY_<ОЧЕРЕДЬ>_<ПАРАМЕТР>, например CELERY_BULK_CONCURRENCY=2.
+INTERACTIVE_QUEUE = "interactive"
+BULK_QUEUE = "bulk"
+INGEST_QUEUE = "ingest"
+_QUEUE_DEFAULTS = {
+    INTERACTIVE_QUEUE: {"concurrency": 8, "prefetch_multiplier": 1, "acks_late": True,
+                        "soft_time_limit": 120, "time_limit": 180},
+    BULK_QUEUE: {"concurrency": 2, "prefetch_multiplier": 1, "acks_late": True,
+                 "soft_time_limit": 1800, "time_limit": 2400},
+    INGEST_QUEUE: {"concurrency": 4, "prefetch_multiplier": 4, "acks_late": False,
+                   "soft_time_limit": 300, "time_limit": 360},
+}
+
+
+def _queue_setting(queue: str, name: str, default):
+    value = os.getenv(f"CELERY_{queue.upper()}_{name.upper()}")
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value.lower() in ("1", "true", "yes")
+    return type(default)(value)
+
+
+CELERY_QUEUES = {
+    queue: {name: _queue_setting(queue, name, default) for name, default in settings.items()}
+    for queue, settings in _QUEUE_DEFAULTS.items()
+}
+
+# Журналирование: очередь в памяти и отдельный поток вывода (analyzerservice.src.log_config)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json или text
+LOG_FILE = os.getenv("LOG_FILE", "")  # Пустая строка - только stdout
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))  # Доля сообщений горячего пути (попадания в кэш и т.п.)
+
+# Метрики Prometheus: каталог для режима нескольких процессов и порт экспортера воркера
+METRICS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+METRICS_WORKER_PORT = int(os.getenv("METRICS_WORKER_PORT", "9808"))  # 0 - без экспортера
+
+# Трассировка запросов (analyzerservice.tracing)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.0"))  # Доля трассируемых запросов (0 - выключено)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "console")  # console (в журнал), file (JSON Lines) или none
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+
+# Профилирование отдельных запросов и задач (analyzerservice.profiling)
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")  # Пустой токен - профилирование выключено
+PROFILING_DIR = os.getenv("PROFILING_DIR", "/tmp/profiles")
+PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", "0.005"))  # Интервал выборки стеков, сек
+PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "120"))  # Предельная длительность профиля
+
+# Контроль допуска запросов (analyzerservice.src.admission); 0 отключает ограничение.
+# Лимиты одновременных запросов действуют в каждом процессе uvicorn отдельно.
+ADMISSION_INGEST_CONCURRENCY = int(os.getenv("ADMISSION_INGEST_CONCURRENCY", "4"))  # Синхронных загрузок XML
+ADMISSION_REPORT_CONCURRENCY = int(os.getenv("ADMISSION_REPORT_CONCURRENCY", "32"))  # Запусков генерации отчётов
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "32"))  # Запросов класса, ожидающих освобождения слота
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))  # Предельное ожидание слота, сек
+ADMISSION_MAX_QUEUE_DEPTH = int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", "500"))  # Задач в очереди Celery до отказа
+ADMISSION_MAX_POOL_WAIT = float(os.getenv("ADMISSION_MAX_POOL_WAIT", "0.5"))  # Среднее ожидание соединения из пула до отказа, сек
+ADMISSION_QUEUE_DEPTH_TTL = float(os.getenv("ADMISSION_QUEUE_DEPTH_TTL", "1.0"))  # Как долго использовать прочитанную длину очередей, сек
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))  # Retry-After на пороге перегрузки, сек
+ADMISSION_RETRY_AFTER_MAX = int(os.getenv("ADMISSION_RETRY_AFTER_MAX", "60"))
+
+# Production-профиль веб-сервера (analyzerservice.src.serve)
+WEB_HOST = os.getenv("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.getenv("WEB_PORT", "8000"))
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 1)))  # Процессов uvicorn
+WEB_LOOP = os.getenv("WEB_LOOP", "uvloop")
+WEB_HTTP = os.getenv("WEB_HTTP", "httptools")
+WEB_KEEPALIVE_TIMEOUT = int(os.getenv("WEB_KEEPALIVE_TIMEOUT", "5"))
+WEB_GRACEFUL_SHUTDOWN_TIMEOUT = int(os.getenv("WEB_GRACEFUL_SHUTDOWN_TIMEOUT", "30"))  # Ожидание активных запросов при остановке, сек
+WEB_ACCESS_LOG = os.getenv("WEB_ACCESS_LOG", "false").lower() in ("1", "true", "yes")
 
-# Проверка наличия обязательных переменных окружения
+# Прогрев кэша отчётов
+WARMUP_DAYS = int(os.getenv("WARMUP_DAYS", "7"))  # Сколько последних дат прогревать по расписанию
+WARMUP_LLM_BUDGET = int(os.getenv("WARMUP_LLM_BUDGET", "20"))  # Лимит вызовов LLM на прогрев в сутки
+WARMUP_CRON_HOUR = int(os.getenv("WARMUP_CRON_HOUR", "3"))  # Час запуска прогрева (внепиковое время)
+WARMUP_PRIORITY = int(os.getenv("WARMUP_PRIORITY", "9"))  # Приоритет задач прогрева (0 - наивысший)
+
+# Генерация отчётов за период
+REPORT_RANGE_MAX_DAYS = int(os.getenv("REPORT_RANGE_MAX_DAYS", "92"))
+REPORT_RANGE_PARALLELISM = int(os.getenv("REPORT_RANGE_PARALLELISM", "4"))  # Максимум параллельных задач на период
+
+# Аналитика продаж по предрасчитанным итогам
+ANALYTICS_MAX_DAYS = int(os.getenv("ANALYTICS_MAX_DAYS", "1096"))  # Максимальная длина периода запроса
+
+# Постраничные документы о продажах: <sales_data page="1" pages="N"> или <sales_data next="URL">
+FEED_PAGE_PARAM = os.getenv("FEED_PAGE_PARAM", "page")  # Параметр запроса с номером страницы
+FEED_PAGE_CONCURRENCY = int(os.getenv("FEED_PAGE_CONCURRENCY", "4"))  # Одновременно загружаемых страниц
+FEED_MAX_PAGES = int(os.getenv("FEED_MAX_PAGES", "1000"))  # Предел страниц одного документа
+FEED_STAGING_TTL = int(os.getenv("FEED_STAGING_TTL", str(60 * 60)))  # Хранение загруженных страниц для повтора, сек
+
+# Проверка наличия обязательных переменных окружения.
+# GEMINI_API проверяется при первом обращении к модели (get_model), чтобы
+# веб-процесс и воркеры на fake-бэкенде не зависели от ключа и SDK Gemini.
 required_env_vars = [
-    "GEMINI_API", "PGUSERNAME", "PGPASSWORD", "PGHOST", "PGPORT", "PGDATABASE"
+    "PGUSERNAME", "PGPASSWORD", "PGHOST", "PGPORT", "PGDATABASE"
 ]
 missing_env_vars = [var for var in required_env_vars if not globals().get(var)]
 
@@ -30,38 +149,63 @@ if missing_env_vars:
     logger.critical(error_message)
     raise ValueError(error_message)
 
-# Конфигурация Gemini AI
-try:
-    # Настройка API Gemini
-    genai.configure(api_key=GEMINI_API)
-    generation_config = {
-        "temperature": 1.0,
-        "top_p": 0.95,
-        "top_k": 40,
-        "max_output_tokens": 1024,
-        "response_mime_type": "text/plain",
-    }
-
-    # Настройки безопасности для Gemini
-    safety_settings = {
-        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-    }
-
-    # Инициализация модели
-    model = genai.GenerativeModel(
-        model_name="gemini-1.5-pro",
-        system_instruction=(
-            "Ты должен отвечать только на Русском языке.\n"
-            "Когда проводишь математические расчёты то пиши их шаг за шагом.\n"
-            "Ты лучший аналитик."
-        ),
-        generation_config=generation_config,
-        safety_settings=safety_settings
-    )
-
-except Exception as e:
-    logger.critical(f"Ошибка при настройке Gemini AI: {e}", exc_info=True)
-    raise
+# Конфигурация генерации Gemini AI
+generation_config = {
+    "temperature": 1.0,
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 1024,
+    "response_mime_type": "text/plain",
+}
+
+
+@lru_cache(maxsize=None)
+def get_model():
+    """
+    Лениво настраивает Gemini AI и создаёт модель.
+
+    Импорт google.generativeai занимает заметную часть времени запуска,
+    поэтому SDK загружается только при первом вызове LLM, а не при
+    импорте конфигурации.
+
+    Returns:
+        genai.GenerativeModel: Настроенная модель Gemini.
+
+    Raises:
+        ValueError: Если не задана переменная окружения GEMINI_API.
+    """
+    if not GEMINI_API:
+        error_message = "Отсутствуют обязательные переменные окружения: GEMINI_API"
+        logger.critical(error_message)
+        raise ValueError(error_message)
+
+    try:
+        import google.generativeai as genai
+        from google.generativeai.types import HarmCategory, HarmBlockThreshold
+
+        # Настройка API Gemini
+        genai.configure(api_key=GEMINI_API)
+
+        # Настройки безопасности для Gemini
+        safety_settings = {
+            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+        }
+
+        # Инициализация модели
+        return genai.GenerativeModel(
+            model_name="gemini-1.5-pro",
+            system_instruction=(
+                "Ты должен отвечать только на Русском языке.\n"
+                "Когда проводишь математические расчёты то пиши их шаг за шагом.\n"
+                "Ты лучший аналитик."
+            ),
+            generation_config=generation_config,
+            safety_settings=safety_settings
+        )
+
+    except Exception as e:
+        logger.critical(f"Ошибка при настройке Gemini AI: {e}", exc_info=True)
+        raise
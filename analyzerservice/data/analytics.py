@@ -0,0 +1,152 @@
+from datetime import date
+from typing import Iterable, Optional
+import logging
+
+from sqlalchemy import Date, cast, delete, exists, func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+
+from .dbbase import async_session
+from .dbbase import Product, DailySales
+
+logger = logging.getLogger(__name__)
+
+# Ключ рекомендательной блокировки PostgreSQL для первичного заполнения итогов
+_BACKFILL_LOCK_ID = 0x5A1E5
+
+
+def _refresh_statements(dates: Optional[list[date]]) -> tuple:
+    """Запросы пересчёта итогов: удаление устаревших строк и upsert новых."""
+    totals = select(
+        Product.date_sell,
+        Product.category,
+        func.sum(Product.price * Product.quantity),
+        func.sum(Product.quantity),
+        func.count(),
+    ).group_by(Product.date_sell, Product.category)
+    stale = delete(DailySales)
+    if dates is not None:
+        totals = totals.where(Product.date_sell.in_(dates))
+        stale = stale.where(DailySales.date_sell.in_(dates))
+
+    upsert = insert(DailySales).from_select(
+        ["date_sell", "category", "revenue", "quantity", "rows"], totals
+    )
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[DailySales.date_sell, DailySales.category],
+        set_={
+            "revenue": upsert.excluded.revenue,
+            "quantity": upsert.excluded.quantity,
+            "rows": upsert.excluded.rows,
+            "updated_at": func.now(),
+        },
+    )
+    return stale, upsert
+
+
+async def refresh_daily_sales(dates: Optional[Iterable[date]] = None) -> None:
+    """
+    Пересчитывает итоги продаж по дням и категориям из таблицы продуктов.
+
+    Итоги за даты пересчитываются целиком: строки категорий, которых больше
+    нет, удаляются. Одновременный пересчёт одной даты из разных процессов
+    безопасен: вставка выполняется как upsert.
+
+    Args:
+        dates: Даты для пересчёта. None - пересчитать все даты.
+    """
+    dates = sorted(set(dates)) if dates is not None else None
+    async with async_session() as session:
+        for statement in _refresh_statements(dates):
+            await session.execute(statement)
+        await session.commit()
+    logger.debug("Итоги продаж пересчитаны за %s.", dates if dates is not None else "все даты")
+
+
+async def backfill_daily_sales() -> bool:
+    """
+    Заполняет итоги продаж, если таблица итогов пуста, а продукты уже есть.
+
+    Returns:
+        True, если итоги были рассчитаны.
+    """
+    async with async_session() as session:
+        # Процессы uvicorn стартуют одновременно: заполняет итоги только один из них
+        await session.execute(select(func.pg_advisory_xact_lock(_BACKFILL_LOCK_ID)))
+        has_totals = await session.scalar(select(exists().select_from(DailySales)))
+        has_products = await session.scalar(select(exists().select_from(Product)))
+        if has_totals or not has_products:
+            return False
+        for statement in _refresh_statements(None):
+            await session.execute(statement)
+        await session.commit()
+    logger.info("Итоги продаж рассчитаны по всем загруженным данным.")
+    return True
+
+
+async def get_sales_by_period(start_date: date, end_date: date, group_by: str) -> list[tuple]:
+    """
+    Возвращает итоги продаж за период, сгруппированные по дню, неделе или месяцу.
+
+    Args:
+        start_date: Первая дата периода (включительно).
+        end_date: Последняя дата периода (включительно).
+        group_by: Группировка: day, week (с понедельника) или month.
+
+    Returns:
+        Список кортежей (начало периода, категория, выручка, количество, строки),
+        упорядоченный по периоду и категории.
+
+    Raises:
+        ValueError: Если группировка не поддерживается.
+    """
+    if group_by == "day":
+        period = DailySales.date_sell
+    elif group_by in ("week", "month"):
+        # Единица встраивается в запрос литералом: параметры в SELECT и GROUP BY
+        # были бы разными, и PostgreSQL не счёл бы выражения одинаковыми
+        period = cast(func.date_trunc(literal_column(f"'{group_by}'"), DailySales.date_sell), Date)
+    else:
+        raise ValueError(f"Неизвестная группировка: {group_by}")
+    period = period.label("period")
+
+    async with async_session() as session:
+        result = await session.execute(
+            select(
+                period,
+                DailySales.category,
+                func.sum(DailySales.revenue),
+                func.sum(DailySales.quantity),
+                func.sum(DailySales.rows),
+            )
+            .where(DailySales.date_sell.between(start_date, end_date))
+            .group_by(period, DailySales.category)
+            .order_by(period, DailySales.category)
+        )
+        return [tuple(row) for row in result.all()]
+
+
+async def get_sales_version(start_date: date, end_date: date) -> tuple:
+    """
+    Возвращает признак версии итогов за период для ETag.
+
+    Меняется при любом пересчёте итогов периода. Сумма времён пересчёта
+    вместо максимума учитывает и транзакции, завершившиеся не в порядке начала.
+
+    Args:
+        start_date: Первая дата периода (включительно).
+        end_date: Последняя дата периода (включительно).
+
+    Returns:
+        Кортеж (число строк итогов, число строк продаж, выручка, сумма времён пересчёта).
+    """
+    async with async_session() as session:
+        result = await session.execute(
+            select(
+                func.count(),
+                func.coalesce(func.sum(DailySales.rows), 0),
+                func.coalesce(func.sum(DailySales.revenue), 0),
+                func.coalesce(func.sum(func.extract("epoch", DailySales.updated_at)), 0),
+            )
+            .where(DailySales.date_sell.between(start_date, end_date))
+        )
+        return tuple(result.one())
@@ -1,76 +1,107 @@
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
 import xml.etree.ElementTree as ET
 import logging
+import time
 
-from fastapi import HTTPException
 from sqlalchemy import select
 
 from .dbbase import async_session
 from .dbbase import Product
 from analyzerservice.model.schemas import ProductSchema
-from analyzerservice.errors import Missing
+from analyzerservice.errors import FeedError, Missing
+from analyzerservice.metrics import INGEST_BYTES, INGEST_ROWS, XML_PARSE_SECONDS
 
 logger = logging.getLogger(__name__)
 
-async def get_xml_data(response: bytes) -> ProductSchema:
+@dataclass
+class SalesPage:
     """
-    Извлекает данные о продуктах из XML и сохраняет их в базу данных.
+    Разобранная страница документа <sales_data>.
+
+    Attributes:
+        date_sell: Дата продаж.
+        products: Продукты страницы.
+        page: Номер страницы (атрибут page) или None.
+        pages: Общее число страниц (атрибут pages) или None.
+        next_url: Адрес следующей страницы (атрибут next) или None.
+    """
+    date_sell: date
+    products: list[ProductSchema]
+    page: Optional[int] = None
+    pages: Optional[int] = None
+    next_url: Optional[str] = None
+
+
+def parse_sales_page(response: bytes) -> SalesPage:
+    """
+    Разбирает страницу XML документа без сохранения в базу данных.
 
     Args:
         response (bytes): XML данные в виде байтовой строки.
 
     Returns:
-        Словарь с сообщением об успешном сохранении данных.
+        SalesPage: Дата, продукты и атрибуты постраничной выдачи.
+
+    Raises:
+        ET.ParseError: Если документ не является корректным XML.
+        FeedError: Если данные продукта или атрибуты страницы некорректны.
     """
+    started = time.perf_counter()
+    xml_data = ET.fromstring(response)
+    XML_PARSE_SECONDS.observe(time.perf_counter() - started)
+    INGEST_BYTES.inc(len(response))
     try:
-        # Парсинг XML данных
-        xml_data = ET.fromstring(response)
-        date = datetime.strptime(xml_data.attrib.get('date'), '%Y-%m-%d').date()
-
+        date_sell = datetime.strptime(xml_data.attrib.get('date'), '%Y-%m-%d').date()
+        number, pages = xml_data.attrib.get('page'), xml_data.attrib.get('pages')
+        page = SalesPage(
+            date_sell=date_sell,
+            products=[],
+            page=int(number) if number else None,
+            pages=int(pages) if pages else None,
+            next_url=xml_data.attrib.get('next') or None,
+        )
         for product in xml_data.iter('product'):
-            try:
-                # Извлечение данных о продукте
-                quantity = int(product.find('quantity').text)
-                price = float(product.find('price').text)
-                product_schema = ProductSchema(
-                    date_sell=date,
-                    name=product.find('name').text,
-                    quantity=quantity,
-                    price=price,
-                    category=product.find('category').text
-                )
-                # Сохранение данных в базу
-                await set_product(product_schema)
-            except ValueError as e:
-                logger.exception(f"Ошибка преобразования данных продукта: {e}")
-                raise HTTPException(status_code=400, detail=f"Плохой запрос: {e}") from e
-
-        return product_schema
-    except ET.ParseError as e:
-        raise
-    except Exception as e:
-        logger.exception(f"Непредвиденная ошибка: {e}") # логирование непредвиденной ошибки
-        raise
-
-
-async def set_product(product_schema: ProductSchema) -> None:
+            page.products.append(ProductSchema(
+                date_sell=date_sell,
+                name=product.find('name').text,
+                quantity=int(product.find('quantity').text),
+                price=float(product.find('price').text),
+                category=product.find('category').text
+            ))
+    except ValueError as e:
+        logger.exception(f"Ошибка преобразования данных страницы: {e}")
+        raise FeedError(str(e)) from e
+    return page
+
+
+async def save_products(products: list[ProductSchema]) -> int:
     """
-    Сохраняет данные о продукте в базу данных.
+    Сохраняет продукты в базу данных одной транзакцией.
+
+    Либо сохраняются все продукты, либо ни один.
 
     Args:
-        product_schema (ProductSchema): Данные о продукте для сохранения.
+        products (list[ProductSchema]): Данные о продуктах.
+
+    Returns:
+        int: Число сохранённых продуктов.
     """
     async with async_session() as session:
-        product = Product(
-            date_sell=product_schema.date_sell,
-            name=product_schema.name,
-            quantity=product_schema.quantity,
-            price=product_schema.price,
-            category=product_schema.category
-        )
-        session.add(product)
+        session.add_all([
+            Product(
+                date_sell=product.date_sell,
+                name=product.name,
+                quantity=product.quantity,
+                price=product.price,
+                category=product.category
+            )
+            for product in products
+        ])
         await session.commit()
-        logger.info(f"Продукт {product_schema.name} успешно сохранён в базе.")
+    INGEST_ROWS.inc(len(products))
+    return len(products)
 
 
 async def get_all() -> list[ProductSchema]:
@@ -85,7 +116,7 @@ async def get_all() -> list[ProductSchema]:
         products = result.all()
         return [ProductSchema.model_validate(product) for product in products]
     
-async def delete_product(product_id):
+async def delete_product(product_id) -> date:
     async with async_session() as session:
         result = await session.scalar(select(Product).where(Product.product_id==product_id))
 
@@ -94,3 +125,4 @@ async def delete_product(product_id):
         else:
             await session.delete(result)
             await session.commit()
+            return result.date_sell
@@ -1,16 +1,85 @@
-from sqlalchemy import Date, String, Integer, Float, Text
+import time
+
+from sqlalchemy import Date, DateTime, String, Integer, Float, Text, event, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine
-from analyzerservice.config import PGUSERNAME, PGPASSWORD, PGHOST, PGPORT, PGDATABASE
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from analyzerservice.config import (
+    PGUSERNAME, PGPASSWORD, PGHOST, PGPORT, PGDATABASE, DB_POOL_SIZE, DB_MAX_OVERFLOW
+)
+from analyzerservice.metrics import DB_POOL_WAIT_SECONDS, DB_QUERY_SECONDS
 import logging
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
+_STATEMENT_TYPES = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE"})
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, измеряющий ожидание свободного соединения.
+
+    Кроме гистограммы ведёт скользящее среднее ожидания, которое затухает
+    со временем: после прекращения нагрузки оно возвращается к нулю, даже
+    если к пулу никто не обращается.
+    """
+
+    # Время, за которое скользящее среднее уменьшается вдвое, сек
+    wait_halflife = 5.0
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._recent_wait = 0.0
+        self._recent_wait_at = time.monotonic()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            DB_POOL_WAIT_SECONDS.observe(waited)
+            self._recent_wait = self.recent_wait() * 0.8 + waited * 0.2
+            self._recent_wait_at = time.monotonic()
+
+    def recent_wait(self) -> float:
+        """Скользящее среднее ожидания соединения, сек."""
+        elapsed = time.monotonic() - self._recent_wait_at
+        return self._recent_wait * 0.5 ** (elapsed / self.wait_halflife)
+
+
 # Настройка асинхронного движка и сессии для работы с PostgreSQL
-asyncio_engine = create_async_engine(f"postgresql+psycopg://{PGUSERNAME}:{PGPASSWORD}@{PGHOST}:{PGPORT}/{PGDATABASE}")
+asyncio_engine = create_async_engine(
+    f"postgresql+psycopg://{PGUSERNAME}:{PGPASSWORD}@{PGHOST}:{PGPORT}/{PGDATABASE}",
+    poolclass=TimedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+)
+
+
+@event.listens_for(asyncio_engine.sync_engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context.query_started = time.perf_counter()
+
+
+@event.listens_for(asyncio_engine.sync_engine, "after_cursor_execute")
+def _observe_query_time(conn, cursor, statement, parameters, context, executemany):
+    started = context.query_started
+    statement_type = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    DB_QUERY_SECONDS.labels(statement_type if statement_type in _STATEMENT_TYPES else "OTHER").observe(
+        time.perf_counter() - started
+    )
+
+
 async_session = async_sessionmaker(asyncio_engine, expire_on_commit=False)
 
+
+def pool_wait_seconds() -> float:
+    """Возвращает скользящее среднее ожидания соединения из пула, сек."""
+    return asyncio_engine.pool.recent_wait()
+
 class Base(AsyncAttrs, DeclarativeBase):
     """
     Базовый класс для моделей SQLAlchemy.
@@ -62,6 +131,31 @@ class Analysis(Base):
     ai_analysis: Mapped[str | None] = mapped_column(Text, nullable=True)
 
 
+class DailySales(Base):
+    """
+    Предрасчитанные итоги продаж за день по категории.
+
+    Обновляются при загрузке и удалении продуктов; из них строятся ответы
+    аналитики без чтения исходных строк.
+
+    Атрибуты:
+        date_sell: Дата продажи.
+        category: Категория продукта.
+        revenue: Выручка (сумма цена * количество).
+        quantity: Продано единиц.
+        rows: Число строк продаж.
+        updated_at: Время последнего пересчёта.
+    """
+    __tablename__ = "daily_sales"
+
+    date_sell: Mapped[Date] = mapped_column(Date, primary_key=True)
+    category: Mapped[str] = mapped_column(String, primary_key=True)
+    revenue: Mapped[float] = mapped_column(Float)
+    quantity: Mapped[int] = mapped_column(Integer)
+    rows: Mapped[int] = mapped_column(Integer)
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
 async def async_main() -> None:
     """
     Асинхронная функция для создания таблиц в базе данных.
@@ -72,3 +166,14 @@ async def async_main() -> None:
     """
     async with asyncio_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+
+async def dispose_engine(close: bool = True) -> None:
+    """
+    Освобождает пул соединений движка.
+
+    Args:
+        close: Закрывать ли соединения. При False соединения, унаследованные
+            процессом после fork, просто забываются и не трогают сокеты родителя.
+    """
+    await asyncio_engine.dispose(close=close)
@@ -6,9 +6,38 @@ from sqlalchemy import select
 
 from .dbbase import async_session
 from .dbbase import Product, Analysis
+from analyzerservice.model.schemas import AnalysisSchema
+from analyzerservice.errors import Missing
 
 logger = logging.getLogger(__name__)
 
+def _build_prompt(date_sell: date, products: list[Product]) -> str:
+    """
+    Формирует текст промпта по продажам за одну дату.
+
+    Args:
+        date_sell: Дата продаж.
+        products: Непустой список продаж за эту дату.
+
+    Returns:
+        Строку с промптом для LLM.
+    """
+    total_revenue = sum(product.price * product.quantity for product in products)
+    top_products = [{"Имя": product.name, "Цена": product.price, "Категория": product.category, "Продано": product.quantity}\
+        for product in sorted(products, key=lambda p: p.quantity, reverse=True)[:3]]
+
+    category_counts = Counter(product.category for product in products)
+    categories = [f"{category}: {count}" for category, count in category_counts.items()]
+
+    prompt = f"""Проанализируй данные о продажах за {date_sell}:
+1. Общая выручка: {total_revenue}
+2. Топ-3 товара по продажам: {top_products}
+3. Распределение по категориям: {categories}
+
+Составь краткий аналитический отчет с выводами и рекомендациями."""
+    return prompt
+
+
 async def construct_prompt_by_date(target_date: date) -> str:
     """
     Формирует промпт для LLM на основе данных о продажах за указанную дату.
@@ -29,31 +58,90 @@ async def construct_prompt_by_date(target_date: date) -> str:
             logger.info(f"Нет данных за {target_date}.")
             return f"No data found for {target_date}"
 
+        return _build_prompt(products[0].date_sell, products)
+
+
+async def construct_prompts_by_range(start_date: date, end_date: date) -> dict[date, str]:
+    """
+    Формирует промпты для всех дат диапазона одним запросом к базе.
+
+    Args:
+        start_date: Первая дата диапазона (включительно).
+        end_date: Последняя дата диапазона (включительно).
+
+    Returns:
+        Словарь {дата: промпт}. Даты без данных в словарь не попадают.
+    """
+    async with async_session() as session:
+        result = await session.scalars(
+            select(Product).where(Product.date_sell.between(start_date, end_date))
+        )
+
+        products_by_date: dict[date, list[Product]] = {}
+        for product in result.all():
+            products_by_date.setdefault(product.date_sell, []).append(product)
+
+        return {
+            date_sell: _build_prompt(date_sell, products)
+            for date_sell, products in sorted(products_by_date.items())
+        }
+
+
+async def construct_period_prompt(start_date: date, end_date: date) -> str:
+    """
+    Формирует промпт для сводного отчёта за период.
+
+    Args:
+        start_date: Первая дата периода (включительно).
+        end_date: Последняя дата периода (включительно).
+
+    Returns:
+        Строку с промптом для LLM.  Если данных за период нет,
+        возвращает строку с сообщением об отсутствии данных.
+    """
+    async with async_session() as session:
+        result = await session.scalars(
+            select(Product).where(Product.date_sell.between(start_date, end_date))
+        )
+
+        products = result.all()
+
+        if not products:
+            logger.info(f"Нет данных за период {start_date} - {end_date}.")
+            return f"No data found for {start_date} - {end_date}"
 
-        date_sell = products[0].date_sell
         total_revenue = sum(product.price * product.quantity for product in products)
-        top_products = [{"Имя": product.name, "Цена": product.price, "Категория": product.category, "Продано": product.quantity}\
-            for product in sorted(products, key=lambda p: p.quantity, reverse=True)[:3]]
+
+        daily_revenue: Counter = Counter()
+        sold: Counter = Counter()
+        for product in products:
+            daily_revenue[product.date_sell.isoformat()] += product.price * product.quantity
+            sold[product.name] += product.quantity
+        top_products = [{"Имя": name, "Продано": quantity} for name, quantity in sold.most_common(3)]
 
         category_counts = Counter(product.category for product in products)
         categories = [f"{category}: {count}" for category, count in category_counts.items()]
 
-        prompt = f"""Проанализируй данные о продажах за {date_sell}:
+        prompt = f"""Проанализируй данные о продажах за период с {start_date} по {end_date}:
 1. Общая выручка: {total_revenue}
-2. Топ-3 товара по продажам: {top_products}
-3. Распределение по категориям: {categories}
+2. Выручка по дням: {dict(sorted(daily_revenue.items()))}
+3. Топ-3 товара по продажам: {top_products}
+4. Распределение по категориям: {categories}
 
-Составь краткий аналитический отчет с выводами и рекомендациями."""
+Составь краткий сводный отчет за период с выводами о динамике и рекомендациями."""
         return prompt
 
 
-async def set_ai_analysis(date: date, analysis: str) -> None:
+async def set_ai_analysis(date: date, analysis: str) -> int:
     """
     Сохраняет анализ, полученный от LLM, в базу данных.
 
     Args:
         date: Дата, к которой относится анализ.
         analysis: Текст анализа, полученный от LLM.
+
+    Returns:
+        Идентификатор сохранённой записи анализа.
     """
     async with async_session() as session:
         result = Analysis(
@@ -62,3 +150,42 @@ async def set_ai_analysis(date: date, analysis: str) -> None:
         )
         session.add(result)
         await session.commit()
+        return result.analysis_id
+
+
+async def get_analysis(analysis_id: int) -> AnalysisSchema:
+    """
+    Возвращает сохранённый анализ по идентификатору.
+
+    Args:
+        analysis_id: Идентификатор записи анализа.
+
+    Returns:
+        Pydantic модель анализа.
+
+    Raises:
+        Missing: Если анализ с таким идентификатором не найден.
+    """
+    async with async_session() as session:
+        result = await session.get(Analysis, analysis_id)
+
+        if not result:
+            raise Missing(msg=f"Analysis {analysis_id} not found")
+        return AnalysisSchema.model_validate(result)
+
+
+async def get_recent_dates(limit: int) -> list[date]:
+    """
+    Возвращает последние даты, за которые в базе есть данные о продажах.
+
+    Args:
+        limit: Максимальное количество дат.
+
+    Returns:
+        Список дат в порядке убывания.
+    """
+    async with async_session() as session:
+        result = await session.scalars(
+            select(Product.date_sell).distinct().order_by(Product.date_sell.desc()).limit(limit)
+        )
+        return list(result.all())
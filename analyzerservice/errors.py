@@ -5,3 +5,42 @@ class Missing(Exception):
 
     def __str__(self) -> str:
         return f"Missing: {self.msg}"  # Переопределяем метод для вывода сообщения
+
+
+class RateLimited(Exception):
+    def __init__(self, msg: str, retry_after: float = 0.0) -> None:
+        super().__init__(msg)
+        self.msg = msg
+        self.retry_after = retry_after  # Через сколько секунд имеет смысл повторить
+
+    def __str__(self) -> str:
+        return f"RateLimited: {self.msg}"
+
+
+class Overloaded(Exception):
+    def __init__(self, msg: str, retry_after: int = 1, reason: str = "overloaded") -> None:
+        super().__init__(msg)
+        self.msg = msg
+        self.retry_after = retry_after  # Через сколько секунд имеет смысл повторить
+        self.reason = reason  # queue_full, queue_timeout, queue_depth или db_pool_wait
+
+    def __str__(self) -> str:
+        return f"Overloaded: {self.msg}"
+
+
+class FeedError(ValueError):
+    def __init__(self, msg: str) -> None:
+        super().__init__(msg)
+        self.msg = msg  # Документ некорректен; веб-слой отвечает 400
+
+    def __str__(self) -> str:
+        return f"FeedError: {self.msg}"
+
+
+class FeedUnavailable(Exception):
+    def __init__(self, msg: str) -> None:
+        super().__init__(msg)
+        self.msg = msg  # Источник документа временно недоступен (5xx); загрузку можно повторить
+
+    def __str__(self) -> str:
+        return f"FeedUnavailable: {self.msg}"
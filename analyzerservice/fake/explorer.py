@@ -1,4 +1,3 @@
-from datetime import datetime
 import xml.etree.ElementTree as ET
 import logging
 from typing import List, Dict
@@ -18,28 +17,10 @@ async def get_xml_data(response: bytes) -> Dict[str, str]:
         Словарь с сообщением об успешном сохранении данных или об ошибке.
     """
     try:
-        # Парсим XML
-        xml_data = ET.fromstring(response)
-        date = datetime.strptime(xml_data.attrib.get('date'), '%Y-%m-%d').date()
-
-        for product in xml_data.iter('product'):
-            try:
-                # Сохраняем каждый продукт в базе данных
-                await data.set_product(
-                    product_id=int(product.find('id').text),  # Преобразование типов здесь
-                    date_sell=date,
-                    name=product.find('name').text,
-                    quantity=int(product.find('quantity').text),  # Преобразование типов здесь
-                    price=float(product.find('price').text),  # Преобразование типов здесь
-                    category=product.find('category').text
-                )
-            except ValueError as e:
-                logger.error(f"Ошибка преобразования данных продукта: {e}")
-            except Exception as e:
-                logger.error(f"Ошибка обработки продукта: {e}")
-
+        # Разбираем документ и сохраняем все продукты одной транзакцией
+        page = data.parse_sales_page(response)
+        await data.save_products(page.products)
         return {"message": "Data saved successfully."}
-    
     except ET.ParseError as e:
         logger.error(f"Ошибка парсинга XML: {e}")
         return {"error": f"Ошибка парсинга XML: {e}"}
@@ -0,0 +1,122 @@
+import glob
+import os
+import logging
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+    start_http_server
+)
+
+from analyzerservice.config import METRICS_MULTIPROC_DIR
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# В режиме нескольких процессов (uvicorn --workers, prefork Celery) каждый
+# процесс пишет значения в файлы каталога PROMETHEUS_MULTIPROC_DIR, а экспортер
+# суммирует их. Каталог должен существовать до создания метрик.
+if METRICS_MULTIPROC_DIR:
+    os.makedirs(METRICS_MULTIPROC_DIR, exist_ok=True)
+
+# Границы гистограмм задержек, сек
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+_SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# Загрузка XML
+INGEST_ROWS = Counter("ingest_rows_total", "Сохранённые строки продаж из XML")
+INGEST_BYTES = Counter("ingest_bytes_total", "Объём обработанных XML документов, байт")
+XML_PARSE_SECONDS = Histogram("xml_parse_seconds", "Время разбора XML документа", buckets=_FAST_BUCKETS)
+
+# База данных
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds", "Время выполнения SQL запроса", ["statement"], buckets=_FAST_BUCKETS
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds", "Ожидание соединения из пула", buckets=_FAST_BUCKETS
+)
+
+# Кэш отчётов
+CACHE_REQUESTS = Counter("report_cache_requests_total", "Обращения к кэшу отчётов", ["result"])
+CACHE_SECONDS = Histogram(
+    "report_cache_seconds", "Время операции с кэшем отчётов", ["operation"], buckets=_FAST_BUCKETS
+)
+
+# LLM
+LLM_SECONDS = Histogram(
+    "llm_call_seconds", "Время вызова LLM", ["backend", "outcome"], buckets=_SLOW_BUCKETS
+)
+LLM_TOKENS = Counter("llm_tokens_total", "Оценка токенов LLM (символы / 4)", ["backend", "kind"])
+
+# Контроль допуска запросов
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total", "Запросы, отклонённые контролем допуска", ["endpoint_class", "reason"]
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "admission_queue_wait_seconds", "Ожидание слота контроля допуска", ["endpoint_class"], buckets=_FAST_BUCKETS
+)
+
+# Задачи Celery
+TASK_QUEUE_WAIT_SECONDS = Histogram(
+    "celery_task_queue_wait_seconds", "Время задачи в очереди до начала выполнения", ["task"],
+    buckets=_SLOW_BUCKETS
+)
+TASK_RUN_SECONDS = Histogram(
+    "celery_task_run_seconds", "Время выполнения задачи", ["task", "state"], buckets=_SLOW_BUCKETS
+)
+
+
+def collector_registry() -> CollectorRegistry:
+    """
+    Возвращает реестр для экспорта метрик.
+
+    Returns:
+        CollectorRegistry: Сводный реестр всех процессов в режиме нескольких
+        процессов, иначе реестр текущего процесса.
+    """
+    if not METRICS_MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """
+    Формирует ответ в текстовом формате Prometheus.
+
+    Returns:
+        Tuple[bytes, str]: Тело ответа и его Content-Type.
+    """
+    return generate_latest(collector_registry()), CONTENT_TYPE_LATEST
+
+
+def clear_multiproc_dir() -> None:
+    """
+    Удаляет файлы метрик предыдущего запуска; вызывается до запуска дочерних процессов.
+
+    Файлы текущего процесса (<тип>_<pid>.db) сохраняются: они открыты через
+    mmap при импорте модуля, и после удаления значения процесса (в том числе
+    у пулов solo и threads, где задачи выполняет сам процесс) пропали бы из
+    экспорта.
+    """
+    if not METRICS_MULTIPROC_DIR:
+        return
+    own_pid = str(os.getpid())
+    for path in glob.glob(os.path.join(METRICS_MULTIPROC_DIR, "*.db")):
+        if os.path.basename(path)[:-len(".db")].rsplit("_", 1)[-1] != own_pid:
+            os.remove(path)
+
+
+def start_exporter(port: int) -> None:
+    """
+    Запускает HTTP экспортер метрик для процессов без FastAPI (воркеры Celery).
+
+    Args:
+        port (int): Порт экспортера; 0 отключает экспорт.
+    """
+    if port <= 0:
+        return
+    start_http_server(port, registry=collector_registry())
+    logger.info(f"Экспортер метрик запущен на порту {port}.")
@@ -20,3 +20,23 @@ class AnalysisSchema(BaseModel):
     analysis_id: int
     date_sell: date
     ai_analysis: Optional[str] = None
+
+
+class SalesTotalsSchema(BaseModel):
+    revenue: float = 0
+    quantity: int = 0
+    rows: int = 0
+
+
+class SalesPeriodSchema(SalesTotalsSchema):
+    period: date  # Первый день периода
+    categories: dict[str, SalesTotalsSchema] = {}
+
+
+class SalesAnalyticsSchema(BaseModel):
+    start_date: date
+    end_date: date
+    group_by: str
+    totals: SalesTotalsSchema
+    categories: dict[str, SalesTotalsSchema]
+    periods: list[SalesPeriodSchema]
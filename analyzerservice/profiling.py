@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from types import FrameType
+from typing import Iterable, List, Optional
+
+from analyzerservice.config import PROFILING_TOKEN, PROFILING_DIR, PROFILING_INTERVAL, PROFILING_MAX_SECONDS
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Имя заголовка HTTP, параметра запроса и заголовка сообщения Celery
+PROFILE_PARAM = "profile"
+PROFILE_HEADER = "x-profile"
+
+# Запрошено ли профилирование задач, поставленных в текущем контексте
+profile_tasks: ContextVar[bool] = ContextVar("profile_tasks", default=False)
+
+# Одновременно в процессе снимается не больше одного профиля
+_active = threading.Lock()
+
+# Срок действия признака профилирования в заголовке задачи Celery (включая ожидание в очереди), сек
+_TASK_FLAG_TTL = 3600
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    """
+    Проверяет токен профилирования.
+
+    Args:
+        token (Optional[str]): Токен из заголовка или параметра запроса.
+
+    Returns:
+        bool: True, если профилирование включено (PROFILING_TOKEN задан) и токен совпадает.
+    """
+    return bool(PROFILING_TOKEN and token) and hmac.compare_digest(token, PROFILING_TOKEN)
+
+
+def _task_signature(task_id: str, expires: int) -> str:
+    message = f"profile:{task_id}:{expires}".encode()
+    return hmac.new(PROFILING_TOKEN.encode(), message, hashlib.sha256).hexdigest()
+
+
+def sign_task_flag(task_id: str) -> str:
+    """
+    Формирует признак профилирования для заголовка задачи Celery.
+
+    Сам токен в сообщение не попадает: признак подписан HMAC от токена,
+    привязан к идентификатору задачи и действует ограниченное время, поэтому
+    из брокера его нельзя использовать для других задач.
+
+    Args:
+        task_id (str): Идентификатор задачи.
+
+    Returns:
+        str: Признак вида "<срок действия>:<подпись>".
+    """
+    expires = int(time.time()) + _TASK_FLAG_TTL
+    return f"{expires}:{_task_signature(task_id, expires)}"
+
+
+def verify_task_flag(task_id: str, flag: Optional[str]) -> bool:
+    """
+    Проверяет признак профилирования из заголовка задачи.
+
+    Args:
+        task_id (str): Идентификатор выполняемой задачи.
+        flag (Optional[str]): Значение заголовка.
+
+    Returns:
+        bool: True, если профилирование включено, подпись верна и срок не истёк.
+    """
+    if not (PROFILING_TOKEN and flag and task_id):
+        return False
+    expires, _, signature = str(flag).partition(":")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _task_signature(task_id, int(expires)))
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame: Optional[FrameType]) -> List[str]:
+    """Стек вызовов потока от внешнего вызова к текущему."""
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _await_stack(task: asyncio.Task) -> List[str]:
+    """Цепочка ожидающих корутин приостановленной задачи asyncio."""
+    stack = []
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "ag_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(_frame_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "ag_await", None) or getattr(coro, "gi_yieldfrom", None)
+    stack.append("[await]")
+    return stack
+
+
+class SamplingProfiler:
+    """
+    Профилировщик, снимающий стеки потоков с заданным интервалом.
+
+    Работает в отдельном потоке и не вмешивается в выполнение кода, поэтому
+    накладные расходы ограничены частотой выборки. Для задачи asyncio
+    профиль строится по реальному времени: пока задача ждёт ввода-вывода,
+    в профиль попадает цепочка ожидающих корутин с пометкой [await].
+
+    Attributes:
+        name (str): Название профилируемой операции.
+        path (str): Файл, в который будет сохранён профиль.
+        thread_ids (List[int]): Профилируемые потоки.
+        task (Optional[asyncio.Task]): Задача asyncio, выполняющаяся в первом из потоков.
+        interval (float): Интервал выборки в секундах.
+        samples (Counter): Число выборок по свёрнутым стекам.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        thread_ids: Iterable[int],
+        task: Optional[asyncio.Task] = None,
+        interval: float = PROFILING_INTERVAL,
+        max_seconds: float = PROFILING_MAX_SECONDS
+    ) -> None:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_")[:80]
+        self.name = name
+        self.path = os.path.join(
+            PROFILING_DIR, f"{time.strftime('%Y%m%dT%H%M%S')}-{safe_name}-{os.getpid()}-{id(self):x}.folded"
+        )
+        self.thread_ids: List[int] = list(thread_ids)
+        self.task = task
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+    def start(self) -> "SamplingProfiler":
+        """Запускает поток выборки."""
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Останавливает поток выборки."""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            frames = sys._current_frames()
+            for index, thread_id in enumerate(self.thread_ids):
+                root = self._thread_names.get(thread_id, str(thread_id))
+                try:
+                    if index == 0 and self.task is not None and not self._task_running():
+                        if self.task.done():
+                            continue
+                        stack = _await_stack(self.task)
+                    else:
+                        stack = _thread_stack(frames.get(thread_id))
+                except (AttributeError, RuntimeError):
+                    continue
+                if stack:
+                    self.samples[";".join([root, *stack])] += 1
+
+    def _task_running(self) -> bool:
+        """Выполняется ли сейчас профилируемая задача на своём цикле событий."""
+        return bool(getattr(self.task.get_coro(), "cr_running", False))
+
+    def write(self) -> str:
+        """
+        Сохраняет профиль в свёрнутом формате (flamegraph.pl, speedscope, inferno).
+
+        Returns:
+            str: Путь к файлу профиля.
+        """
+        os.makedirs(PROFILING_DIR, exist_ok=True)
+        with open(self.path, "w") as file:
+            for stack, count in self.samples.most_common():
+                file.write(f"{stack} {count}\n")
+        logger.info(f"Профиль {self.name} сохранён: {self.path} ({sum(self.samples.values())} выборок).")
+        return self.path
+
+
+def try_acquire() -> bool:
+    """Занимает слот профилирования процесса; False, если профиль уже снимается."""
+    return _active.acquire(blocking=False)
+
+
+def release() -> None:
+    """Освобождает слот профилирования процесса."""
+    _active.release()
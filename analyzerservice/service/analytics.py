@@ -0,0 +1,82 @@
+from datetime import date
+import hashlib
+import logging
+
+from analyzerservice.data import analytics as data
+from analyzerservice.model.schemas import SalesAnalyticsSchema, SalesPeriodSchema, SalesTotalsSchema
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+
+def _add(totals: SalesTotalsSchema, revenue: float, quantity: int, rows: int) -> None:
+    totals.revenue += revenue
+    totals.quantity += quantity
+    totals.rows += rows
+
+
+async def get_sales_analytics(start_date: date, end_date: date, group_by: str) -> SalesAnalyticsSchema:
+    """
+    Собирает выручку, количество и разбивку по категориям за период.
+
+    Args:
+        start_date (date): Первая дата периода (включительно).
+        end_date (date): Последняя дата периода (включительно).
+        group_by (str): Группировка: day, week или month.
+
+    Returns:
+        SalesAnalyticsSchema: Итоги за период, по категориям и по каждому периоду группировки.
+    """
+    rows = await data.get_sales_by_period(start_date, end_date, group_by)
+
+    totals = SalesTotalsSchema()
+    categories: dict[str, SalesTotalsSchema] = {}
+    periods: dict[date, SalesPeriodSchema] = {}
+    for period, category, revenue, quantity, count in rows:
+        bucket = periods.setdefault(period, SalesPeriodSchema(period=period, categories={}))
+        _add(bucket, revenue, quantity, count)
+        bucket.categories[category] = SalesTotalsSchema(revenue=revenue, quantity=quantity, rows=count)
+        _add(categories.setdefault(category, SalesTotalsSchema()), revenue, quantity, count)
+        _add(totals, revenue, quantity, count)
+
+    logger.debug("Аналитика за %s - %s: %d периодов.", start_date, end_date, len(periods))
+    return SalesAnalyticsSchema(
+        start_date=start_date,
+        end_date=end_date,
+        group_by=group_by,
+        totals=totals,
+        categories=dict(sorted(categories.items())),
+        periods=list(periods.values()),
+    )
+
+
+async def get_sales_etag(start_date: date, end_date: date, group_by: str) -> str:
+    """
+    Возвращает ETag ответа аналитики без построения самого ответа.
+
+    Args:
+        start_date (date): Первая дата периода (включительно).
+        end_date (date): Последняя дата периода (включительно).
+        group_by (str): Группировка: day, week или month.
+
+    Returns:
+        str: ETag в кавычках; меняется при любом пересчёте итогов периода.
+    """
+    version = await data.get_sales_version(start_date, end_date)
+    digest = hashlib.sha256(f"{start_date}:{end_date}:{group_by}:{version}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+async def refresh_sales_totals(dates: list[date]) -> None:
+    """
+    Пересчитывает итоги продаж за даты после изменения данных.
+
+    Args:
+        dates (list[date]): Изменённые даты.
+    """
+    await data.refresh_daily_sales(dates)
+
+
+async def backfill_sales_totals() -> None:
+    """Рассчитывает итоги продаж по уже загруженным данным при первом запуске."""
+    await data.backfill_daily_sales()
@@ -1,24 +1,247 @@
+from __future__ import annotations
+
 from analyzerservice.data import data_loader as data
+from analyzerservice.data.data_loader import SalesPage
+from analyzerservice.service import analytics
 from analyzerservice.model.schemas import ProductSchema
+from analyzerservice.config import FEED_PAGE_PARAM, FEED_PAGE_CONCURRENCY, FEED_MAX_PAGES
+from analyzerservice.tracing import start_span
+from analyzerservice.errors import FeedError
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+import asyncio
+import hashlib
 import logging
+import httpx
+
+if TYPE_CHECKING:
+    from analyzerservice.src.feed_staging import FeedStaging
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
-async def get_xml_data(response: bytes) -> dict:
+async def fetch_xml(url: str, client: Optional[httpx.AsyncClient] = None) -> bytes:
+    """
+    Загружает XML документ по URL.
+
+    Args:
+        url (str): URL адрес XML документа.
+        client (Optional[httpx.AsyncClient]): Общий клиент для загрузки нескольких страниц.
+
+    Returns:
+        bytes: Содержимое документа.
+
+    Raises:
+        httpx.HTTPStatusError: Если сервер вернул код ошибки.
+        httpx.ConnectError: Если не удалось подключиться к серверу.
+    """
+    logger.debug("Запрос XML данных с URL: %s", url)
+    with start_span("fetch_xml", url=url) as span:
+        if client is None:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                response = await client.get(url)
+        else:
+            response = await client.get(url)
+        response.raise_for_status()
+        span.set_attribute("bytes", len(response.content))
+    logger.info("Получен ответ от %s (%d байт).", url, len(response.content))
+    return response.content
+
+
+def page_url(url: str, page: int) -> str:
     """
-    Обрабатывает XML данные и сохраняет информацию о продуктах в базу данных.
+    Формирует URL страницы документа, заменяя параметр FEED_PAGE_PARAM.
 
     Args:
-        response (bytes): XML данные в виде байтовой строки.
+        url (str): URL первой страницы документа.
+        page (int): Номер страницы.
 
     Returns:
-        dict: Словарь с результатом операции, например, количеством обработанных записей.
+        str: URL страницы.
+    """
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != FEED_PAGE_PARAM]
+    query.append((FEED_PAGE_PARAM, str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _check_page_count(url: str, pages: int) -> None:
+    """Отклоняет документ, в котором больше FEED_MAX_PAGES страниц."""
+    if pages > FEED_MAX_PAGES:
+        raise FeedError(f"документ {url} содержит больше {FEED_MAX_PAGES} страниц")
+
+
+def _check_page(url: str, page: SalesPage, number: int, pages: Optional[int], numbered: bool) -> None:
+    """
+    Отклоняет страницу, атрибуты которой не совпадают с её местом в документе.
+
+    Args:
+        url (str): URL первой страницы документа.
+        page (SalesPage): Разобранная страница.
+        number (int): Ожидаемый номер страницы.
+        pages (Optional[int]): Ожидаемое число страниц (атрибут pages первой страницы).
+        numbered (bool): Атрибут page обязателен (страница загружена по номеру).
+
+    Raises:
+        FeedError: Если страница повторяет или сдвигает другую страницу документа.
+    """
+    if (page.page != number and (numbered or page.page is not None)) or page.pages != pages:
+        raise FeedError(
+            f"страница {number} документа {url} содержит page={page.page}, pages={page.pages}, "
+            f"ожидалось page={number}, pages={pages}"
+        )
+
+
+async def _fetch_numbered_pages(
+    url: str,
+    first: SalesPage,
+    client: httpx.AsyncClient,
+    staging: Optional[FeedStaging],
+    staged: dict[int, bytes]
+) -> dict[int, SalesPage]:
     """
-    logger.info("Начало обработки XML данных.")
-    result = await data.get_xml_data(response)
-    logger.info("XML данные успешно обработаны.")
-    return result
+    Загружает страницы 2..pages параллельно, не больше FEED_PAGE_CONCURRENCY одновременно.
+
+    Каждая загруженная страница проверяется и сразу сохраняется в staging,
+    поэтому при ошибке повторная загрузка запросит только недостающие страницы.
+
+    Raises:
+        FeedError: Если номер или число страниц на странице не совпадает с ожидаемым.
+        httpx.HTTPError: Ошибка загрузки первой из неудавшихся страниц.
+    """
+    _check_page_count(url, first.pages)
+    contents = {}
+    for page in range(2, first.pages + 1):
+        if page in staged:
+            contents[page] = data.parse_sales_page(staged[page])
+            _check_page(url, contents[page], page, first.pages, numbered=True)
+    missing = [page for page in range(2, first.pages + 1) if page not in contents]
+    semaphore = asyncio.Semaphore(FEED_PAGE_CONCURRENCY)
+
+    async def fetch_page(page: int) -> None:
+        async with semaphore:
+            content = await fetch_xml(page_url(url, page), client)
+        contents[page] = data.parse_sales_page(content)
+        _check_page(url, contents[page], page, first.pages, numbered=True)
+        if staging is not None:
+            await staging.save_page(url, page, content)
+
+    results = await asyncio.gather(*(fetch_page(page) for page in missing), return_exceptions=True)
+    failed = [(page, error) for page, error in zip(missing, results) if isinstance(error, BaseException)]
+    if failed:
+        logger.error(
+            "Не загружены страницы %s из %d документа %s; повторная загрузка продолжит с них.",
+            [page for page, _ in failed], first.pages, url
+        )
+        raise failed[0][1]
+    return contents
+
+
+async def _fetch_linked_pages(
+    url: str,
+    first: SalesPage,
+    client: httpx.AsyncClient,
+    staging: Optional[FeedStaging],
+    staged: dict[int, bytes]
+) -> dict[int, SalesPage]:
+    """
+    Загружает страницы по ссылкам next последовательно: адрес следующей страницы
+    известен только после разбора предыдущей.
+
+    Raises:
+        FeedError: Если атрибут page страницы не совпадает с её номером в цепочке.
+        httpx.HTTPError: Если не удалось загрузить очередную страницу.
+    """
+    contents = {}
+    page, current, current_url = 1, first, url
+    while current.next_url:
+        page += 1
+        _check_page_count(url, page)
+        current_url = urljoin(current_url, current.next_url)
+        content = staged.get(page)
+        if content is None:
+            try:
+                content = await fetch_xml(current_url, client)
+            except httpx.HTTPError:
+                logger.error("Не загружена страница %d документа %s; повторная загрузка продолжит с неё.", page, url)
+                raise
+            current = data.parse_sales_page(content)
+            _check_page(url, current, page, first.pages, numbered=False)
+            if staging is not None:
+                await staging.save_page(url, page, content)
+        else:
+            current = data.parse_sales_page(content)
+            _check_page(url, current, page, first.pages, numbered=False)
+        contents[page] = current
+    return contents
+
+
+async def ingest_feed(url: str, staging: Optional[FeedStaging] = None) -> ProductSchema:
+    """
+    Загружает документ о продажах по URL, включая все его страницы, и сохраняет его целиком.
+
+    Документ может быть разбит на страницы: атрибуты page и pages элемента
+    <sales_data> (остальные страницы загружаются параллельно по URL с
+    параметром FEED_PAGE_PARAM) или атрибут next со ссылкой на следующую
+    страницу. Продукты всех страниц сохраняются одной транзакцией, поэтому
+    документ не бывает загружен частично. Загруженные страницы хранятся в
+    staging до сохранения документа, и повторная загрузка после ошибки
+    продолжает с недостающих страниц. Номер и число страниц проверяются на
+    каждой странице, а сохранённые страницы используются только если первая
+    страница не изменилась с прошлой загрузки.
+
+    Args:
+        url (str): URL первой страницы документа.
+        staging (Optional[FeedStaging]): Хранилище загруженных страниц для повторной загрузки.
+
+    Returns:
+        ProductSchema: Последний сохранённый продукт.
+
+    Raises:
+        ET.ParseError: Если страница не является корректным XML.
+        FeedError: Если данные некорректны, страницы повторяются или сдвинуты
+            или относятся к разным датам.
+        httpx.HTTPStatusError: Если сервер вернул код ошибки.
+        httpx.TransportError: Если не удалось загрузить страницу.
+    """
+    with start_span("ingest_feed", url=url) as span:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            content = await fetch_xml(url, client)
+            first = data.parse_sales_page(content)
+            _check_page(url, first, 1, first.pages, numbered=False)
+            paginated = bool(first.pages and first.pages > 1) or first.next_url is not None
+            pages = [first]
+            if paginated:
+                fingerprint = hashlib.sha256(content).hexdigest()
+                staged = await staging.get_pages(url, fingerprint) if staging is not None else {}
+                if staged:
+                    logger.info("Продолжение загрузки %s: уже загружено страниц: %d.", url, len(staged))
+                if first.pages and first.pages > 1:
+                    contents = await _fetch_numbered_pages(url, first, client, staging, staged)
+                else:
+                    contents = await _fetch_linked_pages(url, first, client, staging, staged)
+                pages.extend(contents[page] for page in sorted(contents))
+        span.set_attribute("pages", len(pages))
+
+        other_dates = sorted({str(page.date_sell) for page in pages if page.date_sell != first.date_sell})
+        if other_dates:
+            raise FeedError(
+                f"страницы документа {url} относятся к разным датам: {first.date_sell}, {', '.join(other_dates)}"
+            )
+        products = [product for page in pages for product in page.products]
+        if not products:
+            raise FeedError(f"документ {url} не содержит продуктов")
+
+        await data.save_products(products)
+        # Итоги аналитики пересчитываются сразу, чтобы ответы не отставали от данных
+        await analytics.refresh_sales_totals([first.date_sell])
+        if paginated and staging is not None:
+            await staging.clear(url)
+    logger.info(
+        "Сохранено %d продуктов за %s из %d страниц %s.", len(products), first.date_sell, len(pages), url,
+        extra={"count": len(products), "date_sell": str(first.date_sell), "pages": len(pages)}
+    )
+    return products[-1]
 
 
 async def get_all() -> list[ProductSchema]:
@@ -28,9 +251,9 @@ async def get_all() -> list[ProductSchema]:
     Returns:
         list[ProductSchema]: Список всех продуктов из базы данных.
     """
-    logger.info("Запрос всех продуктов из базы данных.")
+    logger.debug("Запрос всех продуктов из базы данных.")
     products = await data.get_all()
-    logger.info(f"Получено {len(products)} продуктов из базы данных.")
+    logger.info("Получено %d продуктов из базы данных.", len(products))
     return products
 
 
@@ -41,6 +264,7 @@ async def delete_product(product_id: int) -> None:
     Args:
         product_id (int): Идентификатор продукта для удаления.
     """
-    logger.info(f"Попытка удалить продукт с ID: {product_id}.")
-    await data.delete_product(product_id)
-    logger.info(f"Продукт с ID {product_id} успешно удалён.")
+    logger.debug("Попытка удалить продукт с ID: %s.", product_id)
+    date_sell = await data.delete_product(product_id)
+    await analytics.refresh_sales_totals([date_sell])
+    logger.info("Продукт с ID %s успешно удалён.", product_id)
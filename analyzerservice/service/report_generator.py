@@ -2,6 +2,8 @@ from datetime import date
 import logging
 
 from analyzerservice.data import report_generator  # Импортируем под новым именем
+from analyzerservice.model.schemas import AnalysisSchema
+from analyzerservice.tracing import start_span
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -16,20 +18,95 @@ async def construct_prompt_by_date(target_date: date) -> str:
     Returns:
         str: Промпт для LLM в виде строки.
     """
-    logger.info(f"Формирование промпта для даты {target_date}.")
-    prompt = await report_generator.construct_prompt_by_date(target_date)
-    logger.info(f"Промпт для даты {target_date} успешно сформирован.")
+    logger.debug("Формирование промпта для даты %s.", target_date)
+    with start_span("construct_prompt_by_date", date=str(target_date)) as span:
+        prompt = await report_generator.construct_prompt_by_date(target_date)
+        span.set_attribute("prompt_chars", len(prompt))
+    logger.debug("Промпт для даты %s сформирован.", target_date)
     return prompt
 
 
-async def set_ai_analysis(date: date, analysis: str) -> None:
+async def construct_prompts_by_range(start_date: date, end_date: date) -> dict[date, str]:
+    """
+    Формирует промпты для всех дат диапазона, за которые есть данные.
+
+    Args:
+        start_date (date): Первая дата диапазона (включительно).
+        end_date (date): Последняя дата диапазона (включительно).
+
+    Returns:
+        dict[date, str]: Словарь {дата: промпт}.
+    """
+    logger.debug("Формирование промптов за период %s - %s.", start_date, end_date)
+    with start_span("construct_prompts_by_range", start=str(start_date), end=str(end_date)) as span:
+        prompts = await report_generator.construct_prompts_by_range(start_date, end_date)
+        span.set_attribute("dates", len(prompts))
+    logger.info("Сформировано %d промптов за период %s - %s.", len(prompts), start_date, end_date)
+    return prompts
+
+
+async def construct_period_prompt(start_date: date, end_date: date) -> str:
+    """
+    Формирует промпт для сводного отчёта за период.
+
+    Args:
+        start_date (date): Первая дата периода (включительно).
+        end_date (date): Последняя дата периода (включительно).
+
+    Returns:
+        str: Промпт для LLM в виде строки.
+    """
+    logger.debug("Формирование сводного промпта за период %s - %s.", start_date, end_date)
+    with start_span("construct_period_prompt", start=str(start_date), end=str(end_date)):
+        prompt = await report_generator.construct_period_prompt(start_date, end_date)
+    logger.debug("Сводный промпт за период %s - %s сформирован.", start_date, end_date)
+    return prompt
+
+
+async def set_ai_analysis(date: date, analysis: str) -> int:
     """
     Сохраняет анализ, полученный от LLM, в базу данных.
 
     Args:
         date (date): Дата, к которой относится анализ.
         analysis (str): Текст анализа от LLM.
+
+    Returns:
+        int: Идентификатор сохранённой записи анализа.
+    """
+    logger.debug("Сохранение анализа для даты %s.", date)
+    with start_span("set_ai_analysis", date=str(date)) as span:
+        analysis_id = await report_generator.set_ai_analysis(date, analysis)
+        span.set_attribute("analysis_id", analysis_id)
+    logger.info("Анализ для даты %s сохранён (ID %s).", date, analysis_id)
+    return analysis_id
+
+
+async def get_analysis(analysis_id: int) -> AnalysisSchema:
+    """
+    Получает сохранённый анализ по идентификатору.
+
+    Args:
+        analysis_id (int): Идентификатор записи анализа.
+
+    Returns:
+        AnalysisSchema: Сохранённый анализ.
+    """
+    logger.debug("Запрос анализа с ID %s.", analysis_id)
+    return await report_generator.get_analysis(analysis_id)
+
+
+async def get_recent_dates(limit: int) -> list[date]:
+    """
+    Получает последние даты, за которые загружены данные о продажах.
+
+    Args:
+        limit (int): Максимальное количество дат.
+
+    Returns:
+        list[date]: Список дат в порядке убывания.
     """
-    logger.info(f"Сохранение анализа для даты {date}.")
-    await report_generator.set_ai_analysis(date, analysis)
-    logger.info(f"Анализ для даты {date} успешно сохранён.")
+    logger.debug("Запрос последних %d дат с данными.", limit)
+    dates = await report_generator.get_recent_dates(limit)
+    logger.info("Получено %d дат с данными.", len(dates))
+    return dates
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from redis.exceptions import RedisError
+
+from analyzerservice.config import (
+    ADMISSION_INGEST_CONCURRENCY, ADMISSION_REPORT_CONCURRENCY, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_MAX_QUEUE_DEPTH, ADMISSION_MAX_POOL_WAIT, ADMISSION_QUEUE_DEPTH_TTL, ADMISSION_RETRY_AFTER,
+    ADMISSION_RETRY_AFTER_MAX, INGEST_QUEUE, INTERACTIVE_QUEUE, BULK_QUEUE, LOG_SAMPLE_RATE
+)
+from analyzerservice.data.dbbase import pool_wait_seconds
+from analyzerservice.errors import Overloaded
+from analyzerservice.metrics import ADMISSION_REJECTED, ADMISSION_WAIT_SECONDS
+from .celery_app import get_queue_depths
+from .log_config import log_sampled
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def _retry_after(seconds: float) -> int:
+    """Округляет оценку до целых секунд в пределах [1, ADMISSION_RETRY_AFTER_MAX]."""
+    return max(1, min(ADMISSION_RETRY_AFTER_MAX, math.ceil(seconds)))
+
+
+def _reject(name: str, msg: str, reason: str, retry_after: int) -> Overloaded:
+    """Учитывает отказ в метриках и возвращает исключение для него."""
+    ADMISSION_REJECTED.labels(name, reason).inc()
+    log_sampled(
+        logger, logging.WARNING, LOG_SAMPLE_RATE, "Отказ в допуске %s: %s. Retry-After: %d с.", name, msg, retry_after,
+        reason=reason
+    )
+    return Overloaded(msg, retry_after=retry_after, reason=reason)
+
+
+class AdmissionLimiter:
+    """
+    Ограничение одновременных запросов одного класса с очередью ожидания.
+
+    Запросы сверх concurrency ждут свободного слота, но не больше
+    queue_size одновременно и не дольше queue_timeout секунд. Остальные
+    сразу получают отказ, поэтому при перегрузке растёт доля отказов,
+    а не задержка всех запросов.
+
+    Attributes:
+        name (str): Класс эндпоинтов (ingest, report).
+        concurrency (int): Предел одновременных запросов; 0 - без ограничения.
+        queue_size (int): Предел запросов, ожидающих слота.
+        queue_timeout (float): Предельное ожидание слота, сек.
+        active (int): Выполняющиеся запросы.
+        waiting (int): Запросы в очереди ожидания.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        queue_size: int = ADMISSION_QUEUE_SIZE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT
+    ) -> None:
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(concurrency) if concurrency > 0 else None
+        self._hold_seconds = 1.0  # Скользящее среднее времени выполнения запроса
+
+    def retry_after(self) -> int:
+        """Оценка времени, за которое освободятся слоты для всей очереди ожидания, сек."""
+        return _retry_after((self.waiting + 1) / max(self.concurrency, 1) * self._hold_seconds)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Занимает слот на время выполнения запроса.
+
+        Raises:
+            Overloaded: Если очередь ожидания заполнена или слот не освободился за queue_timeout.
+        """
+        if self._semaphore is None:
+            yield
+            return
+
+        if self._semaphore.locked():
+            if self.waiting >= self.queue_size:
+                raise _reject(self.name, f"Очередь запросов {self.name} заполнена", "queue_full", self.retry_after())
+            self.waiting += 1
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise _reject(
+                    self.name, f"Запрос {self.name} не дождался обработки за {self.queue_timeout:g} с",
+                    "queue_timeout", self.retry_after()
+                ) from None
+            finally:
+                self.waiting -= 1
+                ADMISSION_WAIT_SECONDS.labels(self.name).observe(time.perf_counter() - started)
+        else:
+            await self._semaphore.acquire()
+
+        self.active += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            self._hold_seconds = self._hold_seconds * 0.8 + (time.perf_counter() - started) * 0.2
+
+
+class AdmissionGate:
+    """
+    Допуск запросов эндпоинта: признаки перегрузки и лимит одновременных запросов.
+
+    Перед занятием слота проверяются признаки перегрузки: длина очереди
+    Celery, в которую эндпоинт ставит задачи, и среднее ожидание соединения
+    из пула БД. Если порог превышен, запрос отклоняется сразу, а Retry-After
+    растёт пропорционально превышению.
+
+    Attributes:
+        limiter (AdmissionLimiter): Лимит класса, общий для его эндпоинтов.
+        queue (Optional[str]): Очередь Celery, в которую эндпоинт ставит задачи.
+        uses_db (bool): Обращается ли эндпоинт к базе данных.
+    """
+
+    def __init__(self, limiter: AdmissionLimiter, queue: Optional[str] = None, uses_db: bool = False) -> None:
+        self.limiter = limiter
+        self.queue = queue
+        self.uses_db = uses_db
+
+    async def check_overload(self) -> None:
+        """
+        Отклоняет запрос, если очередь Celery или пул БД перегружены.
+
+        Raises:
+            Overloaded: Если превышен ADMISSION_MAX_QUEUE_DEPTH или ADMISSION_MAX_POOL_WAIT.
+        """
+        if self.queue and ADMISSION_MAX_QUEUE_DEPTH > 0:
+            depth = await _queue_depth(self.queue)
+            if depth is not None and depth >= ADMISSION_MAX_QUEUE_DEPTH:
+                raise _reject(
+                    self.limiter.name, f"В очереди {self.queue} {depth} задач",
+                    "queue_depth", _retry_after(ADMISSION_RETRY_AFTER * depth / ADMISSION_MAX_QUEUE_DEPTH)
+                )
+        if self.uses_db and ADMISSION_MAX_POOL_WAIT > 0:
+            wait = pool_wait_seconds()
+            if wait >= ADMISSION_MAX_POOL_WAIT:
+                raise _reject(
+                    self.limiter.name, f"Ожидание соединения с БД {wait:.2f} с",
+                    "db_pool_wait", _retry_after(ADMISSION_RETRY_AFTER * wait / ADMISSION_MAX_POOL_WAIT)
+                )
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """
+        Допускает запрос к выполнению.
+
+        Raises:
+            Overloaded: Если сервис перегружен или очередь ожидания заполнена.
+        """
+        await self.check_overload()
+        async with self.limiter.slot():
+            yield
+
+
+_queue_depths: Dict[str, int] = {}
+_queue_depths_at = -math.inf
+
+
+async def _queue_depth(queue: str) -> Optional[int]:
+    """Длина очереди Celery; значение переиспользуется ADMISSION_QUEUE_DEPTH_TTL секунд."""
+    global _queue_depths, _queue_depths_at
+    if time.monotonic() - _queue_depths_at > ADMISSION_QUEUE_DEPTH_TTL:
+        try:
+            _queue_depths = await get_queue_depths()
+        except RedisError as e:
+            # Без данных о брокере запрос не отклоняется: постановка задачи сама сообщит об ошибке
+            logger.warning(f"Не удалось получить длину очередей Celery: {e}")
+            return None
+        _queue_depths_at = time.monotonic()
+    return _queue_depths.get(queue)
+
+
+_report = AdmissionLimiter("report", ADMISSION_REPORT_CONCURRENCY)
+
+# Синхронная загрузка держит соединение с БД всё время обработки документа,
+# фоновая только ставит задачу и ограничивается длиной очереди ingest.
+# Запуски отчётов делят лимит, но проверяют каждый свою очередь Celery.
+INGEST = AdmissionGate(AdmissionLimiter("ingest", ADMISSION_INGEST_CONCURRENCY), uses_db=True)
+INGEST_BACKGROUND = AdmissionGate(AdmissionLimiter("ingest_background", 0), queue=INGEST_QUEUE)
+REPORT = AdmissionGate(_report, queue=INTERACTIVE_QUEUE, uses_db=True)
+REPORT_RANGE = AdmissionGate(_report, queue=BULK_QUEUE, uses_db=True)
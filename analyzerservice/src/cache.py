@@ -3,11 +3,16 @@ from __future__ import annotations
 import json
 from datetime import datetime
 import hashlib
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 import logging
 from redis import Redis
 from redis.exceptions import RedisError
 
+from analyzerservice.config import LOG_SAMPLE_RATE
+from analyzerservice.metrics import CACHE_REQUESTS, CACHE_SECONDS
+from analyzerservice.tracing import start_span
+from .log_config import log_sampled
+
 # Настройка логирования
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -50,45 +55,73 @@ class ReportCache:
         composite = f"{prompt}:{date.isoformat()}"
         return f"report_cache:{hashlib.sha256(composite.encode()).hexdigest()}"
     
-    async def get_cached_report(
+    async def get_cached_entry(
         self, 
         prompt: str, 
         date: datetime.date
-    ) -> Tuple[Optional[str], bool]:
+    ) -> Tuple[Optional[Dict[str, Any]], bool]:
         """
-        Получает закэшированный отчёт, если он существует.
+        Получает закэшированный отчёт вместе с идентификатором записи анализа.
 
         Args:
             prompt (str): Текст промпта.
             date (datetime.date): Целевая дата.
 
         Returns:
-            Tuple[Optional[str], bool]: Кортеж (закэшированный_отчёт, признак_получения_из_кэша).
+            Tuple[Optional[Dict[str, Any]], bool]: Кортеж ({"report", "analysis_id"},
+            признак_получения_из_кэша). Для записей старого формата analysis_id равен None.
         """
         try:
             cache_key = self._generate_cache_key(prompt, date)
-            cached_data = self.redis.get(cache_key)
+            with start_span("cache.get", date=str(date)) as span, CACHE_SECONDS.labels("get").time():
+                cached_data = self.redis.get(cache_key)
+                span.set_attribute("hit", bool(cached_data))
             
             if cached_data:
-                logger.info(f"Найден кэш для даты {date}.")
-                return json.loads(cached_data), True
+                CACHE_REQUESTS.labels("hit").inc()
+                log_sampled(logger, logging.INFO, LOG_SAMPLE_RATE, "Найден кэш для даты %s.", date, cache="hit")
+                entry = json.loads(cached_data)
+                if not isinstance(entry, dict):
+                    entry = {"report": entry, "analysis_id": None}
+                return entry, True
             
-            logger.info(f"Кэш не найден для даты {date}.")
+            CACHE_REQUESTS.labels("miss").inc()
+            log_sampled(logger, logging.INFO, LOG_SAMPLE_RATE, "Кэш не найден для даты %s.", date, cache="miss")
             return None, False
             
         except RedisError as e:
+            CACHE_REQUESTS.labels("error").inc()
             logger.warning(f"Ошибка Redis при получении кэша: {e}")
             return None, False
         except Exception as e:
             logger.error(f"Непредвиденная ошибка при получении кэша: {e}")
             return None, False
 
+    async def get_cached_report(
+        self, 
+        prompt: str, 
+        date: datetime.date
+    ) -> Tuple[Optional[str], bool]:
+        """
+        Получает закэшированный отчёт, если он существует.
+
+        Args:
+            prompt (str): Текст промпта.
+            date (datetime.date): Целевая дата.
+
+        Returns:
+            Tuple[Optional[str], bool]: Кортеж (закэшированный_отчёт, признак_получения_из_кэша).
+        """
+        entry, is_cached = await self.get_cached_entry(prompt, date)
+        return (entry["report"] if entry else None), is_cached
+
     async def cache_report(
         self, 
         prompt: str, 
         date: datetime.date, 
         report: str,
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        analysis_id: Optional[int] = None
     ) -> bool:
         """
         Кэширует сгенерированный отчёт.
@@ -98,6 +131,7 @@ class ReportCache:
             date (datetime.date): Целевая дата.
             report (str): Текст сгенерированного отчёта.
             ttl (Optional[int]): Опциональное время жизни кэша в секундах.
+            analysis_id (Optional[int]): Идентификатор записи анализа в базе данных.
 
         Returns:
             bool: Признак успешного кэширования.
@@ -106,11 +140,12 @@ class ReportCache:
             cache_key = self._generate_cache_key(prompt, date)
             ttl = ttl or self.default_ttl
             
-            success = self.redis.setex(
-                cache_key,
-                ttl,
-                json.dumps(report)
-            )
+            with start_span("cache.set", date=str(date)), CACHE_SECONDS.labels("set").time():
+                success = self.redis.setex(
+                    cache_key,
+                    ttl,
+                    json.dumps({"report": report, "analysis_id": analysis_id})
+                )
             
             if success:
                 logger.info(f"Успешно закэширован отчёт для даты {date}.")
@@ -139,7 +174,8 @@ class ReportCache:
         """
         try:
             cache_key = self._generate_cache_key(prompt, date)
-            success = self.redis.delete(cache_key)
+            with start_span("cache.delete", date=str(date)), CACHE_SECONDS.labels("delete").time():
+                success = self.redis.delete(cache_key)
             
             if success:
                 logger.info(f"Кэш для даты {date} успешно удалён.")
@@ -1,87 +1,724 @@
 from __future__ import annotations
 
+from datetime import date, datetime, timedelta, timezone
+from itertools import chain
 import asyncio
-from datetime import datetime
 import logging
-from typing import Optional
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
 
-from celery import Celery
-from google.api_core.exceptions import ResourceExhausted
+from celery import Celery, chord, group
+from celery.signals import (
+    before_task_publish, celeryd_init, setup_logging as celery_setup_logging, task_postrun, task_prerun,
+    worker_process_init, worker_process_shutdown, worker_shutdown
+)
+from celery.schedules import crontab
+import httpx
 
 from analyzerservice.service import report_generator as service
-from analyzerservice.config import model
+from analyzerservice.service import data_loader as data_service
+from analyzerservice.config import (
+    REDIS_URL, WARMUP_DAYS, WARMUP_CRON_HOUR, WARMUP_PRIORITY,
+    LLM_MAX_RETRIES, LLM_RETRY_BACKOFF_MAX, REPORT_RANGE_PARALLELISM, LLM_BACKEND, LLM_BULK_BACKEND,
+    CELERY_QUEUES, INTERACTIVE_QUEUE, BULK_QUEUE, INGEST_QUEUE,
+    CELERY_RESULT_BACKEND, CELERY_RESULT_EXPIRES, METRICS_WORKER_PORT
+)
+from analyzerservice.errors import FeedUnavailable, RateLimited
+from analyzerservice import metrics, profiling
+from analyzerservice.tracing import TRACEPARENT, begin_span, current_traceparent, end_span, start_span
 from .cache import ReportCache
+from .feed_staging import FeedStaging
+from .llm_backend import LLMBackend, get_backend
+from .log_config import setup_logging, stop_logging
+from .rate_limiter import LLMRateLimiter
+from .report_stream import ReportStream
+from .warmup import WarmupTracker
+from .worker_loop import WorkerLoop
 
 # Настройка Celery
-celery_app = Celery(__name__, broker='redis://redis:6379/0', backend='redis://redis:6379/0')
-cache = ReportCache()
+celery_app = Celery(__name__, broker=REDIS_URL, backend=CELERY_RESULT_BACKEND)
+# Результаты задач - короткие записи со ссылкой на таблицу analysis; они хранятся
+# в отдельной базе Redis и удаляются через CELERY_RESULT_EXPIRES секунд
+celery_app.conf.result_expires = CELERY_RESULT_EXPIRES
+celery_app.conf.broker_transport_options = {
+    # Приоритеты 0..9 в Redis: 0 - наивысший, прогрев идёт с низким приоритетом
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
+# Маршрутизация по очередям: отчёты по запросу пользователя не ждут за фоновыми задачами
+_TASK_QUEUES = {
+    "generate_report": INTERACTIVE_QUEUE,
+    "generate_report_batch": BULK_QUEUE,
+    "summarize_report_range": BULK_QUEUE,
+    "warm_report_cache": BULK_QUEUE,
+    "ingest_xml": INGEST_QUEUE,
+}
+celery_app.conf.task_default_queue = INTERACTIVE_QUEUE
+celery_app.conf.task_routes = {task: {"queue": queue} for task, queue in _TASK_QUEUES.items()}
+celery_app.conf.task_annotations = {
+    task: {
+        "acks_late": CELERY_QUEUES[queue]["acks_late"],
+        "soft_time_limit": CELERY_QUEUES[queue]["soft_time_limit"],
+        "time_limit": CELERY_QUEUES[queue]["time_limit"],
+    }
+    for task, queue in _TASK_QUEUES.items()
+}
+# Пул threads не применяет лимиты времени Celery: soft_time_limit применяет WorkerLoop.run
+_SOFT_TIME_LIMITS = {task: CELERY_QUEUES[queue]["soft_time_limit"] for task, queue in _TASK_QUEUES.items()}
+celery_app.conf.beat_schedule = {
+    "warm-report-cache-off-peak": {
+        "task": "warm_report_cache",
+        "schedule": crontab(hour=WARMUP_CRON_HOUR, minute=0),
+        "options": {"priority": WARMUP_PRIORITY, "queue": BULK_QUEUE},
+    },
+}
+cache = ReportCache(redis_url=REDIS_URL)
+warmup = WarmupTracker(redis_url=REDIS_URL)
+feed_staging = FeedStaging(redis_url=REDIS_URL)
+worker_loop = WorkerLoop()
+rate_limiter = LLMRateLimiter(redis_url=REDIS_URL)
+report_stream = ReportStream(redis_url=REDIS_URL)
+llm_backend = get_backend(LLM_BACKEND)
+bulk_llm_backend = get_backend(LLM_BULK_BACKEND)
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-@celery_app.task(name="generate_report")
-def generate_report_task(target_date_str: str) -> str:
+
+@celery_setup_logging.connect
+def _configure_worker_logging(loglevel: Any = None, **kwargs: Any) -> None:
+    """Заменяет журналирование Celery неблокирующим JSON журналом сервиса."""
+    if loglevel:
+        setup_logging(level=loglevel)
+    else:
+        setup_logging()
+
+
+@celeryd_init.connect
+def _configure_worker_for_queue(conf: Any = None, options: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+    """
+    Применяет параметры очереди к воркеру, запущенному с `-Q <очередь>`.
+
+    Параметры, явно переданные в командной строке (например, `-c`), имеют приоритет.
+    Воркер, обслуживающий несколько очередей, работает с настройками по умолчанию.
+    """
+    queues = [queue for queue in (options or {}).get("queues") or [] if queue in CELERY_QUEUES]
+    if len(queues) != 1:
+        return
+
+    settings = CELERY_QUEUES[queues[0]]
+    conf.worker_concurrency = settings["concurrency"]
+    conf.worker_prefetch_multiplier = settings["prefetch_multiplier"]
+    logger.info(f"Воркер настроен для очереди {queues[0]}: {settings}")
+
+
+@worker_process_init.connect
+def _start_worker_loop(**kwargs: Any) -> None:
+    """Запускает цикл событий и пул соединений в дочернем процессе prefork."""
+    worker_loop.start()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _stop_worker_loop(**kwargs: Any) -> None:
+    """Закрывает пул соединений и цикл событий при завершении воркера."""
+    worker_loop.stop()
+    # Дочерние процессы prefork завершаются без atexit: журнал дописывается здесь
+    stop_logging()
+
+
+@celeryd_init.connect
+def _start_metrics_exporter(**kwargs: Any) -> None:
+    """Запускает экспортер метрик в главном процессе воркера до запуска дочерних."""
+    metrics.clear_multiproc_dir()
+    try:
+        metrics.start_exporter(METRICS_WORKER_PORT)
+    except OSError as e:
+        logger.warning(f"Не удалось запустить экспортер метрик на порту {METRICS_WORKER_PORT}: {e}")
+
+
+# Начало выполнения и участки трассировки выполняемых задач
+_task_started: Dict[str, float] = {}
+_task_spans: Dict[str, tuple] = {}
+_task_profilers: Dict[str, profiling.SamplingProfiler] = {}
+
+
+@before_task_publish.connect
+def _stamp_headers(headers: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+    """Записывает в заголовки сообщения время постановки в очередь и контекст трассировки."""
+    if headers is None:
+        return
+    headers["published_at"] = time.time()
+    traceparent = current_traceparent()
+    if traceparent:
+        headers[TRACEPARENT] = traceparent
+    if profiling.profile_tasks.get() and headers.get("id"):
+        headers[profiling.PROFILE_PARAM] = profiling.sign_task_flag(headers["id"])
+
+
+@task_prerun.connect
+def _observe_queue_wait(task_id: str = None, task: Any = None, **kwargs: Any) -> None:
+    """Учитывает время ожидания задачи в очереди (для отложенных - от срока eta) и открывает участок задачи."""
+    _task_started[task_id] = time.perf_counter()
+    queue_wait: Optional[float] = None
+    published_at = task.request.get("published_at")
+    if published_at is not None:
+        queued_from = float(published_at)
+        if task.request.eta:
+            eta = datetime.fromisoformat(task.request.eta) if isinstance(task.request.eta, str) else task.request.eta
+            queued_from = max(queued_from, eta.timestamp())
+        queue_wait = max(time.time() - queued_from, 0.0)
+        metrics.TASK_QUEUE_WAIT_SECONDS.labels(task.name).observe(queue_wait)
+
+    span, token = begin_span(f"celery.task {task.name}", task.request.get(TRACEPARENT), task_id=task_id)
+    if queue_wait is not None:
+        span.set_attribute("queue_wait_ms", round(queue_wait * 1000, 1))
+    _task_spans[task_id] = (span, token)
+    _start_task_profiler(task_id, task)
+
+
+@task_postrun.connect
+def _observe_run_time(task_id: str = None, task: Any = None, state: Optional[str] = None, **kwargs: Any) -> None:
+    """Учитывает время выполнения задачи с итоговым состоянием и закрывает участок задачи."""
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        metrics.TASK_RUN_SECONDS.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
+    span_entry = _task_spans.pop(task_id, None)
+    if span_entry is not None:
+        span, token = span_entry
+        if state and state != "SUCCESS":
+            span.status = "error"
+        span.set_attribute("state", state)
+        end_span(span, token)
+    _stop_task_profiler(task_id)
+
+
+def _start_task_profiler(task_id: str, task: Any) -> None:
+    """
+    Начинает профилирование задачи, поставленной с заголовком profile.
+
+    Заголовок должен содержать признак profiling.sign_task_flag для этой
+    задачи. Профилируются поток задачи и цикл событий воркера, на котором
+    выполняются её корутины.
+    """
+    flag = task.request.get(profiling.PROFILE_PARAM)
+    if flag is None:
+        return
+    if not profiling.verify_task_flag(task_id, flag):
+        logger.warning(f"Профилирование задачи {task.name} [{task_id}] отклонено: неверный или просроченный признак.")
+        return
+    if not profiling.try_acquire():
+        return
+    thread_ids = [threading.get_ident()]
+    if worker_loop.thread_id is not None:
+        thread_ids.append(worker_loop.thread_id)
+    _task_profilers[task_id] = profiling.SamplingProfiler(f"{task.name}-{task_id}", thread_ids).start()
+
+
+def _stop_task_profiler(task_id: str) -> None:
+    """Завершает профилирование задачи и сохраняет профиль."""
+    profiler = _task_profilers.pop(task_id, None)
+    if profiler is None:
+        return
+    try:
+        profiler.stop()
+        profiler.write()
+    finally:
+        profiling.release()
+
+
+# Повторы задач, обращающихся к LLM, при превышении лимита запросов
+_LLM_RETRY_OPTIONS: Dict[str, Any] = {
+    "autoretry_for": (RateLimited,),
+    "retry_backoff": True,
+    "retry_backoff_max": LLM_RETRY_BACKOFF_MAX,
+    "retry_jitter": True,
+    "max_retries": LLM_MAX_RETRIES,
+}
+
+
+async def _acquire_llm_slot(prompt: str, backend: LLMBackend) -> None:
+    """
+    Ждёт разрешения общего лимитера, если бэкенд работает с платным API.
+
+    Args:
+        prompt (str): Промпт для LLM.
+        backend (LLMBackend): Бэкенд, который выполнит вызов.
+    """
+    if backend.rate_limited:
+        with start_span("llm.rate_limit"):
+            await rate_limiter.acquire(LLMRateLimiter.estimate_tokens(prompt, backend.max_output_tokens))
+
+
+async def _call_llm(prompt: str, backend: Optional[LLMBackend] = None) -> str:
+    """
+    Вызывает LLM с учётом общего лимита запросов.
+
+    Args:
+        prompt (str): Промпт для LLM.
+        backend (Optional[LLMBackend]): Бэкенд; по умолчанию интерактивный (LLM_BACKEND).
+
+    Returns:
+        str: Текст ответа модели.
+    """
+    backend = backend or llm_backend
+    await _acquire_llm_slot(prompt, backend)
+    with start_span("llm.generate", backend=backend.name, prompt_chars=len(prompt)) as span:
+        text = await backend.generate(prompt)
+        span.set_attribute("output_chars", len(text))
+        return text
+
+
+async def _stream_llm(prompt: str, stream_id: str, backend: Optional[LLMBackend] = None) -> str:
+    """
+    Вызывает LLM в потоковом режиме, передавая части ответа в поток задачи.
+
+    Args:
+        prompt (str): Промпт для LLM.
+        stream_id (str): Идентификатор потока (задачи генерации).
+        backend (Optional[LLMBackend]): Бэкенд; по умолчанию интерактивный (LLM_BACKEND).
+
+    Returns:
+        str: Полный текст ответа модели.
+    """
+    backend = backend or llm_backend
+    await _acquire_llm_slot(prompt, backend)
+    started = time.perf_counter()
+    time_to_first_token: Optional[float] = None
+    parts: list[str] = []
+
+    with start_span("llm.stream", backend=backend.name, prompt_chars=len(prompt)) as span:
+        async for text in backend.stream(prompt):
+            parts.append(text)
+            if time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - started
+                span.set_attribute("ttft_ms", round(time_to_first_token * 1000))
+                logger.info(f"Первая часть ответа AI получена через {time_to_first_token:.3f} с.")
+                await report_stream.publish(
+                    stream_id, "chunk", text=text, ttft_ms=round(time_to_first_token * 1000)
+                )
+            else:
+                await report_stream.publish(stream_id, "chunk", text=text)
+
+    logger.info(f"Потоковая генерация завершена за {time.perf_counter() - started:.3f} с.")
+    return "".join(parts)
+
+
+async def _generate_and_store(
+    prompt: str,
+    target_date: date,
+    stream_id: Optional[str] = None,
+    backend: Optional[LLMBackend] = None
+) -> tuple[str, int]:
+    """
+    Генерирует отчёт с помощью AI модели, сохраняет его в базе данных и кэширует.
+
+    Args:
+        prompt (str): Промпт для LLM.
+        target_date (date): Дата отчёта.
+        stream_id (Optional[str]): Если указан, ответ передаётся по частям в поток задачи.
+        backend (Optional[LLMBackend]): Бэкенд; по умолчанию интерактивный (LLM_BACKEND).
+
+    Returns:
+        tuple[str, int]: Кортеж (текст_отчёта, идентификатор_записи_анализа).
+    """
+    if stream_id is not None:
+        report_text = await _stream_llm(prompt, stream_id, backend)
+    else:
+        report_text = await _call_llm(prompt, backend)
+
+    # Сохранение анализа в базе данных
+    analysis_id = await service.set_ai_analysis(target_date, report_text)
+
+    # Кэширование отчёта вместе со ссылкой на запись анализа
+    cache_success = await cache.cache_report(
+        prompt, target_date, report_text, ttl=24 * 60 * 60, analysis_id=analysis_id
+    )
+    if not cache_success:
+        logger.warning(f"Не удалось закэшировать отчёт для даты: {target_date}")
+
+    return report_text, analysis_id
+
+
+async def _get_or_generate_report(
+    target_date: date,
+    stream_id: Optional[str] = None,
+    backend: Optional[LLMBackend] = None
+) -> Dict[str, Any]:
+    """
+    Берёт отчёт за дату из кэша или генерирует его.
+
+    Args:
+        target_date (date): Дата отчёта.
+        stream_id (Optional[str]): Если указан, отчёт передаётся в поток задачи
+            (закэшированный - одной частью).
+        backend (Optional[LLMBackend]): Бэкенд; по умолчанию интерактивный (LLM_BACKEND).
+
+    Returns:
+        Dict[str, Any]: Краткая запись о результате: date, source (cache или generated)
+            и analysis_id - ссылка на запись в таблице analysis. Сам текст отчёта
+            в результат задачи не попадает.
+    """
+    # Формирование промпта
+    prompt = await service.construct_prompt_by_date(target_date)
+
+    # Проверка наличия отчёта в кэше
+    cached_entry, is_cached = await cache.get_cached_entry(prompt, target_date)
+    if is_cached:
+        logger.info(f"Возвращён закэшированный отчёт для даты: {target_date}")
+        if stream_id is not None:
+            await report_stream.publish(stream_id, "chunk", text=cached_entry["report"])
+        return {"date": target_date.isoformat(), "source": "cache", "analysis_id": cached_entry["analysis_id"]}
+
+    # Генерация отчёта с помощью AI модели
+    _, analysis_id = await _generate_and_store(prompt, target_date, stream_id, backend)
+    return {"date": target_date.isoformat(), "source": "generated", "analysis_id": analysis_id}
+
+
+@celery_app.task(name="generate_report", bind=True, **_LLM_RETRY_OPTIONS)
+def generate_report_task(self, target_date_str: str, stream: bool = False) -> Dict[str, Any]:
     """
     Celery задача для генерации отчёта с использованием LLM и кэширования.
 
+    При превышении лимита запросов к AI задача повторяется с экспоненциальной
+    паузой и случайным разбросом; после исчерпания попыток или при любой другой
+    ошибке задача завершается в состоянии FAILURE.
+
     Args:
         target_date_str (str): Дата в формате ISO строки.
+        stream (bool): Передавать ли ответ по частям в поток Redis с ключом задачи.
 
     Returns:
-        str: Текст сгенерированного отчёта или сообщение об ошибке.
+        Dict[str, Any]: date, source (cache или generated) и analysis_id; текст
+            отчёта доступен по GET /report-generator/analysis/{analysis_id}.
+
+    Raises:
+        ValueError: Если дата передана в неверном формате.
+        RateLimited: Если общий лимит вызовов AI не освободился вовремя или AI отклонил запрос из-за лимита.
     """
+    stream_id = self.request.id if stream else None
     try:
         target_date = datetime.fromisoformat(target_date_str).date()
-    except ValueError:
+    except ValueError as e:
         logger.error(f"Неверный формат даты: {target_date_str}")
-        return "Неверный формат даты"
+        if stream_id is not None:
+            worker_loop.run(report_stream.publish(stream_id, "error", message=e, retrying=False))
+        raise
+
+    try:
+        result = worker_loop.run(
+            _get_or_generate_report(target_date, stream_id), timeout=_SOFT_TIME_LIMITS["generate_report"]
+        )
+        if stream_id is not None:
+            worker_loop.run(report_stream.publish(stream_id, "done", **result))
+        return result
+    except RateLimited as e:
+        logger.warning(f"Превышен лимит запросов к AI для даты {target_date}, задача будет повторена: {e}")
+        if stream_id is not None:
+            retrying = self.request.retries < self.max_retries
+            worker_loop.run(report_stream.publish(stream_id, "error", message=e, retrying=retrying))
+        raise
+    except Exception as e:
+        logger.exception(f"Ошибка генерации отчёта: {e}")
+        if stream_id is not None:
+            worker_loop.run(report_stream.publish(stream_id, "error", message=e, retrying=False))
+        raise
 
-    async def run_analysis() -> str:
-        """
-        Выполняет анализ данных для указанной даты, включая генерацию и кэширование отчёта.
 
-        Returns:
-            str: Сгенерированный отчёт или сообщение об ошибке.
-        """
+@celery_app.task(name="generate_report_batch", **_LLM_RETRY_OPTIONS)
+def generate_report_batch_task(target_date_strs: list[str]) -> list[Dict[str, Any]]:
+    """
+    Celery задача последовательной генерации отчётов для части дат периода.
+
+    Ошибка по одной дате не прерывает остальные. При превышении лимита
+    запросов к AI повторяется вся часть: уже готовые даты берутся из кэша.
+
+    Args:
+        target_date_strs (list[str]): Даты в формате ISO строки.
+
+    Returns:
+        list[Dict[str, Any]]: Итог по каждой дате: date, source ("cache" или
+            "generated" с analysis_id, "failed" с полем error).
+    """
+    async def run_batch() -> list[Dict[str, Any]]:
+        results: list[Dict[str, Any]] = []
+        for target_date_str in target_date_strs:
+            try:
+                results.append(await _get_or_generate_report(
+                    date.fromisoformat(target_date_str), backend=bulk_llm_backend
+                ))
+            except RateLimited:
+                raise
+            except Exception as e:
+                logger.exception(f"Ошибка генерации отчёта для даты {target_date_str}: {e}")
+                results.append({"date": target_date_str, "source": "failed", "error": str(e)})
+        return results
+
+    return worker_loop.run(run_batch(), timeout=_SOFT_TIME_LIMITS["generate_report_batch"])
+
+
+@celery_app.task(name="summarize_report_range", **_LLM_RETRY_OPTIONS)
+def summarize_report_range_task(
+    batch_results: list[list[Dict[str, Any]]],
+    start_date_str: str,
+    end_date_str: str,
+    precomputed: list[Dict[str, str]]
+) -> Dict[str, Any]:
+    """
+    Завершающая задача chord: объединяет итоги по датам и формирует сводку за период.
+
+    Args:
+        batch_results (list[list[Dict[str, Any]]]): Результаты задач generate_report_batch.
+        start_date_str (str): Первая дата периода в формате ISO строки.
+        end_date_str (str): Последняя дата периода в формате ISO строки.
+        precomputed (list[Dict[str, str]]): Даты, не требовавшие генерации
+            (уже в кэше или без данных).
+
+    Returns:
+        Dict[str, Any]: Период, analysis_id и source сводного отчёта (None, если
+            данных за период нет) и итоги по датам; текст сводки доступен по
+            GET /report-generator/analysis/{analysis_id}.
+    """
+    start_date = date.fromisoformat(start_date_str)
+    end_date = date.fromisoformat(end_date_str)
+    dates = sorted(chain(precomputed, chain.from_iterable(batch_results)), key=lambda item: item["date"])
+
+    async def run_summary() -> tuple[Optional[int], Optional[str]]:
+        if all(item["source"] == "no_data" for item in dates):
+            return None, None
+
+        prompt = await service.construct_period_prompt(start_date, end_date)
+        cached_entry, is_cached = await cache.get_cached_entry(prompt, start_date)
+        if is_cached and cached_entry["analysis_id"] is not None:
+            return cached_entry["analysis_id"], "cache"
+
+        # Сводка сохраняется в базе как анализ за первую дату периода
+        _, analysis_id = await _generate_and_store(prompt, start_date, backend=bulk_llm_backend)
+        return analysis_id, "generated"
+
+    analysis_id, source = worker_loop.run(run_summary(), timeout=_SOFT_TIME_LIMITS["summarize_report_range"])
+    return {
+        "start_date": start_date_str,
+        "end_date": end_date_str,
+        "analysis_id": analysis_id,
+        "source": source,
+        "dates": dates,
+    }
+
+
+async def dispatch_report_range(start_date: date, end_date: date) -> Dict[str, Any]:
+    """
+    Запускает генерацию отчётов за период.
+
+    Даты без данных и даты с отчётом в кэше отбрасываются сразу. Остальные
+    распределяются по не более чем REPORT_RANGE_PARALLELISM задачам группы,
+    после которой chord формирует сводку за период.
+
+    Args:
+        start_date (date): Первая дата периода (включительно).
+        end_date (date): Последняя дата периода (включительно).
+
+    Returns:
+        Dict[str, Any]: Идентификаторы задачи-сводки и группы, а также
+            списки дат: queued, cached, no_data.
+    """
+    prompts = await service.construct_prompts_by_range(start_date, end_date)
+
+    precomputed: list[Dict[str, str]] = []
+    pending: list[str] = []
+    target_date = start_date
+    while target_date <= end_date:
+        prompt = prompts.get(target_date)
+        if prompt is None:
+            precomputed.append({"date": target_date.isoformat(), "source": "no_data"})
+        else:
+            _, is_cached = await cache.get_cached_report(prompt, target_date)
+            if is_cached:
+                precomputed.append({"date": target_date.isoformat(), "source": "cache"})
+            else:
+                pending.append(target_date.isoformat())
+        target_date += timedelta(days=1)
+
+    parallelism = min(REPORT_RANGE_PARALLELISM, len(pending))
+    header = group(
+        generate_report_batch_task.s(pending[i::parallelism]).set(queue=BULK_QUEUE)
+        for i in range(parallelism)
+    )
+    result = chord(header)(
+        summarize_report_range_task.s(start_date.isoformat(), end_date.isoformat(), precomputed).set(queue=BULK_QUEUE)
+    )
+
+    return {
+        "task_id": result.id,
+        "group_id": result.parent.id if result.parent is not None else None,
+        "queued": pending,
+        "cached": [item["date"] for item in precomputed if item["source"] == "cache"],
+        "no_data": [item["date"] for item in precomputed if item["source"] == "no_data"],
+    }
+
+
+async def warm_report_cache(target_dates: Optional[list[date]] = None) -> Dict[str, list[str]]:
+    """
+    Заранее генерирует отчёты для дат, которых ещё нет в кэше.
+
+    Вызовы LLM ограничены суточным бюджетом прогрева; после его исчерпания
+    оставшиеся даты пропускаются до следующего запуска. Бюджет неудавшейся
+    генерации возвращается.
+
+    Args:
+        target_dates (Optional[list[date]]): Даты для прогрева. Если не указаны,
+            прогреваются последние WARMUP_DAYS дат с данными.
+
+    Returns:
+        Dict[str, list[str]]: Даты, разложенные по итогам прогрева:
+            generated, cached, skipped (бюджет исчерпан), failed.
+    """
+    summary: Dict[str, list[str]] = {"generated": [], "cached": [], "skipped": [], "failed": []}
+    await warmup.set_status(
+        state="running",
+        started_at=datetime.now(timezone.utc).isoformat(),
+        finished_at=None,
+    )
+
+    if target_dates is None:
+        target_dates = await service.get_recent_dates(WARMUP_DAYS)
+
+    for target_date in target_dates:
         try:
-            # Формирование промпта
             prompt = await service.construct_prompt_by_date(target_date)
-            if prompt is None:
-                logger.error(f"Не удалось сформировать промпт для даты: {target_date}")
-                return "Не удалось сформировать промпт"
-
-            # Проверка наличия отчёта в кэше
-            cached_report, is_cached = await cache.get_cached_report(prompt, target_date)
+            _, is_cached = await cache.get_cached_report(prompt, target_date)
             if is_cached:
-                logger.info(f"Возвращён закэшированный отчёт для даты: {target_date}")
-                return cached_report
-
-            # Генерация отчёта с помощью AI модели
-            response = await model.generate_content_async(prompt)
-            report_text = response.text
-            
-            # Кэширование отчёта
-            cache_success = await cache.cache_report(prompt, target_date, report_text, ttl=24 * 60 * 60)
-            if not cache_success:
-                logger.warning(f"Не удалось закэшировать отчёт для даты: {target_date}")
-            
-            # Сохранение анализа в базе данных
-            await service.set_ai_analysis(target_date, report_text)
-            return report_text
-            
-        except ResourceExhausted:
-            logger.exception("Ошибка генерации отчёта: Превышен лимит запросов к AI")
-            return "Ошибка генерации отчёта: Превышен лимит запросов к AI"
+                summary["cached"].append(target_date.isoformat())
+                continue
+
+            if not await warmup.try_consume_budget():
+                summary["skipped"].append(target_date.isoformat())
+                continue
+
+            try:
+                await _generate_and_store(prompt, target_date, backend=bulk_llm_backend)
+            except Exception:
+                await warmup.release_budget()
+                raise
+            summary["generated"].append(target_date.isoformat())
         except Exception as e:
-            logger.exception(f"Ошибка генерации отчёта: {e}")
-            return f"Ошибка генерации отчёта: {e}"
+            logger.exception(f"Ошибка прогрева кэша для даты {target_date}: {e}")
+            summary["failed"].append(target_date.isoformat())
+
+    await warmup.set_status(
+        state="finished",
+        finished_at=datetime.now(timezone.utc).isoformat(),
+        **summary,
+    )
+    logger.info(
+        f"Прогрев кэша завершён: сгенерировано {len(summary['generated'])}, "
+        f"уже в кэше {len(summary['cached'])}, пропущено {len(summary['skipped'])}, "
+        f"ошибок {len(summary['failed'])}."
+    )
+    return summary
+
+
+@celery_app.task(name="warm_report_cache", ignore_result=True)
+def warm_report_cache_task(target_date_strs: Optional[list[str]] = None) -> Dict[str, list[str]]:
+    """
+    Celery задача прогрева кэша отчётов (по расписанию и после загрузки данных).
+
+    Args:
+        target_date_strs (Optional[list[str]]): Даты в формате ISO строки.
+            Если не указаны, прогреваются последние даты с данными.
 
-    # Настройка цикла событий для выполнения асинхронного анализа
+    Returns:
+        Dict[str, list[str]]: Итоги прогрева по датам.
+    """
+    target_dates = None
+    if target_date_strs is not None:
+        target_dates = [date.fromisoformat(value) for value in target_date_strs]
+    return worker_loop.run(warm_report_cache(target_dates), timeout=_SOFT_TIME_LIMITS["warm_report_cache"])
+
+
+def schedule_cache_warmup(target_dates: Iterable[date]) -> Optional[str]:
+    """
+    Ставит в очередь прогрев кэша для указанных дат с низким приоритетом.
+
+    Ошибки постановки в очередь не пробрасываются: прогрев - оптимизация,
+    и его недоступность не должна ломать загрузку данных.
+
+    Args:
+        target_dates (Iterable[date]): Загруженные или изменённые даты.
+
+    Returns:
+        Optional[str]: Идентификатор задачи или None при ошибке.
+    """
     try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(run_analysis())
+        task = warm_report_cache_task.apply_async(
+            args=[sorted({value.isoformat() for value in target_dates})],
+            queue=BULK_QUEUE,
+            priority=WARMUP_PRIORITY,
+        )
+        logger.info(f"Прогрев кэша запланирован. Task ID: {task.id}")
+        return task.id
+    except Exception as e:
+        logger.warning(f"Не удалось запланировать прогрев кэша: {e}")
+        return None
+
+
+# Повтор загрузки при сетевых ошибках и ответах 5xx продолжает с недостающих страниц документа
+@celery_app.task(
+    name="ingest_xml", autoretry_for=(httpx.TransportError, FeedUnavailable),
+    retry_backoff=True, retry_jitter=True, max_retries=3
+)
+def ingest_xml_task(url: str) -> Dict[str, str]:
+    """
+    Celery задача фоновой загрузки XML данных о продажах по URL.
+
+    Постраничный документ загружается целиком (см. data_loader.ingest_feed).
+    После загрузки ставит прогрев кэша отчётов для загруженной даты. Сетевые
+    ошибки и ответы 5xx повторяются; некорректный документ (FeedError) и
+    ответы 4xx завершают задачу сразу.
+
+    Args:
+        url (str): URL адрес XML документа.
+
+    Returns:
+        Dict[str, str]: URL и дата загруженных продаж в формате ISO строки.
+
+    Raises:
+        FeedError: Если документ некорректен.
+        FeedUnavailable: Если источник отвечал 5xx на всех попытках.
+    """
+    async def run_ingest() -> date:
+        try:
+            product = await data_service.ingest_feed(url, feed_staging)
+        except httpx.HTTPStatusError as e:
+            if e.response.is_server_error:
+                raise FeedUnavailable(f"{url}: {e}") from e
+            raise
+        return product.date_sell
+
+    date_sell = worker_loop.run(run_ingest(), timeout=_SOFT_TIME_LIMITS["ingest_xml"])
+    schedule_cache_warmup([date_sell])
+    return {"url": url, "date_sell": date_sell.isoformat()}
+
+
+async def get_queue_depths() -> Dict[str, int]:
+    """
+    Возвращает число ожидающих задач в каждой очереди Celery.
+
+    Учитываются все приоритетные подочереди Redis (`<очередь>`, `<очередь>:1` ... `:9`).
+    Pipeline выполняется в отдельном потоке, чтобы проверка допуска не
+    блокировала цикл событий веб-процесса.
+
+    Returns:
+        Dict[str, int]: Словарь {очередь: число задач}.
+    """
+    steps = celery_app.conf.broker_transport_options["priority_steps"]
+    sep = celery_app.conf.broker_transport_options["sep"]
+    pipe = cache.redis.pipeline()
+    for queue in CELERY_QUEUES:
+        for step in steps:
+            pipe.llen(queue if step == 0 else f"{queue}{sep}{step}")
+    lengths = iter(await asyncio.to_thread(pipe.execute))
+    return {queue: sum(next(lengths) for _ in steps) for queue in CELERY_QUEUES}
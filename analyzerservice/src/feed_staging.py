@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import Dict
+
+from redis import Redis
+from redis.exceptions import RedisError
+
+from analyzerservice.config import REDIS_URL, FEED_STAGING_TTL
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class FeedStaging:
+    """
+    Хранение загруженных страниц постраничного документа до его сохранения.
+
+    Если загрузка части страниц не удалась, повторная загрузка того же URL
+    запрашивает только недостающие страницы. Страницы удаляются после
+    сохранения документа или через ttl секунд. Вместе со страницами хранится
+    отпечаток первой страницы: если она изменилась, сохранённые страницы
+    относятся к другой версии документа и отбрасываются. Недоступность Redis
+    не прерывает загрузку: страницы просто загружаются заново.
+
+    Attributes:
+        redis (Redis): Клиент Redis.
+        ttl (int): Время хранения страниц в секундах.
+    """
+
+    KEY_PREFIX = "feed_pages"
+    FINGERPRINT_FIELD = b"fingerprint"
+
+    def __init__(self, redis_url: str = REDIS_URL, ttl: int = FEED_STAGING_TTL) -> None:
+        """
+        Инициализация экземпляра FeedStaging.
+
+        Args:
+            redis_url (str): URL для подключения к Redis.
+            ttl (int): Время хранения страниц в секундах.
+        """
+        self.redis: Redis = Redis.from_url(redis_url)
+        self.ttl: int = ttl
+
+    def _key(self, url: str) -> str:
+        """
+        Формирует ключ хэша страниц документа.
+
+        Args:
+            url (str): URL первой страницы документа.
+
+        Returns:
+            str: Ключ в Redis.
+        """
+        return f"{self.KEY_PREFIX}:{hashlib.sha256(url.encode()).hexdigest()}"
+
+    async def get_pages(self, url: str, fingerprint: str) -> Dict[int, bytes]:
+        """
+        Возвращает сохранённые ранее страницы документа с той же первой страницей.
+
+        Если сохранённый отпечаток отличается от fingerprint или отсутствует,
+        страницы удаляются и запоминается новый отпечаток.
+
+        Args:
+            url (str): URL первой страницы документа.
+            fingerprint (str): Отпечаток (sha256) содержимого первой страницы.
+
+        Returns:
+            Dict[int, bytes]: Словарь {номер страницы: содержимое}; пустой при смене
+                первой страницы или ошибке Redis.
+        """
+        key = self._key(url)
+        try:
+            pages = self.redis.hgetall(key)
+            stored = pages.pop(self.FINGERPRINT_FIELD, None)
+            if stored != fingerprint.encode():
+                if pages:
+                    logger.info(f"Первая страница {url} изменилась, сохранённые страницы отброшены.")
+                pipe = self.redis.pipeline()
+                pipe.delete(key)
+                pipe.hset(key, self.FINGERPRINT_FIELD, fingerprint)
+                pipe.expire(key, self.ttl)
+                pipe.execute()
+                return {}
+        except RedisError as e:
+            logger.warning(f"Не удалось получить сохранённые страницы {url}: {e}")
+            return {}
+        return {int(page): content for page, content in pages.items()}
+
+    async def save_page(self, url: str, page: int, content: bytes) -> None:
+        """
+        Сохраняет загруженную страницу документа.
+
+        Args:
+            url (str): URL первой страницы документа.
+            page (int): Номер страницы.
+            content (bytes): Содержимое страницы.
+        """
+        key = self._key(url)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hset(key, str(page), content)
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Не удалось сохранить страницу {page} документа {url}: {e}")
+
+    async def clear(self, url: str) -> None:
+        """
+        Удаляет сохранённые страницы документа.
+
+        Args:
+            url (str): URL первой страницы документа.
+        """
+        try:
+            self.redis.delete(self._key(url))
+        except RedisError as e:
+            logger.warning(f"Не удалось удалить сохранённые страницы {url}: {e}")
@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import random
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+from redis import Redis
+from redis.exceptions import RedisError
+
+from analyzerservice.errors import RateLimited
+from analyzerservice.metrics import LLM_SECONDS, LLM_TOKENS
+from analyzerservice.config import (
+    REDIS_URL, FAKE_LLM_LATENCY_DISTRIBUTION, FAKE_LLM_LATENCY_MEAN, FAKE_LLM_LATENCY_STDDEV,
+    FAKE_LLM_ERROR_RATE, FAKE_LLM_OUTPUT_WORDS, FAKE_LLM_CHUNKS, generation_config, get_model
+)
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+class BackendStats:
+    """
+    Общая для всех процессов статистика вызовов LLM бэкенда в Redis.
+
+    Хранит счётчики вызовов, ошибок и гистограмму задержек, по которым
+    считаются пропускная способность и перцентили задержки.
+
+    Attributes:
+        redis (Redis): Клиент Redis.
+    """
+
+    KEY_PREFIX = "llm_stats"
+    # Верхние границы корзин гистограммы задержек, мс
+    LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 20000, 40000, 80000)
+
+    def __init__(self, redis_url: str = REDIS_URL) -> None:
+        """
+        Инициализация экземпляра BackendStats.
+
+        Args:
+            redis_url (str): URL для подключения к Redis.
+        """
+        self.redis: Redis = Redis.from_url(redis_url, decode_responses=True)
+
+    def _key(self, backend_name: str) -> str:
+        return f"{self.KEY_PREFIX}:{backend_name}"
+
+    def _bucket(self, latency_ms: float) -> str:
+        for bound in self.LATENCY_BUCKETS_MS:
+            if latency_ms <= bound:
+                return f"le_{bound}"
+        return "le_inf"
+
+    async def record(self, backend_name: str, latency: float, output_chars: int, error: bool) -> None:
+        """
+        Учитывает один вызов бэкенда.
+
+        Команды отправляются одним pipeline в отдельном потоке, чтобы не
+        блокировать цикл событий после каждого вызова LLM.
+
+        Args:
+            backend_name (str): Имя бэкенда.
+            latency (float): Длительность вызова в секундах.
+            output_chars (int): Длина ответа в символах.
+            error (bool): Завершился ли вызов ошибкой.
+        """
+        latency_ms = latency * 1000
+        now = time.time()
+        try:
+            key = self._key(backend_name)
+            pipe = self.redis.pipeline()
+            pipe.hincrby(key, "calls", 1)
+            pipe.hincrby(key, "errors", int(error))
+            pipe.hincrbyfloat(key, "latency_ms_total", latency_ms)
+            pipe.hincrby(key, "output_chars", output_chars)
+            pipe.hincrby(key, self._bucket(latency_ms), 1)
+            pipe.hsetnx(key, "first_ts", now)
+            pipe.hset(key, "last_ts", now)
+            await asyncio.to_thread(pipe.execute)
+        except RedisError as e:
+            logger.warning(f"Ошибка Redis при записи статистики LLM: {e}")
+
+    def _percentile(self, buckets: Dict[str, int], calls: int, quantile: float) -> Optional[float]:
+        """Оценивает перцентиль задержки по верхней границе корзины гистограммы."""
+        if calls == 0:
+            return None
+        seen = 0
+        for bound in self.LATENCY_BUCKETS_MS:
+            seen += buckets.get(f"le_{bound}", 0)
+            if seen >= quantile * calls:
+                return float(bound)
+        return float("inf")
+
+    async def summary(self, backend_name: str) -> Dict[str, Any]:
+        """
+        Возвращает сводку по вызовам бэкенда.
+
+        Args:
+            backend_name (str): Имя бэкенда.
+
+        Returns:
+            Dict[str, Any]: calls, errors, error_rate, throughput_per_sec,
+                latency_ms_mean и оценки latency_ms_p50/p95/p99.
+        """
+        try:
+            raw = self.redis.hgetall(self._key(backend_name))
+        except RedisError as e:
+            logger.warning(f"Ошибка Redis при чтении статистики LLM: {e}")
+            raw = {}
+
+        calls = int(raw.get("calls", 0))
+        errors = int(raw.get("errors", 0))
+        buckets = {name: int(value) for name, value in raw.items() if name.startswith("le_")}
+        elapsed = float(raw.get("last_ts", 0)) - float(raw.get("first_ts", 0))
+        return {
+            "backend": backend_name,
+            "calls": calls,
+            "errors": errors,
+            "error_rate": errors / calls if calls else 0.0,
+            "throughput_per_sec": calls / elapsed if elapsed > 0 else None,
+            "latency_ms_mean": float(raw.get("latency_ms_total", 0)) / calls if calls else None,
+            "latency_ms_p50": self._percentile(buckets, calls, 0.50),
+            "latency_ms_p95": self._percentile(buckets, calls, 0.95),
+            "latency_ms_p99": self._percentile(buckets, calls, 0.99),
+            "output_chars": int(raw.get("output_chars", 0)),
+        }
+
+    async def reset(self, backend_name: str) -> None:
+        """
+        Сбрасывает статистику бэкенда (например, перед нагрузочным тестом).
+
+        Args:
+            backend_name (str): Имя бэкенда.
+        """
+        try:
+            self.redis.delete(self._key(backend_name))
+        except RedisError as e:
+            logger.warning(f"Ошибка Redis при сбросе статистики LLM: {e}")
+
+
+class LLMBackend(ABC):
+    """
+    Базовый класс бэкенда LLM, через который задачи генерируют отчёты.
+
+    Подклассы реализуют `_generate` и `_stream`; публичные методы
+    добавляют к ним учёт задержек и ошибок.
+
+    Attributes:
+        name (str): Имя бэкенда в настройках LLM_BACKEND.
+        rate_limited (bool): Нужно ли пропускать вызовы через общий лимитер.
+        max_output_tokens (int): Максимальная длина ответа для оценки стоимости вызова.
+        stats (BackendStats): Статистика вызовов.
+    """
+
+    name: str = ""
+    rate_limited: bool = False
+    max_output_tokens: int = 1024
+
+    def __init__(self, stats: Optional[BackendStats] = None) -> None:
+        """
+        Инициализация бэкенда.
+
+        Args:
+            stats (Optional[BackendStats]): Хранилище статистики вызовов.
+        """
+        self.stats: BackendStats = stats or BackendStats()
+
+    async def generate(self, prompt: str) -> str:
+        """
+        Генерирует ответ целиком.
+
+        Args:
+            prompt (str): Промпт для LLM.
+
+        Returns:
+            str: Текст ответа.
+        """
+        started = time.perf_counter()
+        try:
+            text = await self._generate(prompt)
+        except Exception:
+            await self._record(prompt, time.perf_counter() - started, 0, error=True)
+            raise
+        await self._record(prompt, time.perf_counter() - started, len(text), error=False)
+        return text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Генерирует ответ по частям.
+
+        Args:
+            prompt (str): Промпт для LLM.
+
+        Yields:
+            str: Очередная часть ответа.
+        """
+        started = time.perf_counter()
+        output_chars = 0
+        try:
+            async for text in self._stream(prompt):
+                output_chars += len(text)
+                yield text
+        except Exception:
+            await self._record(prompt, time.perf_counter() - started, output_chars, error=True)
+            raise
+        await self._record(prompt, time.perf_counter() - started, output_chars, error=False)
+
+    async def _record(self, prompt: str, latency: float, output_chars: int, error: bool) -> None:
+        """
+        Учитывает вызов в общей статистике бэкенда и в метриках Prometheus.
+
+        Args:
+            prompt (str): Промпт вызова.
+            latency (float): Длительность вызова в секундах.
+            output_chars (int): Длина полученного ответа в символах.
+            error (bool): Завершился ли вызов ошибкой.
+        """
+        LLM_SECONDS.labels(self.name, "error" if error else "ok").observe(latency)
+        LLM_TOKENS.labels(self.name, "prompt").inc(len(prompt) // 4)
+        LLM_TOKENS.labels(self.name, "output").inc(output_chars // 4)
+        await self.stats.record(self.name, latency, output_chars, error=error)
+
+    @abstractmethod
+    async def _generate(self, prompt: str) -> str:
+        """Выполняет вызов модели и возвращает полный ответ."""
+
+    @abstractmethod
+    def _stream(self, prompt: str) -> AsyncIterator[str]:
+        """Выполняет потоковый вызов модели и выдаёт части ответа."""
+
+
+@contextmanager
+def _gemini_quota_errors() -> Iterator[None]:
+    """
+    Преобразует превышение квоты Gemini (ResourceExhausted) в RateLimited.
+
+    google.api_core (вместе с grpc и protobuf) импортируется только здесь,
+    при вызове модели, а не при импорте модуля в веб-процессе.
+    """
+    from google.api_core.exceptions import ResourceExhausted
+
+    try:
+        yield
+    except ResourceExhausted as e:
+        raise RateLimited(f"Gemini отклонил запрос из-за лимита: {e}") from e
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Google Gemini; модель создаётся лениво через analyzerservice.config.get_model.
+
+    Превышение квоты API передаётся вызывающему как RateLimited.
+    """
+
+    name = "gemini"
+    rate_limited = True
+
+    def __init__(self, stats: Optional[BackendStats] = None) -> None:
+        super().__init__(stats)
+        self.max_output_tokens = generation_config["max_output_tokens"]
+
+    @property
+    def model(self) -> Any:
+        return get_model()
+
+    async def _generate(self, prompt: str) -> str:
+        with _gemini_quota_errors():
+            response = await self.model.generate_content_async(prompt)
+        return response.text
+
+    async def _stream(self, prompt: str) -> AsyncIterator[str]:
+        with _gemini_quota_errors():
+            response = await self.model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                yield chunk.text
+
+
+class FakeBackend(LLMBackend):
+    """
+    Локальная замена LLM для нагрузочных тестов без обращения к платному API.
+
+    Имитирует задержку ответа с заданным распределением, долю ошибок
+    превышения лимита (RateLimited) и размер ответа.
+
+    Attributes:
+        distribution (str): Распределение задержки: fixed, uniform, normal или lognormal.
+        latency_mean (float): Средняя задержка в секундах.
+        latency_stddev (float): Стандартное отклонение задержки в секундах.
+        error_rate (float): Доля вызовов, завершающихся RateLimited.
+        output_words (int): Длина ответа в словах.
+        chunks (int): На сколько частей делится ответ в потоковом режиме.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        stats: Optional[BackendStats] = None,
+        distribution: str = FAKE_LLM_LATENCY_DISTRIBUTION,
+        latency_mean: float = FAKE_LLM_LATENCY_MEAN,
+        latency_stddev: float = FAKE_LLM_LATENCY_STDDEV,
+        error_rate: float = FAKE_LLM_ERROR_RATE,
+        output_words: int = FAKE_LLM_OUTPUT_WORDS,
+        chunks: int = FAKE_LLM_CHUNKS,
+        seed: Optional[int] = None
+    ) -> None:
+        super().__init__(stats)
+        if distribution not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Неизвестное распределение задержки: {distribution}")
+        self.distribution = distribution
+        self.latency_mean = latency_mean
+        self.latency_stddev = latency_stddev
+        self.error_rate = error_rate
+        self.output_words = output_words
+        self.chunks = max(chunks, 1)
+        self._random = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        """
+        Выбирает задержку очередного вызова.
+
+        Returns:
+            float: Задержка в секундах (не меньше нуля).
+        """
+        if self.distribution == "fixed" or self.latency_stddev == 0:
+            return self.latency_mean
+        if self.distribution == "uniform":
+            spread = self.latency_stddev * 3 ** 0.5
+            return max(self._random.uniform(self.latency_mean - spread, self.latency_mean + spread), 0.0)
+        if self.distribution == "normal":
+            return max(self._random.gauss(self.latency_mean, self.latency_stddev), 0.0)
+        # Логнормальное распределение с заданными средним и отклонением;
+        # нулевое среднее означает отсутствие задержки, как и для остальных
+        if self.latency_mean <= 0:
+            return 0.0
+        variance = (self.latency_stddev / self.latency_mean) ** 2
+        sigma = math.sqrt(math.log1p(variance))
+        mu = math.log(self.latency_mean) - sigma ** 2 / 2
+        return self._random.lognormvariate(mu, sigma)
+
+    def _text(self, prompt: str) -> str:
+        words = f"Отчёт по промпту длиной {len(prompt)} символов.".split()
+        words += ["анализ"] * max(self.output_words - len(words), 0)
+        return " ".join(words[:self.output_words])
+
+    def _maybe_fail(self) -> None:
+        if self._random.random() < self.error_rate:
+            raise RateLimited("Fake backend: имитация превышения лимита")
+
+    async def _generate(self, prompt: str) -> str:
+        await asyncio.sleep(self.sample_latency())
+        self._maybe_fail()
+        return self._text(prompt)
+
+    async def _stream(self, prompt: str) -> AsyncIterator[str]:
+        latency = self.sample_latency()
+        self._maybe_fail()
+        words = self._text(prompt).split(" ")
+        size = -(-len(words) // self.chunks)
+        for start in range(0, len(words), size):
+            await asyncio.sleep(latency / self.chunks)
+            yield " ".join(words[start:start + size]) + " "
+
+
+_BACKENDS: Dict[str, type[LLMBackend]] = {
+    GeminiBackend.name: GeminiBackend,
+    FakeBackend.name: FakeBackend,
+}
+_instances: Dict[str, LLMBackend] = {}
+
+
+def get_backend(name: str) -> LLMBackend:
+    """
+    Возвращает экземпляр бэкенда LLM по имени (один на процесс).
+
+    Args:
+        name (str): Имя бэкенда: gemini или fake.
+
+    Returns:
+        LLMBackend: Экземпляр бэкенда.
+
+    Raises:
+        ValueError: Если бэкенд с таким именем не зарегистрирован.
+    """
+    if name not in _BACKENDS:
+        raise ValueError(f"Неизвестный LLM бэкенд: {name}. Доступны: {', '.join(_BACKENDS)}")
+    if name not in _instances:
+        _instances[name] = _BACKENDS[name]()
+    return _instances[name]
+
+
+def backend_names() -> list[str]:
+    """Возвращает имена зарегистрированных бэкендов."""
+    return list(_BACKENDS)
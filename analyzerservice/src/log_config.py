@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+from analyzerservice.config import LOG_LEVEL, LOG_FORMAT, LOG_FILE
+
+# Атрибуты LogRecord, которые не относятся к дополнительным полям (extra)
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+TEXT_FORMAT = "%(asctime)s %(processName)s %(threadName)s %(levelname)s [%(name)s: %(message)s]"
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматирует запись журнала в одну строку JSON.
+
+    Помимо времени, уровня, имени логгера и сообщения в вывод попадают
+    поля, переданные через extra, например count или duration_ms.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.processName,
+            "thread": record.threadName,
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _RecordQueueHandler(QueueHandler):
+    """
+    QueueHandler, сохраняющий поля записи для JSON вывода.
+
+    Стандартный prepare склеивает запись в готовую строку. Здесь в
+    вызывающем потоке только подставляются аргументы сообщения и
+    форматируется исключение, а вывод выполняет поток QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, log_file: str = LOG_FILE) -> None:
+    """
+    Настраивает неблокирующее журналирование процесса.
+
+    Корневой логгер пишет записи в очередь в памяти, а запись в stdout и
+    файл выполняет отдельный поток QueueListener. Поэтому дисковый ввод-вывод
+    не блокирует цикл событий. Повторный вызов ничего не делает.
+
+    Дочерний процесс после fork (prefork воркеры Celery) наследует
+    обработчик очереди, но не поток вывода: очередь и поток создаются в
+    нём заново (см. _restart_after_fork).
+
+    Args:
+        level (str): Уровень журналирования корневого логгера.
+        fmt (str): Формат вывода: json или text.
+        log_file (str): Путь к файлу журнала; пустая строка отключает файл.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers: list[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = _RecordQueueHandler(log_queue)
+    _queue_handler.setLevel(level)
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+    # Модули сервиса задают уровень своим логгерам; LOG_LEVEL имеет приоритет
+    for name, module_logger in logging.root.manager.loggerDict.items():
+        if name.startswith("analyzerservice") and isinstance(module_logger, logging.Logger):
+            module_logger.setLevel(level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def _restart_after_fork() -> None:
+    """
+    Перезапускает поток журналирования в дочернем процессе после fork.
+
+    Поток QueueListener родителя в дочерний процесс не копируется: без
+    перезапуска записи копились бы в очереди и не выводились. Записи,
+    унаследованные в очереди, выводит родитель, поэтому очередь создаётся новая.
+    """
+    global _listener
+    if _listener is None or _queue_handler is None:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def stop_logging() -> None:
+    """Дописывает записи из очереди и останавливает поток журналирования."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_sampled(
+    logger: logging.Logger,
+    level: int,
+    rate: float,
+    msg: str,
+    *args: Any,
+    **fields: Any
+) -> None:
+    """
+    Записывает сообщение горячего пути с вероятностью rate.
+
+    Проверка уровня и выборка выполняются до форматирования, поэтому
+    отброшенное сообщение почти ничего не стоит. Доля выборки попадает в
+    поле sample_rate, чтобы по журналу можно было восстановить частоту.
+
+    Args:
+        logger (logging.Logger): Логгер модуля.
+        level (int): Уровень сообщения.
+        rate (float): Доля сообщений, которые попадут в журнал (0..1).
+        msg (str): Шаблон сообщения в стиле %.
+        *args: Аргументы шаблона.
+        **fields: Дополнительные поля структурированной записи.
+    """
+    if rate <= 0 or not logger.isEnabledFor(level):
+        return
+    if rate < 1 and random.random() >= rate:
+        return
+    logger.log(level, msg, *args, extra={"sample_rate": rate, **fields})
@@ -1,45 +1,53 @@
 import uvicorn
 import asyncio
 import logging
-import sys
 
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 
-from analyzerservice.web import data_loading_api, report_generation_api
-from analyzerservice.data.dbbase import async_main
+from analyzerservice.web import data_loading_api, report_generation_api, metrics_api, analytics_api
+from analyzerservice.web.responses import FastJSONResponse
+from analyzerservice.web.middleware import TracingMiddleware, ProfilingMiddleware
+from analyzerservice.config import PROFILING_TOKEN
+from analyzerservice.data.dbbase import async_main, dispose_engine
+from analyzerservice.service.analytics import backfill_sales_totals
+from analyzerservice.src.log_config import setup_logging
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await async_main()
+    await backfill_sales_totals()
     logger.info("База данных инициализирована.")
     yield
-    pass
+    # Корректное завершение: сервер уже дождался активных запросов
+    await dispose_engine()
+    logger.info("Соединения с базой данных закрыты.")
 
 # Создание FastAPI приложения
 app = FastAPI(
     title="XML Parser & AI Analyzer Service",
     description="Сервис для парсинга XML данных о продажах и генерации аналитических отчетов с помощью LLM.",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Подключение маршрутов
 app.include_router(data_loading_api.router)
 app.include_router(report_generation_api.router)
+app.include_router(analytics_api.router)
+app.include_router(metrics_api.router)
 
-# Настройка логирования
+# Трассировка запросов (TRACE_SAMPLE_RATE)
+app.add_middleware(TracingMiddleware)
+# Профилирование по требованию подключается только при заданном токене
+if PROFILING_TOKEN:
+    app.add_middleware(ProfilingMiddleware)
+
+# Настройка логирования: запись в stdout и файл выполняет отдельный поток
+setup_logging()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
-formatter = logging.Formatter("%(asctime)s %(processName)s %(threadName)s %(levelname)s [%(name)s: %(message)s]")
-
-stream_handler = logging.StreamHandler(sys.stdout)
-stream_handler.setFormatter(formatter)
-file_handler = logging.FileHandler("/var/log/info.log")
-file_handler.setFormatter(formatter)
-
-logger.addHandler(stream_handler)
-logger.addHandler(file_handler)
 
 logger.info("API запущено и готово к работе.")
 
@@ -49,8 +57,11 @@ if __name__ == "__main__":
 
     Этот скрипт:
     1. Инициализирует FastAPI приложение с подключенными маршрутами.
-    2. Настраивает логирование для записи событий в консоль и файл.
+    2. Настраивает неблокирующее логирование в консоль и файл (LOG_FILE).
     3. Выполняет `async_main()` для подготовки базы данных.
     4. Запускает Uvicorn сервер для обслуживания API.
+
+    Режим разработки с автоперезагрузкой; в production используется
+    `python -m analyzerservice.src.serve`.
     """
     uvicorn.run("analyzerservice.src.main:app", reload=True, log_level="info")
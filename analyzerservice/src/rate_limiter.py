@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+from redis import Redis
+from redis.exceptions import RedisError
+
+from analyzerservice.config import (
+    REDIS_URL, LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE, LLM_RATE_LIMIT_MAX_WAIT
+)
+from analyzerservice.errors import RateLimited
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Атомарная проверка двух корзин токенов (запросы и токены LLM).
+# Время берётся из Redis, поэтому все воркеры видят одни и те же часы.
+# Возвращает 0, если вызов разрешён и списан, иначе - паузу в миллисекундах.
+_TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local cost = tonumber(ARGV[3])
+
+local function refill(key, capacity)
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    local rate = capacity / 60000.0
+    return math.min(capacity, level + math.max(now - ts, 0) * rate), rate
+end
+
+local requests, requests_rate = refill(KEYS[1], tonumber(ARGV[1]))
+local tokens, tokens_rate = refill(KEYS[2], tonumber(ARGV[2]))
+
+local wait = 0
+if requests < 1 then
+    wait = (1 - requests) / requests_rate
+end
+if tokens < cost then
+    wait = math.max(wait, (cost - tokens) / tokens_rate)
+end
+if wait == 0 then
+    requests = requests - 1
+    tokens = tokens - cost
+end
+
+redis.call('HSET', KEYS[1], 'level', tostring(requests), 'ts', tostring(now))
+redis.call('HSET', KEYS[2], 'level', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], 120000)
+redis.call('PEXPIRE', KEYS[2], 120000)
+return math.ceil(wait)
+"""
+
+class LLMRateLimiter:
+    """
+    Общий для всех воркеров лимитер вызовов LLM на основе корзины токенов в Redis.
+
+    Ограничивает и число запросов, и число токенов в минуту. Вызовы
+    распределяются заранее: при пустой корзине вызывающий ждёт, пока она
+    наполнится, а не получает отказ от API. Ожидающие в одном процессе
+    обслуживаются по очереди (FIFO), а синхронные вызовы Redis выполняются
+    в отдельном потоке и не останавливают цикл событий.
+
+    Attributes:
+        redis (Redis): Клиент Redis.
+        requests_per_minute (int): Лимит запросов в минуту.
+        tokens_per_minute (int): Лимит токенов (промпт + ответ) в минуту.
+        max_wait (float): Максимальное ожидание в очереди лимитера, сек.
+    """
+
+    REQUESTS_KEY = "llm_rate:requests"
+    TOKENS_KEY = "llm_rate:tokens"
+
+    def __init__(
+        self,
+        redis_url: str = REDIS_URL,
+        requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+        max_wait: float = LLM_RATE_LIMIT_MAX_WAIT
+    ) -> None:
+        """
+        Инициализация экземпляра LLMRateLimiter.
+
+        Args:
+            redis_url (str): URL для подключения к Redis.
+            requests_per_minute (int): Лимит запросов в минуту.
+            tokens_per_minute (int): Лимит токенов в минуту.
+            max_wait (float): Максимальное ожидание в очереди лимитера, сек.
+        """
+        self.redis: Redis = Redis.from_url(redis_url, decode_responses=True)
+        self.requests_per_minute: int = requests_per_minute
+        self.tokens_per_minute: int = tokens_per_minute
+        self.max_wait: float = max_wait
+        self._script = self.redis.register_script(_TOKEN_BUCKET_SCRIPT)
+        self._queue: Optional[asyncio.Lock] = None
+        self._queue_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _waiters_queue(self) -> asyncio.Lock:
+        """Очередь ожидающих текущего цикла событий (цикл воркера пересоздаётся после fork)."""
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._queue_loop is not loop:
+            self._queue, self._queue_loop = asyncio.Lock(), loop
+        return self._queue
+
+    async def _try_acquire(self, cost: int) -> int:
+        """Выполняет скрипт корзины токенов в отдельном потоке и возвращает паузу в мс."""
+        return int(await asyncio.to_thread(
+            self._script,
+            keys=[self.REQUESTS_KEY, self.TOKENS_KEY],
+            args=[self.requests_per_minute, self.tokens_per_minute, cost]
+        ))
+
+    @staticmethod
+    def estimate_tokens(prompt: str, max_output_tokens: int) -> int:
+        """
+        Грубая оценка стоимости вызова в токенах до его выполнения.
+
+        Args:
+            prompt (str): Текст промпта.
+            max_output_tokens (int): Максимальная длина ответа.
+
+        Returns:
+            int: Оценка числа токенов (примерно 4 символа на токен плюс ответ).
+        """
+        return len(prompt) // 4 + max_output_tokens
+
+    async def acquire(self, tokens: int) -> None:
+        """
+        Ждёт, пока общий лимит позволит выполнить вызов, и списывает его стоимость.
+
+        Args:
+            tokens (int): Оценка стоимости вызова в токенах.
+
+        Raises:
+            RateLimited: Если разрешение не получено за max_wait секунд.
+        """
+        cost = min(tokens, self.tokens_per_minute)
+        deadline = time.monotonic() + self.max_wait
+        queue = self._waiters_queue()
+        try:
+            # Вызов, пришедший раньше, первым получает освободившееся место в корзине
+            await asyncio.wait_for(queue.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            raise RateLimited("Превышен лимит запросов к AI", retry_after=self.max_wait) from None
+        try:
+            while True:
+                try:
+                    wait_ms = await self._try_acquire(cost)
+                except RedisError as e:
+                    # Без Redis лимитер не должен останавливать генерацию отчётов
+                    logger.warning(f"Ошибка Redis в лимитере LLM, вызов выполняется без ограничения: {e}")
+                    return
+
+                if wait_ms <= 0:
+                    return
+
+                # Небольшой разброс, чтобы ожидающие воркеры не просыпались одновременно
+                wait = wait_ms / 1000 * (1 + random.uniform(0, 0.1))
+                remaining = deadline - time.monotonic()
+                if wait > remaining:
+                    raise RateLimited("Превышен лимит запросов к AI", retry_after=wait)
+
+                logger.info(f"Лимит запросов к AI исчерпан, ожидание {wait:.2f} с.")
+                await asyncio.sleep(wait)
+        finally:
+            queue.release()
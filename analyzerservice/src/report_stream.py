@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
+
+from analyzerservice.config import REDIS_URL
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+class ReportStream:
+    """
+    Передача частей отчёта от воркера клиенту через Redis Streams.
+
+    Воркер дописывает события в поток задачи по мере ответа LLM, веб-процесс
+    читает их и отдаёт клиенту. Типы событий: chunk (часть текста),
+    done (отчёт готов), error (ошибка генерации).
+
+    Attributes:
+        redis (Redis): Синхронный клиент Redis для записи (воркер).
+        ttl (int): Время жизни потока в секундах.
+    """
+
+    KEY_PREFIX = "report_stream"
+
+    def __init__(self, redis_url: str = REDIS_URL, ttl: int = 60 * 60) -> None:
+        """
+        Инициализация экземпляра ReportStream.
+
+        Args:
+            redis_url (str): URL для подключения к Redis.
+            ttl (int): Время жизни потока в секундах.
+        """
+        self.redis_url: str = redis_url
+        self.redis: Redis = Redis.from_url(redis_url, decode_responses=True)
+        self.ttl: int = ttl
+        self._async_redis: Optional[AsyncRedis] = None
+
+    def _key(self, stream_id: str) -> str:
+        """
+        Формирует ключ потока для задачи.
+
+        Args:
+            stream_id (str): Идентификатор задачи генерации.
+
+        Returns:
+            str: Ключ потока в Redis.
+        """
+        return f"{self.KEY_PREFIX}:{stream_id}"
+
+    async def publish(self, stream_id: str, event_type: str, **fields: Any) -> None:
+        """
+        Дописывает событие в поток задачи.
+
+        Ошибки Redis не пробрасываются: потоковая выдача не должна
+        ломать генерацию отчёта, который всё равно попадёт в кэш и базу.
+        XADD и EXPIRE отправляются одним pipeline в отдельном потоке, чтобы
+        не блокировать общий цикл событий воркера на каждой части ответа.
+
+        Args:
+            stream_id (str): Идентификатор задачи генерации.
+            event_type (str): Тип события (chunk, done, error).
+            **fields: Поля события.
+        """
+        key = self._key(stream_id)
+        event = {"type": event_type, **{name: str(value) for name, value in fields.items()}}
+        pipe = self.redis.pipeline()
+        pipe.xadd(key, event)
+        pipe.expire(key, self.ttl)
+        try:
+            await asyncio.to_thread(pipe.execute)
+        except RedisError as e:
+            logger.warning(f"Ошибка Redis при записи в поток отчёта {stream_id}: {e}")
+
+    async def read(
+        self,
+        stream_id: str,
+        block_ms: int = 5000,
+        idle_timeout: float = 120.0
+    ) -> AsyncIterator[Dict[str, str]]:
+        """
+        Читает события потока с начала до завершения генерации.
+
+        Args:
+            stream_id (str): Идентификатор задачи генерации.
+            block_ms (int): Время ожидания новых событий за одно чтение, мс.
+            idle_timeout (float): Сколько секунд ждать без новых событий до остановки.
+
+        Yields:
+            Dict[str, str]: События потока; при простое дольше idle_timeout
+            выдаётся событие типа timeout.
+        """
+        if self._async_redis is None:
+            self._async_redis = AsyncRedis.from_url(self.redis_url, decode_responses=True)
+
+        key = self._key(stream_id)
+        last_id = "0"
+        idle = 0.0
+        while True:
+            response = await self._async_redis.xread({key: last_id}, block=block_ms, count=100)
+            if not response:
+                idle += block_ms / 1000
+                if idle >= idle_timeout:
+                    yield {"type": "timeout"}
+                    return
+                continue
+
+            idle = 0.0
+            for last_id, event in response[0][1]:
+                yield event
+                if event["type"] == "done" or (event["type"] == "error" and event.get("retrying") != "True"):
+                    return
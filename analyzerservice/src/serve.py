@@ -0,0 +1,45 @@
+import logging
+
+import uvicorn
+
+from analyzerservice.config import (
+    WEB_HOST, WEB_PORT, WEB_WORKERS, WEB_LOOP, WEB_HTTP,
+    WEB_KEEPALIVE_TIMEOUT, WEB_GRACEFUL_SHUTDOWN_TIMEOUT, WEB_ACCESS_LOG
+)
+from analyzerservice.metrics import clear_multiproc_dir
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def main() -> None:
+    """
+    Production точка входа веб-сервиса.
+
+    Запускает WEB_WORKERS процессов uvicorn с циклом событий uvloop и
+    HTTP-парсером httptools. По SIGTERM/SIGINT сервер перестаёт принимать
+    соединения, дожидается активных запросов не дольше
+    WEB_GRACEFUL_SHUTDOWN_TIMEOUT секунд и выполняет завершение lifespan
+    (закрытие пула соединений с БД).
+    """
+    # Метрики процессов прошлого запуска не должны попасть в сумму
+    clear_multiproc_dir()
+    logger.info(f"Запуск веб-сервиса: {WEB_WORKERS} процессов, loop={WEB_LOOP}, http={WEB_HTTP}")
+    uvicorn.run(
+        "analyzerservice.src.main:app",
+        host=WEB_HOST,
+        port=WEB_PORT,
+        workers=WEB_WORKERS,
+        loop=WEB_LOOP,
+        http=WEB_HTTP,
+        timeout_keep_alive=WEB_KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=WEB_GRACEFUL_SHUTDOWN_TIMEOUT,
+        access_log=WEB_ACCESS_LOG,
+        proxy_headers=True,
+        log_level="info",
+    )
+
+
+if __name__ == "__main__":
+    main()
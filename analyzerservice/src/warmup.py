@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Optional
+import logging
+from redis import Redis
+from redis.exceptions import RedisError
+
+from analyzerservice.config import REDIS_URL, WARMUP_LLM_BUDGET
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+class WarmupTracker:
+    """
+    Учёт бюджета LLM и статуса прогрева кэша отчётов в Redis.
+
+    Бюджет считается на сутки (UTC) и общий для всех воркеров, поэтому
+    запуски по расписанию и после загрузки данных не превышают его в сумме.
+    Команды Redis выполняются в отдельном потоке, чтобы не блокировать цикл
+    событий веб-процесса и воркера.
+
+    Attributes:
+        redis (Redis): Клиент Redis.
+        daily_budget (int): Допустимое количество вызовов LLM для прогрева в сутки.
+    """
+
+    STATUS_KEY = "warmup:status"
+    BUDGET_KEY_PREFIX = "warmup:budget"
+
+    def __init__(
+        self,
+        redis_url: str = REDIS_URL,
+        daily_budget: int = WARMUP_LLM_BUDGET
+    ) -> None:
+        """
+        Инициализация экземпляра WarmupTracker.
+
+        Args:
+            redis_url (str): URL для подключения к Redis.
+            daily_budget (int): Допустимое количество вызовов LLM в сутки.
+        """
+        self.redis: Redis = Redis.from_url(redis_url, decode_responses=True)
+        self.daily_budget: int = daily_budget
+
+    def _budget_key(self, day: Optional[date] = None) -> str:
+        """
+        Формирует ключ счётчика бюджета для указанных суток.
+
+        Args:
+            day (Optional[date]): Сутки; по умолчанию текущие (UTC).
+
+        Returns:
+            str: Ключ счётчика в Redis.
+        """
+        day = day or datetime.now(timezone.utc).date()
+        return f"{self.BUDGET_KEY_PREFIX}:{day.isoformat()}"
+
+    async def try_consume_budget(self) -> bool:
+        """
+        Резервирует один вызов LLM из суточного бюджета.
+
+        Returns:
+            bool: True, если вызов разрешён; False, если бюджет исчерпан
+            или Redis недоступен.
+        """
+        try:
+            return await asyncio.to_thread(self._consume_budget, self._budget_key())
+        except RedisError as e:
+            logger.warning(f"Ошибка Redis при учёте бюджета прогрева: {e}")
+            return False
+
+    def _consume_budget(self, key: str) -> bool:
+        """Увеличивает счётчик бюджета и откатывает его, если бюджет исчерпан."""
+        used = self.redis.incr(key)
+        if used == 1:
+            # Ключ живёт чуть дольше суток, чтобы не копить счётчики
+            self.redis.expire(key, 2 * 24 * 60 * 60)
+        if used > self.daily_budget:
+            self.redis.decr(key)
+            logger.info("Бюджет LLM для прогрева кэша исчерпан.")
+            return False
+        return True
+
+    async def release_budget(self) -> None:
+        """
+        Возвращает в суточный бюджет вызов, зарезервированный для неудавшейся генерации.
+        """
+        try:
+            await asyncio.to_thread(self.redis.decr, self._budget_key())
+        except RedisError as e:
+            logger.warning(f"Ошибка Redis при возврате бюджета прогрева: {e}")
+
+    async def remaining_budget(self) -> int:
+        """
+        Возвращает остаток суточного бюджета вызовов LLM.
+
+        Returns:
+            int: Количество доступных вызовов.
+        """
+        try:
+            used = int(await asyncio.to_thread(self.redis.get, self._budget_key()) or 0)
+        except RedisError as e:
+            logger.warning(f"Ошибка Redis при чтении бюджета прогрева: {e}")
+            return 0
+        return max(self.daily_budget - used, 0)
+
+    async def set_status(self, **fields: Any) -> None:
+        """
+        Обновляет поля статуса прогрева.
+
+        Args:
+            **fields: Поля статуса; значения сериализуются в JSON.
+        """
+        try:
+            await asyncio.to_thread(
+                self.redis.hset,
+                self.STATUS_KEY,
+                mapping={name: json.dumps(value) for name, value in fields.items()}
+            )
+        except RedisError as e:
+            logger.warning(f"Ошибка Redis при сохранении статуса прогрева: {e}")
+
+    async def get_status(self) -> Dict[str, Any]:
+        """
+        Возвращает статус последнего прогрева вместе с остатком бюджета.
+
+        Returns:
+            Dict[str, Any]: Поля статуса; пустой статус имеет state="idle".
+        """
+        try:
+            raw = await asyncio.to_thread(self.redis.hgetall, self.STATUS_KEY)
+        except RedisError as e:
+            logger.warning(f"Ошибка Redis при чтении статуса прогрева: {e}")
+            raw = {}
+
+        status: Dict[str, Any] = {"state": "idle"}
+        status.update({name: json.loads(value) for name, value in raw.items()})
+        status["daily_budget"] = self.daily_budget
+        status["budget_remaining"] = await self.remaining_budget()
+        return status
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+from typing import Any, Coroutine, Optional
+
+from celery.exceptions import SoftTimeLimitExceeded
+
+from analyzerservice.config import WORKER_LOOP_CONCURRENCY
+from analyzerservice.data.dbbase import dispose_engine
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+class WorkerLoop:
+    """
+    Долгоживущий цикл событий процесса воркера Celery.
+
+    Цикл работает в отдельном потоке и живёт столько же, сколько процесс,
+    поэтому пул соединений SQLAlchemy всегда используется в одном цикле.
+    Задачи передают корутины через `run`; при пуле `threads` несколько
+    задач выполняются на цикле одновременно (не более `concurrency`).
+
+    Attributes:
+        concurrency (int): Максимум одновременно выполняемых корутин.
+    """
+
+    def __init__(self, concurrency: int = WORKER_LOOP_CONCURRENCY) -> None:
+        """
+        Инициализация экземпляра WorkerLoop.
+
+        Args:
+            concurrency (int): Максимум одновременно выполняемых корутин.
+        """
+        self.concurrency: int = concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """Цикл событий текущего процесса или None, если он не запущен."""
+        return self._loop if self._pid == os.getpid() else None
+
+    @property
+    def thread_id(self) -> Optional[int]:
+        """Идентификатор потока цикла событий или None, если он не запущен."""
+        return self._thread.ident if self.loop is not None else None
+
+    def start(self) -> None:
+        """
+        Запускает цикл событий, если он ещё не запущен в текущем процессе.
+
+        Соединения, унаследованные от родительского процесса, сбрасываются
+        без закрытия, чтобы не сломать пул родителя.
+        """
+        with self._lock:
+            if self.loop is not None:
+                return
+
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="worker-event-loop", daemon=True)
+            thread.start()
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            self._semaphore = None
+
+            asyncio.run_coroutine_threadsafe(dispose_engine(close=False), loop).result()
+            logger.info(f"Цикл событий воркера запущен (pid {self._pid}).")
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """
+        Закрывает пул соединений и останавливает цикл событий.
+
+        Args:
+            timeout (float): Время ожидания закрытия соединений в секундах.
+        """
+        with self._lock:
+            loop = self.loop
+            if loop is None:
+                return
+
+            try:
+                asyncio.run_coroutine_threadsafe(dispose_engine(), loop).result(timeout)
+            except Exception as e:
+                logger.warning(f"Ошибка при закрытии пула соединений: {e}")
+
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join(timeout)
+            loop.close()
+            self._loop = self._thread = self._semaphore = self._pid = None
+            logger.info("Цикл событий воркера остановлен.")
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """
+        Выполняет корутину на цикле воркера и ждёт результата.
+
+        Корутина получает копию контекстных переменных вызывающего потока
+        (например, активный участок трассировки задачи). Если ожидание
+        прервано в вызывающем потоке (SoftTimeLimitExceeded и т.п.), корутина
+        отменяется и не продолжает работу после завершения задачи.
+
+        Пул threads не применяет лимиты времени Celery, поэтому soft_time_limit
+        задачи передаётся сюда как timeout: по его истечении корутина
+        отменяется на цикле, а задача получает SoftTimeLimitExceeded, как при
+        пуле prefork.
+
+        Args:
+            coro: Корутина для выполнения.
+            timeout (Optional[float]): Предельное время выполнения, включая
+                ожидание свободного места на цикле, сек; None - без ограничения.
+
+        Returns:
+            Any: Результат корутины.
+
+        Raises:
+            SoftTimeLimitExceeded: Если корутина не завершилась за timeout секунд.
+        """
+        self.start()
+        context = contextvars.copy_context()
+        future = asyncio.run_coroutine_threadsafe(self._guarded(coro, context, timeout), self._loop)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    async def _guarded(
+        self,
+        coro: Coroutine[Any, Any, Any],
+        context: Optional[contextvars.Context] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Ограничивает число одновременно выполняемых корутин и время их выполнения.
+
+        Args:
+            coro: Корутина для выполнения.
+            context: Контекст, в котором выполняется корутина.
+            timeout: Предельное время выполнения, сек; None - без ограничения.
+
+        Returns:
+            Any: Результат корутины.
+
+        Raises:
+            SoftTimeLimitExceeded: Если корутина не завершилась за timeout секунд.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        scope = asyncio.timeout(timeout)
+        try:
+            async with scope, self._semaphore:
+                if context is None:
+                    return await coro
+                return await asyncio.get_running_loop().create_task(coro, context=context)
+        except TimeoutError:
+            # TimeoutError самой корутины (не по timeout) передаётся без изменений
+            if scope.expired():
+                raise SoftTimeLimitExceeded(f"Задача не завершилась за {timeout:g} с") from None
+            raise
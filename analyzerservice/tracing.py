@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterator, Optional
+
+from analyzerservice.config import TRACE_SAMPLE_RATE, TRACE_EXPORTER, TRACE_FILE
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Заголовок W3C Trace Context, в котором контекст передаётся по HTTP и в сообщениях Celery
+TRACEPARENT = "traceparent"
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_span_logger: Optional[logging.Logger] = None
+_listener: Optional[QueueListener] = None
+_exporter_lock = threading.Lock()
+
+
+class Span:
+    """
+    Участок трассировки: одна операция с началом, длительностью и атрибутами.
+
+    Attributes:
+        name (str): Название операции.
+        trace_id (str): Идентификатор трассировки (32 hex).
+        span_id (str): Идентификатор участка (16 hex).
+        parent_id (Optional[str]): Идентификатор родительского участка.
+        sampled (bool): Попадёт ли трассировка в экспорт.
+        attributes (Dict[str, Any]): Атрибуты операции.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "sampled", "attributes", "status",
+                 "_started_at", "_started")
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool,
+        attributes: Dict[str, Any]
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes
+        self.status = "ok"
+        self._started_at = time.time()
+        self._started = time.perf_counter()
+
+    @property
+    def traceparent(self) -> str:
+        """Значение заголовка traceparent для передачи контекста дальше."""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Добавляет атрибут участка; для неэкспортируемых участков ничего не делает.
+
+        Args:
+            key (str): Название атрибута.
+            value (Any): Значение атрибута.
+        """
+        if self.sampled:
+            self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        """
+        Отмечает участок как завершившийся ошибкой.
+
+        Args:
+            exc (BaseException): Возникшее исключение.
+        """
+        self.status = "error"
+        self.set_attribute("error", f"{type(exc).__name__}: {exc}")
+
+    def end(self) -> None:
+        """Завершает участок и передаёт его экспортёру, если трассировка выбрана."""
+        if not self.sampled:
+            return
+        _export({
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": datetime.fromtimestamp(self._started_at, timezone.utc).isoformat(timespec="microseconds"),
+            "duration_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        })
+
+
+def _parse_traceparent(traceparent: Optional[str]) -> Optional[tuple[str, str, bool]]:
+    """Разбирает заголовок traceparent в (trace_id, parent_id, sampled) или возвращает None."""
+    if not traceparent:
+        return None
+    parts = traceparent.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2], parts[3] == "01"
+
+
+def current_span() -> Optional[Span]:
+    """Возвращает активный участок текущего контекста или None."""
+    return _current_span.get()
+
+
+def current_traceparent() -> Optional[str]:
+    """Возвращает traceparent активного участка для передачи в заголовки или None."""
+    span = _current_span.get()
+    return span.traceparent if span else None
+
+
+def begin_span(name: str, traceparent: Optional[str] = None, **attributes: Any) -> tuple[Span, Optional[Token]]:
+    """
+    Открывает участок и делает его активным.
+
+    Для случаев, когда начало и конец операции находятся в разных функциях
+    (сигналы Celery); в остальном коде используется start_span.
+
+    Args:
+        name (str): Название операции.
+        traceparent (Optional[str]): Контекст удалённого родителя (HTTP или Celery).
+        **attributes: Атрибуты операции.
+
+    Returns:
+        tuple[Span, Optional[Token]]: Участок и токен для end_span. Внутри
+        невыбранной трассировки возвращается родительский участок без токена.
+    """
+    parent = _current_span.get()
+    if parent is not None:
+        if not parent.sampled:
+            return parent, None
+        span = Span(name, parent.trace_id, parent.span_id, True, attributes)
+    else:
+        remote = _parse_traceparent(traceparent)
+        if remote is not None:
+            span = Span(name, remote[0], remote[1], remote[2], attributes)
+        else:
+            sampled = TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+            span = Span(name, f"{random.getrandbits(128):032x}", None, sampled, attributes)
+    return span, _current_span.set(span)
+
+
+def end_span(span: Span, token: Optional[Token]) -> None:
+    """
+    Завершает участок, открытый begin_span, и восстанавливает родителя.
+
+    Args:
+        span (Span): Участок.
+        token (Optional[Token]): Токен из begin_span.
+    """
+    if token is None:
+        return
+    span.end()
+    _current_span.reset(token)
+
+
+@contextmanager
+def start_span(name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Контекстный менеджер участка трассировки.
+
+    Args:
+        name (str): Название операции.
+        traceparent (Optional[str]): Контекст удалённого родителя.
+        **attributes: Атрибуты операции.
+
+    Yields:
+        Span: Активный участок.
+    """
+    span, token = begin_span(name, traceparent, **attributes)
+    try:
+        yield span
+    except BaseException as e:
+        if token is not None:
+            span.record_exception(e)
+        raise
+    finally:
+        end_span(span, token)
+
+
+def _export(entry: Dict[str, Any]) -> None:
+    """Передаёт завершённый участок экспортёру TRACE_EXPORTER."""
+    global _span_logger, _listener
+    if TRACE_EXPORTER == "none":
+        return
+    if TRACE_EXPORTER == "console":
+        logger.info("span %s %.3f мс", entry["name"], entry["duration_ms"], extra={"span": entry})
+        return
+    with _exporter_lock:
+        if _span_logger is None:
+            # Файл JSON Lines пишет отдельный поток, чтобы не блокировать цикл событий
+            handler = logging.FileHandler(TRACE_FILE)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            span_queue: queue.SimpleQueue = queue.SimpleQueue()
+            _listener = QueueListener(span_queue, handler)
+            _listener.start()
+            atexit.register(_listener.stop)
+            span_logger = logging.getLogger(f"{__name__}.spans")
+            span_logger.propagate = False
+            span_logger.setLevel(logging.INFO)
+            span_logger.addHandler(QueueHandler(span_queue))
+            _span_logger = span_logger
+    _span_logger.info(json.dumps(entry, ensure_ascii=False, default=str))
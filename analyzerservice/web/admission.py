@@ -0,0 +1,31 @@
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, Callable
+
+from fastapi import HTTPException
+
+from analyzerservice.errors import Overloaded
+from analyzerservice.src.admission import AdmissionGate
+
+
+def admit(gate: AdmissionGate) -> Callable[[], AsyncIterator[None]]:
+    """
+    Создаёт зависимость FastAPI, допускающую запрос через gate.
+
+    Args:
+        gate (AdmissionGate): Правила допуска эндпоинта.
+
+    Returns:
+        Callable: Зависимость для параметра dependencies декоратора маршрута.
+        При перегрузке она отвечает 429 с заголовком Retry-After.
+    """
+    async def dependency() -> AsyncIterator[None]:
+        async with AsyncExitStack() as stack:
+            try:
+                await stack.enter_async_context(gate.admit())
+            except Overloaded as e:
+                raise HTTPException(
+                    status_code=429, detail=f"Сервис перегружен: {e.msg}", headers={"Retry-After": str(e.retry_after)}
+                ) from e
+            yield
+
+    return dependency
@@ -0,0 +1,67 @@
+import logging
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+
+from analyzerservice.config import ANALYTICS_MAX_DAYS
+from analyzerservice.model.schemas import SalesAnalyticsSchema
+from analyzerservice.service import analytics as service
+from analyzerservice.web.responses import FastJSONResponse
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Создание роутера с префиксом
+router = APIRouter(prefix="/analytics")
+
+# Клиент обязан перепроверять ответ, но повторная проверка стоит одного запроса к итогам
+CACHE_CONTROL = "private, no-cache"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+@router.get("/sales", response_model=SalesAnalyticsSchema)
+async def get_sales_analytics(
+    start_date: date,
+    end_date: date,
+    group_by: Literal["day", "week", "month"] = Query("day", description="Группировка: day, week или month"),
+    if_none_match: Optional[str] = Header(None)
+) -> Response:
+    """
+    Возвращает выручку, количество и разбивку по категориям за период.
+
+    Ответ строится из предрасчитанных итогов по дням и категориям. Каждый
+    ответ содержит ETag; при совпадении If-None-Match возвращается 304 без
+    построения ответа.
+
+    Args:
+        start_date (date): Первая дата периода (включительно).
+        end_date (date): Последняя дата периода (включительно).
+        group_by (str): Группировка по дню, неделе (с понедельника) или месяцу.
+        if_none_match (Optional[str]): ETag ранее полученного ответа.
+
+    Returns:
+        Response: Итоги за период (200) или 304, если данные не изменились.
+
+    Raises:
+        HTTPException: Если период задан неверно.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="Дата окончания раньше даты начала")
+    if (end_date - start_date).days + 1 > ANALYTICS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Период не может быть длиннее {ANALYTICS_MAX_DAYS} дней")
+
+    etag = await service.get_sales_etag(start_date, end_date, group_by)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    analytics = await service.get_sales_analytics(start_date, end_date, group_by)
+    return FastJSONResponse(analytics, headers=headers)
@@ -1,11 +1,16 @@
+import asyncio
 import logging
 import httpx
 import xml.etree.ElementTree as ET
 
-from fastapi import APIRouter, Form, HTTPException
+from fastapi import APIRouter, Depends, Form, HTTPException
 from analyzerservice.service import data_loader as service
 from analyzerservice.model.schemas import ProductSchema
-from analyzerservice.errors import Missing
+from analyzerservice.errors import FeedError, Missing
+from analyzerservice.web.responses import FastJSONResponse
+from analyzerservice.web.admission import admit
+from analyzerservice.src import admission
+from analyzerservice.src.celery_app import schedule_cache_warmup, ingest_xml_task, feed_staging
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -14,11 +19,14 @@ logger.setLevel(logging.INFO)
 # Создание роутера с префиксом
 router = APIRouter(prefix="/explorer")
 
-@router.post("/xml/get-xml", status_code=201)
+@router.post("/xml/get-xml", status_code=201, dependencies=[Depends(admit(admission.INGEST))])
 async def get_xml_from_url(url: str = Form(..., description='https://www.w3schools.com/xml/plant_catalog.xml')) -> ProductSchema:
     """
     Получает XML данные по указанному URL и возвращает их.
 
+    Постраничный документ загружается целиком и сохраняется одной транзакцией;
+    повторный запрос после ошибки загружает только недостающие страницы.
+
     Args:
         url (str): URL адрес XML документа.
 
@@ -28,45 +36,68 @@ async def get_xml_from_url(url: str = Form(..., description='https://www.w3schoo
     Raises:
         HTTPException: В случае ошибки HTTP запроса (например, 404 Not Found).
         HTTPException: В случае ошибки парсинга XML, с указанием строки и столбца ошибки.
+        HTTPException: Если документ некорректен (400).
         HTTPException: В случае любой другой непредвиденной ошибки.
     """
     try:
-        logger.info(f"Запрос XML данных с URL: {url}")
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-        
-        logger.info(f"Успешно получен ответ от {url}")
-        try:
-            data = await service.get_xml_data(response.content)
-            logger.info(f"Данные успешно извлечены из XML по URL: {url}")
-            return data
-        except ET.ParseError as e:
-            line_number, column_number = e.position
-            error_message = f"Ошибка парсинга XML: {e} в строке {line_number}, столбце {column_number}"
-            logger.error(error_message)
-            raise HTTPException(status_code=400, detail=error_message) from e
-
+        data = await service.ingest_feed(url, feed_staging)
+        logger.debug("Данные успешно извлечены из XML по URL: %s", url)
+        # Прогрев кэша отчётов для загруженной даты
+        # apply_async синхронно обращается к брокеру, поэтому выполняется в отдельном потоке
+        await asyncio.to_thread(schedule_cache_warmup, [data.date_sell])
+        return data
+    except ET.ParseError as e:
+        line_number, column_number = e.position
+        error_message = f"Ошибка парсинга XML: {e} в строке {line_number}, столбце {column_number}"
+        logger.error(error_message)
+        raise HTTPException(status_code=400, detail=error_message) from e
+    except FeedError as e:
+        logger.error(f"Некорректный документ {url}: {e.msg}")
+        raise HTTPException(status_code=400, detail=f"Плохой запрос: {e.msg}") from e
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP ошибка при запросе {url}: {e}")
         raise HTTPException(status_code=e.response.status_code, detail=f"HTTP Error: {e}")
-    except httpx.ConnectError as e:
+    except httpx.TransportError as e:
         logger.error(f"Ошибка соединения при запросе {url}: {e}")
         raise HTTPException(status_code=504, detail=f"Connection Error: {e}")
 
 
-@router.get("/")
-async def get_all() -> list[ProductSchema]:
+@router.post("/xml/get-xml/background", status_code=202, dependencies=[Depends(admit(admission.INGEST_BACKGROUND))])
+async def get_xml_from_url_in_background(url: str = Form(..., description='https://www.w3schools.com/xml/plant_catalog.xml')) -> dict:
+    """
+    Ставит загрузку XML данных по URL в очередь ingest.
+
+    Args:
+        url (str): URL адрес XML документа.
+
+    Returns:
+        dict: Сообщение и идентификатор задачи загрузки.
+
+    Raises:
+        HTTPException: В случае ошибки постановки задачи в очередь.
+    """
+    try:
+        task = ingest_xml_task.delay(url)
+        logger.info(f"Фоновая загрузка XML по URL {url} поставлена в очередь. Task ID: {task.id}")
+        return {"message": "Загрузка поставлена в очередь", "task_id": task.id}
+    except Exception as e:
+        logger.exception(f"Ошибка при постановке загрузки XML по URL {url}: {e}")
+        raise HTTPException(status_code=500, detail=f"Ошибка при запуске задачи: {e}")
+
+
+@router.get("/", response_model=list[ProductSchema])
+async def get_all() -> FastJSONResponse:
     """
     Возвращает все данные из базы данных Product.
 
+    Записи уже проверены при чтении из базы, поэтому ответ сериализуется
+    напрямую, без повторной валидации по response_model.
+
     Returns:
-        list[ProductSchema]: Список всех данных из базы.
+        FastJSONResponse: Список всех данных из базы.
     """
-    logger.info("Получение всех данных из базы данных.")
     data = await service.get_all()
-    logger.info(f"Успешно получены {len(data)} записи.")
-    return data
+    return FastJSONResponse(data)
 
 @router.delete("/{product_id}", status_code=204)
 async def delete_product(product_id: int) -> None:
@@ -80,9 +111,7 @@ async def delete_product(product_id: int) -> None:
         HTTPException: Если продукт не найден или произошла другая ошибка.
     """
     try:
-        logger.info(f"Удаление продукта с ID: {product_id}")
         await service.delete_product(product_id)
-        logger.info(f"Продукт с ID {product_id} успешно удалён.")
     except Missing as e:
         logger.warning(f"Продукт с ID {product_id} не найден: {e.msg}")
         raise HTTPException(status_code=404, detail=e.msg)
@@ -0,0 +1,26 @@
+import logging
+
+from fastapi import APIRouter, Response
+
+from analyzerservice.metrics import render_latest
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Создание роутера
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """
+    Отдаёт метрики сервиса в текстовом формате Prometheus.
+
+    При запуске нескольких процессов (PROMETHEUS_MULTIPROC_DIR) значения
+    суммируются по всем процессам веб-сервиса.
+
+    Returns:
+        Response: Метрики в формате Prometheus.
+    """
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
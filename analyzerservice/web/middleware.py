@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qs
+
+from analyzerservice import profiling
+from analyzerservice.tracing import TRACEPARENT, start_span
+
+Scope = Dict[str, Any]
+Message = Dict[str, Any]
+ASGIApp = Callable[[Scope, Callable[[], Awaitable[Message]], Callable[[Message], Awaitable[None]]], Awaitable[None]]
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware, открывающий корневой участок трассировки для HTTP запроса.
+
+    Входящий заголовок traceparent продолжает трассировку вызывающей
+    стороны. Для выбранных трассировок traceparent возвращается в ответе,
+    чтобы запрос можно было найти в экспорте. Задачи Celery, поставленные
+    при обработке запроса, получают контекст через заголовки сообщения.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == TRACEPARENT.encode()), None
+        )
+        with start_span(f"{scope['method']} {scope['path']}", traceparent, method=scope["method"]) as span:
+            async def send_with_trace(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("status_code", message["status"])
+                    if span.sampled:
+                        headers = list(message.get("headers", []))
+                        headers.append((TRACEPARENT.encode(), span.traceparent.encode()))
+                        message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware, снимающий профиль отдельного запроса по требованию.
+
+    Профиль включается заголовком X-Profile или параметром ?profile= с
+    токеном PROFILING_TOKEN; при неверном токене запрос отклоняется с 403.
+    Задачи Celery, поставленные таким запросом, профилируются тоже. Путь к
+    файлу профиля возвращается в заголовке X-Profile-File. Middleware
+    подключается только при заданном PROFILING_TOKEN, поэтому без него
+    накладных расходов нет.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    @staticmethod
+    def _requested_token(scope: Scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == profiling.PROFILE_HEADER.encode():
+                return value.decode("latin-1")
+        query = scope.get("query_string", b"")
+        if profiling.PROFILE_PARAM.encode() + b"=" in query:
+            return parse_qs(query.decode("latin-1")).get(profiling.PROFILE_PARAM, [None])[0]
+        return None
+
+    async def __call__(self, scope: Scope, receive: Callable, send: Callable) -> None:
+        token = self._requested_token(scope) if scope["type"] == "http" else None
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not profiling.is_authorized(token):
+            body = json.dumps({"detail": "Профилирование запрещено"}).encode()
+            await send({"type": "http.response.start", "status": 403,
+                        "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        if not profiling.try_acquire():
+            # Профиль уже снимается в этом процессе: запрос выполняется без профилирования
+            await self.app(scope, receive, send)
+            return
+
+        profiler = profiling.SamplingProfiler(
+            f"{scope['method']} {scope['path']}", [threading.get_ident()], task=asyncio.current_task()
+        ).start()
+        context_token = profiling.profile_tasks.set(True)
+
+        async def send_with_profile(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-file", profiler.path.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            profiling.profile_tasks.reset(context_token)
+            profiler.stop()
+            try:
+                await asyncio.to_thread(profiler.write)
+            finally:
+                profiling.release()
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
 from datetime import date
+import json
 import logging
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any
 
-from fastapi import APIRouter, HTTPException, Query
+from celery.result import AsyncResult
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
-from analyzerservice.src.celery_app import generate_report_task, cache
+from analyzerservice.config import REPORT_RANGE_MAX_DAYS
+from analyzerservice.errors import Missing
+from analyzerservice.model.schemas import AnalysisSchema
+from analyzerservice.src.llm_backend import BackendStats, backend_names
+from analyzerservice.src.celery_app import (
+    celery_app, generate_report_task, cache, warmup, report_stream, dispatch_report_range,
+    get_queue_depths
+)
 from analyzerservice.service import report_generator as service
+from analyzerservice.src import admission
+from analyzerservice.web.admission import admit
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
@@ -15,13 +27,18 @@ logger.setLevel(logging.INFO)
 
 # Создание роутера с префиксом
 router = APIRouter(prefix="/report-generator")
+llm_stats = BackendStats()
 
-@router.post("/", status_code=201, response_model=Dict[str, Any])
+@router.post("/", status_code=201, response_model=Dict[str, Any], dependencies=[Depends(admit(admission.REPORT))])
 async def trigger_report_generation(
     target_date: date,
     force_refresh: bool = Query(
         False, 
         description="Принудительная регенерация отчёта с игнорированием кэша"
+    ),
+    stream: bool = Query(
+        False,
+        description="Передавать отчёт по частям через /report-generator/stream/{task_id}"
     )
 ) -> Dict[str, Any]:
     """
@@ -30,18 +47,20 @@ async def trigger_report_generation(
     Args:
         target_date (date): Дата, для которой необходимо сгенерировать отчёт.
         force_refresh (bool): Принудительное игнорирование кэша, если True.
+        stream (bool): Потоковая выдача отчёта по мере генерации, если True.
 
     Returns:
         Dict[str, Any]: Словарь с информацией о запуске задачи:
                         - сообщение,
                         - идентификатор задачи,
-                        - признак игнорирования кэша.
+                        - признак игнорирования кэша,
+                        - адрес потока отчёта (при stream=True).
 
     Raises:
         HTTPException: В случае ошибки запуска задачи или других проблем.
     """
     try:
-        logger.info(f"Запуск генерации отчёта для даты {target_date}. Force refresh: {force_refresh}")
+        logger.debug("Запуск генерации отчёта для даты %s. Force refresh: %s", target_date, force_refresh)
         
         # Если задан флаг игнорирования кэша, инвалидируем его.
         if force_refresh:
@@ -54,17 +73,164 @@ async def trigger_report_generation(
                 logger.warning(f"Не удалось сформировать промпт для даты {target_date}, кэш не инвалидирован.")
 
         # Запуск асинхронной задачи через Celery
-        task = generate_report_task.delay(target_date.isoformat())
+        task = generate_report_task.delay(target_date.isoformat(), stream=stream)
         logger.info(f"Задача на генерацию отчёта для даты {target_date} запущена. Task ID: {task.id}")
         
-        return {
+        response = {
             "message": "Запуск анализа начат",
             "task_id": task.id,
             "cache_ignored": force_refresh
         }
+        if stream:
+            response["stream_url"] = f"{router.prefix}/stream/{task.id}"
+        return response
     except Exception as e:
         logger.exception(f"Ошибка при запуске задачи для даты {target_date}: {e}")
         raise HTTPException(
             status_code=500, 
             detail=f"Ошибка при запуске задачи: {e}"
         )
+
+
+@router.get("/analysis/{analysis_id}")
+async def get_analysis(analysis_id: int) -> AnalysisSchema:
+    """
+    Возвращает сохранённый отчёт по идентификатору из результата задачи.
+
+    Args:
+        analysis_id (int): Идентификатор записи анализа.
+
+    Returns:
+        AnalysisSchema: Дата и текст отчёта.
+
+    Raises:
+        HTTPException: Если анализ не найден.
+    """
+    try:
+        return await service.get_analysis(analysis_id)
+    except Missing as e:
+        logger.warning(f"Анализ с ID {analysis_id} не найден: {e.msg}")
+        raise HTTPException(status_code=404, detail=e.msg)
+
+
+@router.get("/stream/{task_id}")
+async def stream_report(task_id: str) -> StreamingResponse:
+    """
+    Отдаёт отчёт по мере генерации в формате Server-Sent Events.
+
+    События: chunk (часть текста; первая содержит ttft_ms), done (отчёт готов,
+    source: cache или generated), error (retrying=True означает, что задача
+    будет повторена и полученные части нужно отбросить), timeout.
+
+    Args:
+        task_id (str): Идентификатор задачи, запущенной с stream=True.
+
+    Returns:
+        StreamingResponse: Поток событий text/event-stream.
+    """
+    async def events() -> AsyncIterator[str]:
+        async for event in report_stream.read(task_id):
+            yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.post(
+    "/range", status_code=201, response_model=Dict[str, Any], dependencies=[Depends(admit(admission.REPORT_RANGE))]
+)
+async def trigger_range_report_generation(start_date: date, end_date: date) -> Dict[str, Any]:
+    """
+    Запускает генерацию отчётов за период с итоговой сводкой.
+
+    Args:
+        start_date (date): Первая дата периода (включительно).
+        end_date (date): Последняя дата периода (включительно).
+
+    Returns:
+        Dict[str, Any]: Словарь с информацией о запуске:
+                        - сообщение,
+                        - идентификатор задачи-сводки для отслеживания,
+                        - идентификатор группы задач по датам,
+                        - даты, поставленные в очередь, взятые из кэша и без данных.
+
+    Raises:
+        HTTPException: Если период задан неверно или задачи не удалось запустить.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="Дата окончания раньше даты начала")
+    if (end_date - start_date).days + 1 > REPORT_RANGE_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Период не может быть длиннее {REPORT_RANGE_MAX_DAYS} дней"
+        )
+
+    try:
+        logger.info(f"Запуск генерации отчётов за период {start_date} - {end_date}.")
+        dispatched = await dispatch_report_range(start_date, end_date)
+        logger.info(
+            f"Генерация за период {start_date} - {end_date} запущена. Task ID: {dispatched['task_id']}, "
+            f"в очереди {len(dispatched['queued'])}, из кэша {len(dispatched['cached'])}."
+        )
+        return {"message": "Запуск анализа за период начат", **dispatched}
+    except Exception as e:
+        logger.exception(f"Ошибка при запуске задач за период {start_date} - {end_date}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Ошибка при запуске задачи: {e}"
+        )
+
+
+@router.get("/range/{task_id}", response_model=Dict[str, Any])
+async def get_range_report(task_id: str) -> Dict[str, Any]:
+    """
+    Возвращает состояние генерации отчётов за период.
+
+    Args:
+        task_id (str): Идентификатор задачи-сводки, полученный при запуске.
+
+    Returns:
+        Dict[str, Any]: Состояние задачи и, после завершения, сводка с итогами по датам
+                        (source: cache, generated, failed или no_data).
+    """
+    result = AsyncResult(task_id, app=celery_app)
+    response: Dict[str, Any] = {"task_id": task_id, "state": result.state}
+    if result.successful():
+        response["result"] = result.result
+    elif result.failed():
+        response["error"] = str(result.result)
+    return response
+
+
+@router.get("/warm-up/status", response_model=Dict[str, Any])
+async def get_warmup_status() -> Dict[str, Any]:
+    """
+    Возвращает статус прогрева кэша отчётов.
+
+    Returns:
+        Dict[str, Any]: Состояние последнего прогрева (state, started_at, finished_at,
+                        даты generated/cached/skipped/failed) и остаток бюджета LLM.
+    """
+    return await warmup.get_status()
+
+
+@router.get("/llm/stats", response_model=Dict[str, Any])
+async def get_llm_stats() -> Dict[str, Any]:
+    """
+    Возвращает пропускную способность и задержки вызовов по каждому LLM бэкенду.
+
+    Returns:
+        Dict[str, Any]: Сводка по бэкендам (calls, errors, throughput_per_sec,
+                        latency_ms_mean/p50/p95/p99), накопленная всеми воркерами.
+    """
+    return {name: await llm_stats.summary(name) for name in backend_names()}
+
+
+@router.get("/queues", response_model=Dict[str, int])
+async def get_queues() -> Dict[str, int]:
+    """
+    Возвращает число ожидающих задач в очередях interactive, bulk и ingest.
+
+    Returns:
+        Dict[str, int]: Словарь {очередь: число задач}.
+    """
+    return await get_queue_depths()
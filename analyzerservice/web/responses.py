@@ -0,0 +1,24 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-ответ, сериализуемый orjson вместо json.dumps.
+
+    Ответы эндпоинтов с response_model приходят сюда уже в виде словарей
+    и списков, их быстрее всего сериализует orjson. Pydantic модели и
+    Decimal orjson не поддерживает: такие ответы (доверенные данные из
+    базы, которые FastAPI не валидирует повторно) сериализует pydantic-core,
+    он обходит модели в Rust без промежуточного model_dump.
+    """
+
+    def render(self, content: Any) -> bytes:
+        try:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # orjson останавливается на первом неподдерживаемом объекте
+            return to_json(content)
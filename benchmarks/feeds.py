@@ -0,0 +1,130 @@
+"""
+Генератор синтетических XML документов <sales_data> для замеров.
+
+Документы воспроизводимы: при одинаковых параметрах и seed получаются
+байт-в-байт одинаковые файлы. Каждый день генерируется независимо
+(своё зерно на дату), поэтому документы можно создавать лениво, по одному,
+без хранения всего набора в памяти - это позволяет генерировать до 10M
+продуктов.
+
+Параметры:
+    products        - общее число строк продаж по всем дням;
+    categories      - число различных категорий;
+    days            - разброс дат: строки распределяются по стольким дням;
+    malformed_ratio - доля строк с нечисловым количеством или ценой.
+
+Пример:
+    python -m benchmarks.feeds --products 1000000 --days 30 --out-dir /tmp/feeds
+"""
+import argparse
+import os
+import random
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from typing import Iterator, Tuple
+
+_MALFORMED_VALUES = ("n/a", "-", "1,5", "abc")
+
+
+@dataclass(frozen=True)
+class FeedSpec:
+    """Параметры генерируемого набора документов."""
+    products: int = 10_000
+    categories: int = 20
+    days: int = 7
+    malformed_ratio: float = 0.0
+    seed: int = 42
+    start_date: date = date(2100, 1, 1)
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "start_date": self.start_date.isoformat()}
+
+
+def rows_per_day(spec: FeedSpec) -> list[int]:
+    """Число строк в документе каждого дня; остаток деления уходит в первые дни."""
+    base, extra = divmod(spec.products, spec.days)
+    return [base + (1 if day < extra else 0) for day in range(spec.days)]
+
+
+def _product_xml(rng: random.Random, product_id: int, categories: int, malformed: bool) -> str:
+    quantity = str(rng.randint(1, 500))
+    price = f"{rng.uniform(1, 5000):.2f}"
+    if malformed:
+        if rng.random() < 0.5:
+            quantity = rng.choice(_MALFORMED_VALUES)
+        else:
+            price = rng.choice(_MALFORMED_VALUES)
+    return (
+        "<product>"
+        f"<id>{product_id}</id>"
+        f"<name>Product {product_id}</name>"
+        f"<quantity>{quantity}</quantity>"
+        f"<price>{price}</price>"
+        f"<category>Category {rng.randrange(categories)}</category>"
+        "</product>"
+    )
+
+
+def generate_document(spec: FeedSpec, day: int, first_id: int, count: int) -> bytes:
+    """
+    Формирует документ <sales_data> за один день.
+
+    Args:
+        spec: Параметры набора.
+        day: Номер дня от spec.start_date.
+        first_id: Идентификатор первого продукта документа.
+        count: Число строк в документе.
+
+    Returns:
+        XML документ в UTF-8.
+    """
+    rng = random.Random(f"{spec.seed}:{day}")
+    date_sell = spec.start_date + timedelta(days=day)
+    parts = [f'<sales_data date="{date_sell.isoformat()}"><products>']
+    parts.extend(
+        _product_xml(rng, product_id, spec.categories, rng.random() < spec.malformed_ratio)
+        for product_id in range(first_id, first_id + count)
+    )
+    parts.append("</products></sales_data>")
+    return "".join(parts).encode()
+
+
+def generate_feed(spec: FeedSpec) -> Iterator[Tuple[date, bytes]]:
+    """
+    Лениво генерирует документы всех дней набора.
+
+    Args:
+        spec: Параметры набора.
+
+    Yields:
+        Пары (дата, XML документ).
+    """
+    first_id = 1
+    for day, count in enumerate(rows_per_day(spec)):
+        if count:
+            yield spec.start_date + timedelta(days=day), generate_document(spec, day, first_id, count)
+        first_id += count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=FeedSpec.products)
+    parser.add_argument("--categories", type=int, default=FeedSpec.categories)
+    parser.add_argument("--days", type=int, default=FeedSpec.days)
+    parser.add_argument("--malformed-ratio", type=float, default=FeedSpec.malformed_ratio)
+    parser.add_argument("--seed", type=int, default=FeedSpec.seed)
+    parser.add_argument("--start-date", type=date.fromisoformat, default=FeedSpec.start_date)
+    parser.add_argument("--out-dir", required=True, help="Каталог для XML файлов")
+    args = parser.parse_args()
+
+    spec = FeedSpec(args.products, args.categories, args.days, args.malformed_ratio, args.seed, args.start_date)
+    os.makedirs(args.out_dir, exist_ok=True)
+    for date_sell, document in generate_feed(spec):
+        path = os.path.join(args.out_dir, f"sales_{date_sell.isoformat()}.xml")
+        with open(path, "wb") as file:
+            file.write(document)
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Нагрузочное тестирование всего стека с локальными заменами внешних сервисов.
+
+Генератор нагрузки работает по открытой модели: запросы приходят пуассоновским
+потоком с заданной интенсивностью независимо от того, успевает ли сервис
+отвечать. Задержка отсчитывается от запланированного момента отправки, поэтому
+очередь на стороне клиента тоже попадает в перцентили. Каждая ступень
+--rates выполняется --duration секунд. Для каждого эндпоинта отчёт содержит
+пропускную способность, ошибки и p50/p90/p99.
+
+Эндпоинты смеси (--mix):
+    ingest - POST /explorer/xml/get-xml с документом синтетического сервера;
+    list   - GET /explorer/;
+    report - POST /report-generator/ за одну из загруженных дат.
+
+Замены внешних сервисов:
+    feed-server     - сервер синтетических XML документов вместо nginx life-server
+                      (python -m benchmarks.loadtest feed-server);
+    LLM_BACKEND=fake - бэкенд FakeBackend в воркерах Celery;
+    PostgreSQL и Redis - локальные (docker-compose.loadtest.yml).
+
+Пример:
+    docker compose -f docker-compose.yml -f docker-compose.loadtest.yml up -d
+    python -m benchmarks.loadtest run --feed-url http://feed-server:8080 \\
+        --mix ingest=1 list=4 report=2 --rates 5 10 20 40 --duration 30 --output load.json
+"""
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import timedelta
+from functools import lru_cache
+from itertools import accumulate
+from typing import Callable, Dict, Tuple
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from benchmarks.feeds import FeedSpec, generate_document, rows_per_day
+from benchmarks.results import latency_stats, run_metadata, save_report
+
+
+def feed_app(spec: FeedSpec) -> Starlette:
+    """
+    Приложение, отдающее документы набора по адресу /sales/{день}.xml.
+
+    Документы генерируются по запросу и кэшируются, поэтому сервер не
+    становится узким местом при повторных загрузках.
+    """
+    counts = rows_per_day(spec)
+    first_ids = [1, *accumulate(counts)]
+
+    @lru_cache(maxsize=128)
+    def document(day: int) -> bytes:
+        return generate_document(spec, day, first_ids[day], counts[day])
+
+    async def sales(request: Request) -> Response:
+        day = request.path_params["day"]
+        if day >= spec.days:
+            return Response(status_code=404)
+        return Response(document(day), media_type="application/xml")
+
+    return Starlette(routes=[Route("/sales/{day:int}.xml", sales)])
+
+
+class EndpointStats:
+    """Результаты запросов одного эндпоинта за ступень нагрузки."""
+
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.statuses: Counter = Counter()
+        self.errors = 0
+        self.dropped = 0
+
+    def summary(self, elapsed: float) -> dict:
+        ok = sum(count for status, count in self.statuses.items() if status < 400)
+        return {
+            **latency_stats(self.latencies),
+            "ok": ok,
+            "errors": self.errors + sum(count for status, count in self.statuses.items() if status >= 400),
+            "dropped": self.dropped,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+        }
+
+
+# Запрос эндпоинта: метод, путь и аргументы httpx
+RequestSpec = Tuple[str, str, dict]
+
+
+def _endpoints(args: argparse.Namespace, spec: FeedSpec) -> Dict[str, Callable[[random.Random], RequestSpec]]:
+    """
+    Функции, выбирающие параметры очередного запроса каждого эндпоинта.
+
+    Параметры выбираются в цикле планирования, а не при отправке: порядок
+    выполнения запросов зависит от времени ответа, и общий генератор
+    случайных чисел дал бы разные последовательности при одном --seed.
+    """
+    ingested = [0]
+
+    def ingest(rng: random.Random) -> RequestSpec:
+        day = ingested[0] % spec.days
+        ingested[0] += 1
+        return "POST", "/explorer/xml/get-xml", {"data": {"url": f"{args.feed_url}/sales/{day}.xml"}}
+
+    def list_products(rng: random.Random) -> RequestSpec:
+        return "GET", "/explorer/", {}
+
+    def report(rng: random.Random) -> RequestSpec:
+        target_date = spec.start_date + timedelta(days=rng.randrange(spec.days))
+        return "POST", "/report-generator/", {"params": {"target_date": target_date.isoformat()}}
+
+    return {"ingest": ingest, "list": list_products, "report": report}
+
+
+async def run_stage(client: httpx.AsyncClient, endpoints: dict, mix: dict, rate: float,
+                    duration: float, max_inflight: int, rng: random.Random) -> dict:
+    """
+    Выполняет одну ступень нагрузки с интенсивностью rate запросов в секунду.
+
+    Если одновременно выполняется max_inflight запросов, очередной запрос
+    не отправляется и учитывается как dropped. Все случайные величины
+    (интервалы, эндпоинт и его параметры) берутся из rng в цикле
+    планирования, поэтому последовательность запросов определяется seed.
+    """
+    loop = asyncio.get_running_loop()
+    names, weights = list(mix), list(mix.values())
+    stats = {name: EndpointStats() for name in names}
+    inflight: set[asyncio.Task] = set()
+
+    async def send(name: str, request: RequestSpec, scheduled: float) -> None:
+        method, path, kwargs = request
+        try:
+            response = await client.request(method, path, **kwargs)
+            stats[name].statuses[response.status_code] += 1
+        except httpx.HTTPError:
+            stats[name].errors += 1
+            return
+        stats[name].latencies.append(loop.time() - scheduled)
+
+    started = loop.time()
+    deadline = started + duration
+    scheduled = started
+    while True:
+        scheduled += rng.expovariate(rate)
+        if scheduled >= deadline:
+            break
+        await asyncio.sleep(max(0.0, scheduled - loop.time()))
+        name = rng.choices(names, weights)[0]
+        request = endpoints[name](rng)
+        if len(inflight) >= max_inflight:
+            stats[name].dropped += 1
+            continue
+        task = asyncio.create_task(send(name, request, scheduled))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+    await asyncio.gather(*inflight)
+    elapsed = loop.time() - started
+
+    return {
+        "offered_rps": rate,
+        "seconds": round(elapsed, 2),
+        "endpoints": {name: stats[name].summary(elapsed) for name in names},
+    }
+
+
+async def run_load(args: argparse.Namespace, spec: FeedSpec, mix: dict) -> dict:
+    endpoints = _endpoints(args, spec)
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.max_inflight, max_keepalive_connections=args.max_inflight)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        # Даты для отчётов должны быть загружены до начала замеров
+        for day in range(spec.days):
+            response = await client.post(
+                "/explorer/xml/get-xml", data={"url": f"{args.feed_url}/sales/{day}.xml"}
+            )
+            response.raise_for_status()
+        if args.warmup:
+            await run_stage(client, endpoints, mix, args.rates[0], args.warmup, args.max_inflight, rng)
+        stages = {}
+        for rate in args.rates:
+            stages[f"{rate:g}rps"] = await run_stage(
+                client, endpoints, mix, rate, args.duration, args.max_inflight, rng
+            )
+    return stages
+
+
+def _start_feed_server(args: argparse.Namespace) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "benchmarks.loadtest", "feed-server", "--port", str(args.feed_port),
+        "--feed-rows", str(args.feed_rows), "--feed-days", str(args.feed_days), "--seed", str(args.seed),
+    ]
+    server = subprocess.Popen(command)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{args.feed_url}/sales/0.xml").raise_for_status()
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"Сервер документов {args.feed_url} не запустился")
+
+
+def _parse_mix(values: list[str]) -> dict:
+    mix = {}
+    for value in values:
+        name, _, weight = value.partition("=")
+        if name not in ("ingest", "list", "report"):
+            raise argparse.ArgumentTypeError(f"Неизвестный эндпоинт смеси: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _feed_spec(args: argparse.Namespace) -> FeedSpec:
+    return FeedSpec(products=args.feed_rows * args.feed_days, days=args.feed_days, seed=args.seed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    feed = argparse.ArgumentParser(add_help=False)
+    feed.add_argument("--feed-rows", type=int, default=1_000, help="Строк в документе за день")
+    feed.add_argument("--feed-days", type=int, default=30, help="Число документов (дат)")
+    feed.add_argument("--seed", type=int, default=FeedSpec.seed)
+
+    server = commands.add_parser("feed-server", parents=[feed], help="Сервер синтетических XML документов")
+    server.add_argument("--host", default="0.0.0.0")
+    server.add_argument("--port", type=int, default=8080)
+
+    run = commands.add_parser("run", parents=[feed], help="Нагрузочный тест")
+    run.add_argument("--url", default="http://127.0.0.1:8000", help="Адрес веб-сервиса")
+    run.add_argument("--feed-url", help="Адрес сервера документов, видимый веб-сервису; "
+                                        "если не задан, сервер запускается локально")
+    run.add_argument("--feed-port", type=int, default=8080)
+    run.add_argument("--mix", nargs="+", default=["ingest=1", "list=4", "report=2"], help="Веса эндпоинтов")
+    run.add_argument("--rates", type=float, nargs="+", default=[5, 10, 20, 40], help="Ступени, запросов в секунду")
+    run.add_argument("--duration", type=float, default=30.0, help="Длительность ступени, сек")
+    run.add_argument("--warmup", type=float, default=5.0, help="Прогрев перед замерами, сек")
+    run.add_argument("--max-inflight", type=int, default=256, help="Предел одновременных запросов")
+    run.add_argument("--timeout", type=float, default=60.0)
+    run.add_argument("--output", help="Файл для сохранения результатов JSON")
+    run.add_argument("--baseline", help="Результаты предыдущего запуска для сравнения")
+    args = parser.parse_args()
+
+    spec = _feed_spec(args)
+    if args.command == "feed-server":
+        uvicorn.run(feed_app(spec), host=args.host, port=args.port, log_level="warning")
+        return
+
+    mix = _parse_mix(args.mix)
+    feed_server = None
+    if not args.feed_url:
+        args.feed_url = f"http://127.0.0.1:{args.feed_port}"
+        feed_server = _start_feed_server(args)
+    try:
+        stages = asyncio.run(run_load(args, spec, mix))
+    finally:
+        if feed_server is not None:
+            feed_server.terminate()
+            feed_server.wait(timeout=30)
+
+    report = {
+        "meta": run_metadata(
+            url=args.url, mix=mix, duration=args.duration, max_inflight=args.max_inflight, feed=spec.as_dict()
+        ),
+        "benchmarks": stages,
+    }
+    save_report(report, args.output, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
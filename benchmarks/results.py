@@ -0,0 +1,92 @@
+"""
+Общие функции замеров: перцентили, метаданные запуска и сравнение с базовым запуском.
+"""
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * percent / 100), len(values) - 1)]
+
+
+def latency_stats(latencies: list[float]) -> dict:
+    """Число замеров и p50/p90/p99/среднее/максимум задержки в мс."""
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "max_ms": round(max(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_metadata(**params) -> dict:
+    """Время, ревизия и окружение запуска вместе с его параметрами."""
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **params,
+    }
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    """
+    Сравнивает числовые метрики с результатами предыдущего запуска.
+
+    Args:
+        results: Текущие результаты (раздел "benchmarks").
+        baseline: Результаты базового запуска (раздел "benchmarks").
+
+    Returns:
+        Та же структура, где вместо чисел - изменение в процентах.
+    """
+    changes = {}
+    for key, value in results.items():
+        base = baseline.get(key)
+        if isinstance(value, dict) and isinstance(base, dict):
+            nested = compare(value, base)
+            if nested:
+                changes[key] = nested
+        elif isinstance(value, (int, float)) and isinstance(base, (int, float)) and base:
+            changes[key] = round((value - base) / base * 100, 1)
+    return changes
+
+
+def save_report(report: dict, output: Optional[str], baseline: Optional[str]) -> None:
+    """
+    Дополняет отчёт сравнением с базовым запуском, сохраняет и выводит его.
+
+    Args:
+        report: Отчёт с разделами "meta" и "benchmarks".
+        output: Файл для сохранения JSON или None.
+        baseline: Файл результатов предыдущего запуска или None.
+    """
+    if baseline:
+        with open(baseline) as file:
+            base = json.load(file)
+        report["change_pct"] = compare(report["benchmarks"], base.get("benchmarks", {}))
+        report["meta"]["baseline_revision"] = base.get("meta", {}).get("revision")
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, "w") as file:
+            file.write(text)
+    print(text)
@@ -0,0 +1,112 @@
+"""
+Сравнение пропускной способности веб-сервиса в двух профилях запуска.
+
+baseline   - как раньше: один процесс uvicorn, asyncio и h11.
+production - python -m analyzerservice.src.serve: несколько процессов,
+             uvloop и httptools.
+
+Каждый профиль запускается отдельным сервером, после чего эндпоинт
+нагружается заданное время с фиксированным числом одновременных
+запросов. Для эндпоинтов с базой данных нужны переменные PG* и
+запущенный PostgreSQL (например, docker compose up db redis).
+
+Пример:
+    python -m benchmarks.serving --path /explorer/ --duration 20 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.results import percentile
+
+PROFILES = {
+    "baseline": lambda port: [
+        sys.executable, "-m", "uvicorn", "analyzerservice.src.main:app",
+        "--port", str(port), "--loop", "asyncio", "--http", "h11", "--log-level", "warning",
+    ],
+    "production": lambda port: [sys.executable, "-m", "analyzerservice.src.serve"],
+}
+
+
+async def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{url}/openapi.json")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"Сервер {url} не запустился за {timeout} с")
+
+
+async def _load(url: str, duration: float, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        async def worker() -> None:
+            nonlocal errors
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def run_profile(profile: str, args: argparse.Namespace) -> dict:
+    port = args.port
+    env = {**os.environ, "WEB_PORT": str(port), "WEB_WORKERS": str(args.workers), "WEB_HOST": "127.0.0.1"}
+    server = subprocess.Popen(PROFILES[profile](port), env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(_wait_ready(base_url))
+        asyncio.run(_load(base_url + args.path, min(args.duration, 3.0), args.concurrency))  # Прогрев
+        result = asyncio.run(_load(base_url + args.path, args.duration, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+    return {"profile": profile, **result}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default="/explorer/", help="Нагружаемый эндпоинт")
+    parser.add_argument("--duration", type=float, default=15.0, help="Длительность замера, сек")
+    parser.add_argument("--concurrency", type=int, default=64, help="Одновременных запросов")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Процессов в production профиле")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    args = parser.parse_args()
+
+    results = [run_profile(profile, args) for profile in args.profiles]
+    if len(results) == 2 and results[0]["rps"]:
+        results.append({"speedup": round(results[1]["rps"] / results[0]["rps"], 2)})
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
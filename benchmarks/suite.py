@@ -0,0 +1,202 @@
+"""
+Набор замеров загрузки и построения отчётов на синтетических данных.
+
+Замеры:
+    parse   - разбор XML и валидация строк загрузчиком без записи в БД;
+    ingest  - загрузка документов в PostgreSQL (parse_sales_page и save_products одной транзакцией);
+    prompt  - задержка construct_prompt_by_date в зависимости от числа строк за день;
+    cache   - операции ReportCache (set, get с попаданием и промахом, delete) в Redis.
+
+Данные генерирует benchmarks/feeds.py с фиксированным seed. Для ingest и
+prompt нужны переменные PG* и запущенный PostgreSQL, для cache - REDIS_URL.
+Синтетические строки пишутся с датами начиная с 2100-01-01 и удаляются после
+замера, но запускать лучше на отдельной базе.
+
+Результат сохраняется в JSON. С --baseline к каждой метрике добавляется
+изменение относительно предыдущего запуска в процентах.
+
+Пример:
+    python -m benchmarks.suite parse prompt --products 100000 --output bench.json
+    python -m benchmarks.suite parse --products 100000 --baseline bench.json
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, insert
+
+from analyzerservice.config import REDIS_URL
+from analyzerservice.data import data_loader
+from analyzerservice.data.dbbase import Product, async_main, async_session, dispose_engine
+from analyzerservice.errors import FeedError
+from analyzerservice.model.schemas import ProductSchema
+from analyzerservice.service.report_generator import construct_prompt_by_date
+from analyzerservice.src.cache import ReportCache
+from benchmarks.feeds import FeedSpec, generate_feed
+from benchmarks.results import latency_stats, run_metadata, save_report
+
+
+async def _load_feed(spec: FeedSpec, save_products: Callable[[list[ProductSchema]], Awaitable[int]]) -> dict:
+    """
+    Прогоняет документы набора через загрузчик и считает строки, байты и отклонённые документы.
+
+    save_products получает продукты каждого документа и возвращает число сохранённых строк.
+    """
+    documents = rejected = rows = size = 0
+    elapsed = 0.0
+    for _, document in generate_feed(spec):
+        documents += 1
+        size += len(document)
+        started = time.perf_counter()
+        try:
+            page = data_loader.parse_sales_page(document)
+            rows += await save_products(page.products)
+        except FeedError:
+            # Загрузчик отклоняет документ целиком на первой испорченной строке
+            rejected += 1
+        elapsed += time.perf_counter() - started
+    return {
+        "documents": documents, "rejected_documents": rejected, "rows": rows, "bytes": size,
+        "seconds": round(elapsed, 4),
+    }
+
+
+async def _discard_products(products: list[ProductSchema]) -> int:
+    """Приёмник для замера parse: строки только считаются, без записи в БД."""
+    return len(products)
+
+
+async def bench_parse(spec: FeedSpec) -> dict:
+    result = await _load_feed(spec, _discard_products)
+    return {
+        **result,
+        "rows_per_s": round(result["rows"] / result["seconds"], 1) if result["seconds"] else 0.0,
+        "mb_per_s": round(result["bytes"] / 1e6 / result["seconds"], 2) if result["seconds"] else 0.0,
+    }
+
+
+async def _delete_dates(start: date, end: date) -> None:
+    async with async_session() as session:
+        await session.execute(delete(Product).where(Product.date_sell.between(start, end)))
+        await session.commit()
+
+
+async def bench_ingest(spec: FeedSpec) -> dict:
+    await async_main()
+    end = spec.start_date + timedelta(days=spec.days)
+    await _delete_dates(spec.start_date, end)
+    try:
+        result = await _load_feed(spec, data_loader.save_products)
+    finally:
+        await _delete_dates(spec.start_date, end)
+    return {
+        **result,
+        "rows_per_s": round(result["rows"] / result["seconds"], 1) if result["seconds"] else 0.0,
+    }
+
+
+async def _seed_day(date_sell: date, rows: int, categories: int) -> None:
+    """Заполняет день строками пакетной вставкой, минуя замеряемый загрузчик."""
+    batch = 10_000
+    async with async_session() as session:
+        for first in range(0, rows, batch):
+            await session.execute(insert(Product), [
+                {
+                    "date_sell": date_sell,
+                    "name": f"Product {index}",
+                    "quantity": index % 500 + 1,
+                    "price": float(index % 5000) + 0.99,
+                    "category": f"Category {index % categories}",
+                }
+                for index in range(first, min(first + batch, rows))
+            ])
+        await session.commit()
+
+
+async def bench_prompt(spec: FeedSpec, sizes: list[int], repeat: int) -> dict:
+    await async_main()
+    results = {}
+    for offset, rows in enumerate(sizes):
+        date_sell = spec.start_date + timedelta(days=offset)
+        await _delete_dates(date_sell, date_sell)
+        try:
+            await _seed_day(date_sell, rows, spec.categories)
+            await construct_prompt_by_date(date_sell)  # Прогрев
+            latencies = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                await construct_prompt_by_date(date_sell)
+                latencies.append(time.perf_counter() - started)
+        finally:
+            await _delete_dates(date_sell, date_sell)
+        results[str(rows)] = latency_stats(latencies)
+    return {"rows_per_day": results}
+
+
+async def bench_cache(spec: FeedSpec, operations: int) -> dict:
+    cache = ReportCache(redis_url=REDIS_URL)
+    report = "Аналитический отчет. " * 100
+    dates = [spec.start_date + timedelta(days=day) for day in range(operations)]
+    prompts = [f"benchmark prompt {spec.seed} {day}" for day in range(operations)]
+
+    async def measure(operation: Callable[[str, date], Awaitable]) -> dict:
+        latencies = []
+        started = time.perf_counter()
+        for prompt, date_sell in zip(prompts, dates):
+            began = time.perf_counter()
+            await operation(prompt, date_sell)
+            latencies.append(time.perf_counter() - began)
+        elapsed = time.perf_counter() - started
+        return {**latency_stats(latencies), "ops_per_s": round(len(latencies) / elapsed, 1)}
+
+    return {
+        "set": await measure(lambda prompt, date_sell: cache.cache_report(prompt, date_sell, report, ttl=600)),
+        "get_hit": await measure(cache.get_cached_entry),
+        "delete": await measure(cache.invalidate_cache),
+        "get_miss": await measure(cache.get_cached_entry),
+    }
+
+
+async def run(args: argparse.Namespace, spec: FeedSpec) -> dict:
+    benchmarks = {
+        "parse": lambda: bench_parse(spec),
+        "ingest": lambda: bench_ingest(spec),
+        "prompt": lambda: bench_prompt(spec, args.prompt_rows, args.repeat),
+        "cache": lambda: bench_cache(spec, args.cache_ops),
+    }
+    results = {}
+    try:
+        for name in args.benchmarks:
+            results[name] = await benchmarks[name]()
+    finally:
+        await dispose_engine()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("benchmarks", nargs="*", default=["parse"], choices=["parse", "ingest", "prompt", "cache"])
+    parser.add_argument("--products", type=int, default=FeedSpec.products, help="Строк продаж (1k - 10M)")
+    parser.add_argument("--categories", type=int, default=FeedSpec.categories)
+    parser.add_argument("--days", type=int, default=FeedSpec.days, help="Разброс дат")
+    parser.add_argument("--malformed-ratio", type=float, default=FeedSpec.malformed_ratio)
+    parser.add_argument("--seed", type=int, default=FeedSpec.seed)
+    parser.add_argument("--prompt-rows", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000],
+                        help="Строк за день для замера prompt")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов construct_prompt_by_date")
+    parser.add_argument("--cache-ops", type=int, default=1_000, help="Операций каждого типа для cache")
+    parser.add_argument("--output", help="Файл для сохранения результатов JSON")
+    parser.add_argument("--baseline", help="Результаты предыдущего запуска для сравнения")
+    args = parser.parse_args()
+
+    spec = FeedSpec(args.products, args.categories, args.days, args.malformed_ratio, args.seed)
+    report = {
+        "meta": run_metadata(feed=spec.as_dict()),
+        "benchmarks": asyncio.run(run(args, spec)),
+    }
+    save_report(report, args.output, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import xml.etree.ElementTree as ET
+
+from benchmarks.feeds import FeedSpec, generate_feed
+
+
+def _malformed_rows(spec):
+    malformed = total = 0
+    for _, document in generate_feed(spec):
+        for product in ET.fromstring(document).iter("product"):
+            total += 1
+            try:
+                int(product.find("quantity").text)
+                float(product.find("price").text)
+            except ValueError:
+                malformed += 1
+    return malformed, total
+
+
+def test_same_seed_generates_identical_documents():
+    spec = FeedSpec(products=500, days=3, malformed_ratio=0.1, seed=7)
+
+    assert list(generate_feed(spec)) == list(generate_feed(FeedSpec(products=500, days=3, malformed_ratio=0.1, seed=7)))
+    assert list(generate_feed(spec)) != list(generate_feed(FeedSpec(products=500, days=3, malformed_ratio=0.1, seed=8)))
+
+
+def test_malformed_ratio_controls_share_of_broken_rows():
+    assert _malformed_rows(FeedSpec(products=2_000, days=2, malformed_ratio=0.0)) == (0, 2_000)
+
+    malformed, total = _malformed_rows(FeedSpec(products=10_000, days=4, malformed_ratio=0.1))
+    assert total == 10_000
+    assert 0.08 < malformed / total < 0.12
@@ -0,0 +1,28 @@
+import pytest
+
+from benchmarks import suite
+from benchmarks.feeds import FeedSpec
+
+
+@pytest.mark.asyncio
+async def test_bench_parse_counts_rows_without_database():
+    result = await suite.bench_parse(FeedSpec(products=300, days=3))
+
+    assert result["documents"] == 3
+    assert result["rows"] == 300
+    assert result["rejected_documents"] == 0
+
+
+@pytest.mark.asyncio
+async def test_load_feed_rejects_documents_with_malformed_rows():
+    saved = []
+
+    async def save_products(products):
+        saved.extend(products)
+        return len(products)
+
+    result = await suite._load_feed(FeedSpec(products=300, days=3, malformed_ratio=1.0), save_products)
+
+    assert result["rejected_documents"] == 3
+    assert result["rows"] == 0
+    assert saved == []
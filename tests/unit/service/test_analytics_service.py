@@ -0,0 +1,33 @@
+from datetime import date
+
+import pytest
+
+from analyzerservice.service import analytics
+
+
+@pytest.mark.asyncio
+async def test_sales_analytics_groups_periods_and_categories(mocker):
+    mocker.patch.object(analytics.data, "get_sales_by_period", mocker.AsyncMock(return_value=[
+        (date(2024, 1, 1), "Books", 100.0, 10, 2),
+        (date(2024, 1, 1), "Electronics", 1500.0, 1, 1),
+        (date(2024, 1, 8), "Books", 50.0, 5, 1),
+    ]))
+
+    result = await analytics.get_sales_analytics(date(2024, 1, 1), date(2024, 1, 14), "week")
+
+    assert (result.totals.revenue, result.totals.quantity, result.totals.rows) == (1650.0, 16, 4)
+    assert result.categories["Books"].revenue == 150.0
+    assert [period.period for period in result.periods] == [date(2024, 1, 1), date(2024, 1, 8)]
+    assert result.periods[0].revenue == 1600.0
+    assert result.periods[0].categories["Electronics"].quantity == 1
+
+
+@pytest.mark.asyncio
+async def test_sales_etag_changes_with_aggregate_version(mocker):
+    version = mocker.patch.object(analytics.data, "get_sales_version", mocker.AsyncMock(return_value=(3, 10, 99.5, 1.0)))
+    first = await analytics.get_sales_etag(date(2024, 1, 1), date(2024, 1, 31), "day")
+    assert first == await analytics.get_sales_etag(date(2024, 1, 1), date(2024, 1, 31), "day")
+    assert first != await analytics.get_sales_etag(date(2024, 1, 1), date(2024, 1, 31), "month")
+
+    version.return_value = (3, 11, 120.0, 2.0)
+    assert first != await analytics.get_sales_etag(date(2024, 1, 1), date(2024, 1, 31), "day")
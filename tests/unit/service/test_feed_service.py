@@ -0,0 +1,163 @@
+import asyncio
+
+import httpx
+import pytest
+
+from analyzerservice.errors import FeedError
+from analyzerservice.service import data_loader as service
+
+
+def _page(page=None, pages=None, next_url=None, name="Product", sell_date="2024-01-01"):
+    attrs = f'date="{sell_date}"'
+    if page is not None:
+        attrs += f' page="{page}" pages="{pages}"'
+    if next_url is not None:
+        attrs += f' next="{next_url}"'
+    return (
+        f"<sales_data {attrs}><products><product><name>{name}</name><quantity>1</quantity>"
+        f"<price>10.0</price><category>Books</category></product></products></sales_data>"
+    ).encode()
+
+
+class MemoryStaging:
+    def __init__(self):
+        self.pages = {}
+        self.fingerprints = {}
+
+    async def get_pages(self, url, fingerprint):
+        if self.fingerprints.get(url) != fingerprint:
+            self.pages.pop(url, None)
+            self.fingerprints[url] = fingerprint
+        return dict(self.pages.get(url, {}))
+
+    async def save_page(self, url, page, content):
+        self.pages.setdefault(url, {})[page] = content
+
+    async def clear(self, url):
+        self.pages.pop(url, None)
+
+
+@pytest.fixture
+def storage(mocker):
+    save = mocker.patch.object(service.data, "save_products", mocker.AsyncMock())
+    mocker.patch.object(service.analytics, "refresh_sales_totals", mocker.AsyncMock())
+    return save
+
+
+def test_page_url_replaces_page_parameter():
+    assert service.page_url("http://feed/sales.xml?day=1&page=1", 3) == "http://feed/sales.xml?day=1&page=3"
+
+
+@pytest.mark.asyncio
+async def test_numbered_pages_fetched_concurrently_and_saved_once(mocker, storage):
+    mocker.patch.object(service, "FEED_PAGE_CONCURRENCY", 2)
+    active, peak = 0, 0
+
+    async def fetch(url, client=None):
+        nonlocal active, peak
+        page = int(url.rsplit("=", 1)[1]) if "page=" in url else 1
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return _page(page, 5, name=f"P{page}")
+
+    mocker.patch.object(service, "fetch_xml", side_effect=fetch)
+    staging = MemoryStaging()
+
+    product = await service.ingest_feed("http://feed/sales.xml", staging)
+
+    storage.assert_awaited_once()
+    assert [item.name for item in storage.await_args.args[0]] == ["P1", "P2", "P3", "P4", "P5"]
+    assert product.name == "P5"
+    assert peak == 2
+    assert staging.pages == {}
+
+
+@pytest.mark.asyncio
+async def test_failed_page_resumes_without_refetching_staged_pages(mocker, storage):
+    fetched = []
+    failing = {"http://feed/sales.xml?page=3"}
+
+    async def fetch(url, client=None):
+        fetched.append(url)
+        if url in failing:
+            raise httpx.ConnectError("connection refused")
+        page = int(url.rsplit("=", 1)[1]) if "page=" in url else 1
+        return _page(page, 3)
+
+    mocker.patch.object(service, "fetch_xml", side_effect=fetch)
+    staging = MemoryStaging()
+
+    with pytest.raises(httpx.ConnectError):
+        await service.ingest_feed("http://feed/sales.xml", staging)
+    storage.assert_not_awaited()
+    assert list(staging.pages["http://feed/sales.xml"]) == [2]
+
+    failing.clear()
+    fetched.clear()
+    await service.ingest_feed("http://feed/sales.xml", staging)
+    assert fetched == ["http://feed/sales.xml", "http://feed/sales.xml?page=3"]
+    assert len(storage.await_args.args[0]) == 3
+
+
+@pytest.mark.asyncio
+async def test_staged_pages_discarded_when_first_page_changed(mocker, storage):
+    fetched = []
+    first = _page(1, 3, name="Old")
+
+    async def fetch(url, client=None):
+        fetched.append(url)
+        if url == "http://feed/sales.xml?page=3":
+            raise httpx.ConnectError("connection refused")
+        return first if "page=" not in url else _page(2, 3)
+
+    mocker.patch.object(service, "fetch_xml", side_effect=fetch)
+    staging = MemoryStaging()
+    with pytest.raises(httpx.ConnectError):
+        await service.ingest_feed("http://feed/sales.xml", staging)
+
+    first = _page(1, 3, name="New")
+    fetched.clear()
+    mocker.patch.object(service, "fetch_xml", side_effect=lambda url, client=None: fetched.append(url) or (
+        first if "page=" not in url else _page(int(url.rsplit("=", 1)[1]), 3)
+    ))
+    await service.ingest_feed("http://feed/sales.xml", staging)
+    assert sorted(fetched) == ["http://feed/sales.xml", "http://feed/sales.xml?page=2", "http://feed/sales.xml?page=3"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("served", [
+    {2: _page(2, 3), 3: _page(2, 3)},  # страница 2 повторена вместо 3
+    {2: _page(3, 3), 3: _page(4, 3)},  # страницы сдвинуты
+    {2: _page(2, 4), 3: _page(3, 4)},  # число страниц изменилось
+])
+async def test_duplicated_or_shifted_pages_rejected(mocker, storage, served):
+    mocker.patch.object(service, "fetch_xml", side_effect=lambda url, client=None: (
+        _page(1, 3) if "page=" not in url else served[int(url.rsplit("=", 1)[1])]
+    ))
+    staging = MemoryStaging()
+
+    with pytest.raises(FeedError):
+        await service.ingest_feed("http://feed/sales.xml", staging)
+    storage.assert_not_awaited()
+    assert all(service.data.parse_sales_page(content).page == page
+               for page, content in staging.pages.get("http://feed/sales.xml", {}).items())
+
+
+@pytest.mark.asyncio
+async def test_next_links_followed_and_dates_must_match(mocker, storage):
+    documents = {
+        "http://feed/sales.xml": _page(next_url="part2.xml"),
+        "http://feed/part2.xml": _page(next_url="/sales/part3.xml"),
+        "http://feed/sales/part3.xml": _page(sell_date="2024-01-02"),
+    }
+    mocker.patch.object(service, "fetch_xml", side_effect=lambda url, client=None: documents[url])
+
+    with pytest.raises(FeedError):
+        await service.ingest_feed("http://feed/sales.xml")
+    storage.assert_not_awaited()
+
+    documents["http://feed/sales/part3.xml"] = _page()
+    await service.ingest_feed("http://feed/sales.xml")
+    assert len(storage.await_args.args[0]) == 3
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from analyzerservice.errors import Overloaded
+from analyzerservice.src import admission
+from analyzerservice.web.admission import admit
+
+
+@pytest.fixture(autouse=True)
+def fresh_queue_depths(mocker):
+    mocker.patch.object(admission, "_queue_depths_at", float("-inf"))
+
+
+@pytest.mark.asyncio
+async def test_limiter_queues_then_rejects_when_queue_full():
+    limiter = admission.AdmissionLimiter("ingest", concurrency=1, queue_size=1, queue_timeout=5)
+    release = asyncio.Event()
+
+    async def hold():
+        async with limiter.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    assert (limiter.active, limiter.waiting) == (1, 1)
+
+    with pytest.raises(Overloaded) as exc_info:
+        async with limiter.slot():
+            pass
+    assert exc_info.value.reason == "queue_full"
+    assert exc_info.value.retry_after >= 1
+
+    release.set()
+    await asyncio.gather(holder, waiter)
+    assert (limiter.active, limiter.waiting) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_limiter_rejects_after_queue_timeout():
+    limiter = admission.AdmissionLimiter("report", concurrency=1, queue_size=10, queue_timeout=0.01)
+    async with limiter.slot():
+        with pytest.raises(Overloaded) as exc_info:
+            async with limiter.slot():
+                pass
+    assert exc_info.value.reason == "queue_timeout"
+    assert limiter.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_gate_sheds_on_queue_depth(mocker):
+    mocker.patch.object(admission, "ADMISSION_MAX_QUEUE_DEPTH", 100)
+    mocker.patch.object(admission, "ADMISSION_RETRY_AFTER", 5)
+    mocker.patch.object(admission, "get_queue_depths", mocker.AsyncMock(return_value={"interactive": 300}))
+    gate = admission.AdmissionGate(admission.AdmissionLimiter("report", 0), queue="interactive")
+
+    with pytest.raises(Overloaded) as exc_info:
+        await gate.check_overload()
+
+    assert exc_info.value.reason == "queue_depth"
+    assert exc_info.value.retry_after == 15
+
+
+@pytest.mark.asyncio
+async def test_gate_sheds_on_db_pool_wait(mocker):
+    mocker.patch.object(admission, "ADMISSION_MAX_POOL_WAIT", 0.5)
+    gate = admission.AdmissionGate(admission.AdmissionLimiter("ingest", 0), uses_db=True)
+
+    mocker.patch.object(admission, "pool_wait_seconds", return_value=0.1)
+    await gate.check_overload()
+
+    mocker.patch.object(admission, "pool_wait_seconds", return_value=1.0)
+    with pytest.raises(Overloaded) as exc_info:
+        await gate.check_overload()
+    assert exc_info.value.reason == "db_pool_wait"
+
+
+def test_overloaded_endpoint_returns_429_with_retry_after(mocker):
+    mocker.patch.object(admission, "ADMISSION_MAX_QUEUE_DEPTH", 10)
+    mocker.patch.object(admission, "get_queue_depths", mocker.AsyncMock(return_value={"ingest": 10}))
+    gate = admission.AdmissionGate(admission.AdmissionLimiter("ingest_background", 0), queue="ingest")
+    app = FastAPI()
+
+    @app.post("/ingest", dependencies=[Depends(admit(gate))])
+    async def ingest():
+        return {"ok": True}
+
+    response = TestClient(app).post("/ingest")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "5"
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+from analyzerservice.src import celery_app
+from analyzerservice.src.cache import ReportCache
+
+
+@pytest.fixture
+def cache():
+    cache = ReportCache(redis_url="redis://localhost:6379/0")
+    cache.redis = MagicMock()
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_cache_report_stores_analysis_reference(cache):
+    await cache.cache_report("prompt", date(2024, 1, 1), "report", analysis_id=7)
+
+    stored = json.loads(cache.redis.setex.call_args.args[2])
+    assert stored == {"report": "report", "analysis_id": 7}
+
+
+@pytest.mark.asyncio
+async def test_get_cached_entry_reads_legacy_format(cache):
+    cache.redis.get.return_value = json.dumps("old report")
+
+    entry, is_cached = await cache.get_cached_entry("prompt", date(2024, 1, 1))
+
+    assert is_cached
+    assert entry == {"report": "old report", "analysis_id": None}
+
+
+@pytest.mark.asyncio
+async def test_get_or_generate_report_returns_reference_only(mocker):
+    mocker.patch.object(celery_app.service, "construct_prompt_by_date", AsyncMock(return_value="prompt"))
+    mocker.patch.object(celery_app.cache, "get_cached_entry", AsyncMock(return_value=(None, False)))
+    mocker.patch.object(celery_app, "_generate_and_store", AsyncMock(return_value=("long report", 42)))
+
+    result = await celery_app._get_or_generate_report(date(2024, 1, 1))
+
+    assert result == {"date": "2024-01-01", "source": "generated", "analysis_id": 42}
+
+
+def test_summarize_report_range_returns_reference_only(mocker):
+    mocker.patch.object(celery_app.service, "construct_period_prompt", AsyncMock(return_value="period"))
+    mocker.patch.object(celery_app.cache, "get_cached_entry", AsyncMock(return_value=(None, False)))
+    mocker.patch.object(celery_app.service, "set_ai_analysis", AsyncMock(return_value=42))
+    cache_report = mocker.patch.object(celery_app.cache, "cache_report", AsyncMock(return_value=True))
+    mocker.patch.object(celery_app, "_call_llm", AsyncMock(return_value="long summary"))
+    mocker.patch.object(celery_app.worker_loop, "run", side_effect=lambda coro, timeout=None: asyncio.run(coro))
+
+    result = celery_app.summarize_report_range_task(
+        [[{"date": "2024-01-02", "source": "generated", "analysis_id": 1}]], "2024-01-01", "2024-01-02", []
+    )
+
+    assert result["analysis_id"] == 42
+    assert result["source"] == "generated"
+    assert "long summary" not in json.dumps(result)
+    assert cache_report.await_args.kwargs["analysis_id"] == 42
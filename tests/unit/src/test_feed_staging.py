@@ -0,0 +1,31 @@
+import pytest
+from unittest.mock import MagicMock
+
+from analyzerservice.src.feed_staging import FeedStaging
+
+
+@pytest.fixture
+def staging():
+    staging = FeedStaging(redis_url="redis://localhost:6379/0", ttl=60)
+    staging.redis = MagicMock()
+    return staging
+
+
+@pytest.mark.asyncio
+async def test_get_pages_returns_pages_of_same_first_page(staging):
+    staging.redis.hgetall.return_value = {b"fingerprint": b"abc", b"2": b"<page2/>"}
+
+    assert await staging.get_pages("http://feed/sales.xml", "abc") == {2: b"<page2/>"}
+    staging.redis.pipeline.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_pages_discards_pages_when_first_page_changed(staging):
+    staging.redis.hgetall.return_value = {b"fingerprint": b"old", b"2": b"<page2/>"}
+    pipe = staging.redis.pipeline.return_value
+
+    assert await staging.get_pages("http://feed/sales.xml", "new") == {}
+    key = staging._key("http://feed/sales.xml")
+    pipe.delete.assert_called_once_with(key)
+    pipe.hset.assert_called_once_with(key, b"fingerprint", "new")
+    pipe.expire.assert_called_once_with(key, 60)
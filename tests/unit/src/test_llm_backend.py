@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from analyzerservice.errors import RateLimited
+from analyzerservice.src.llm_backend import BackendStats, FakeBackend, get_backend
+
+
+@pytest.fixture
+def stats():
+    stats = MagicMock(spec=BackendStats)
+    stats.record = AsyncMock()
+    return stats
+
+
+@pytest.mark.asyncio
+async def test_fake_backend_generate_records_stats(stats):
+    backend = FakeBackend(stats=stats, distribution="fixed", latency_mean=0, output_words=50)
+
+    text = await backend.generate("prompt")
+
+    assert len(text.split(" ")) == 50
+    stats.record.assert_awaited_once()
+    assert stats.record.await_args.kwargs["error"] is False
+
+
+@pytest.mark.asyncio
+async def test_fake_backend_stream_returns_full_text(stats):
+    backend = FakeBackend(stats=stats, distribution="fixed", latency_mean=0, output_words=30, chunks=4)
+
+    parts = [part async for part in backend.stream("prompt")]
+
+    assert len(parts) == 4
+    assert "".join(parts).split() == (await backend.generate("prompt")).split()
+
+
+@pytest.mark.asyncio
+async def test_fake_backend_error_rate(stats):
+    backend = FakeBackend(stats=stats, distribution="fixed", latency_mean=0, error_rate=1.0)
+
+    with pytest.raises(RateLimited):
+        await backend.generate("prompt")
+    assert stats.record.await_args.kwargs["error"] is True
+
+
+def test_fake_backend_lognormal_latency_is_positive(stats):
+    backend = FakeBackend(stats=stats, distribution="lognormal", latency_mean=2.0, latency_stddev=1.0, seed=1)
+    samples = [backend.sample_latency() for _ in range(1000)]
+
+    assert min(samples) > 0
+    assert 1.7 < sum(samples) / len(samples) < 2.3
+
+
+def test_fake_backend_lognormal_zero_mean_has_no_latency(stats):
+    backend = FakeBackend(stats=stats, distribution="lognormal", latency_mean=0.0, latency_stddev=1.0)
+
+    assert backend.sample_latency() == 0.0
+
+
+@pytest.mark.asyncio
+async def test_backend_stats_record_runs_redis_off_the_event_loop():
+    stats = BackendStats(redis_url="redis://localhost:6379/0")
+    stats.redis = MagicMock()
+    pipe = stats.redis.pipeline.return_value
+    threads = []
+    pipe.execute.side_effect = lambda: threads.append(threading.get_ident())
+
+    await stats.record("fake", latency=0.3, output_chars=10, error=False)
+
+    pipe.hincrby.assert_any_call("llm_stats:fake", "le_500", 1)
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_get_backend_unknown():
+    with pytest.raises(ValueError):
+        get_backend("unknown")
+
+
+@pytest.mark.asyncio
+async def test_gemini_quota_error_becomes_rate_limited(stats, mocker):
+    from google.api_core.exceptions import ResourceExhausted
+    from analyzerservice.src.llm_backend import GeminiBackend
+
+    model = MagicMock()
+    model.generate_content_async = AsyncMock(side_effect=ResourceExhausted("quota"))
+    mocker.patch("analyzerservice.src.llm_backend.get_model", return_value=model)
+
+    with pytest.raises(RateLimited):
+        await GeminiBackend(stats=stats).generate("prompt")
@@ -0,0 +1,64 @@
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+
+import pytest
+
+from analyzerservice.src.log_config import JsonFormatter, _RecordQueueHandler, log_sampled
+
+
+def test_queued_record_keeps_extra_fields_in_json():
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger("test_log_config.queue")
+    logger.propagate = False
+    logger.addHandler(_RecordQueueHandler(log_queue))
+
+    logger.warning("Сохранено %d продуктов", 3, extra={"count": 3})
+
+    entry = json.loads(JsonFormatter().format(log_queue.get_nowait()))
+    assert entry["message"] == "Сохранено 3 продуктов"
+    assert entry["count"] == 3
+    assert entry["level"] == "WARNING"
+
+
+def test_log_sampled_respects_rate_and_level(caplog):
+    logger = logging.getLogger("test_log_config.sampled")
+    logger.setLevel(logging.INFO)
+
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        log_sampled(logger, logging.INFO, 0.0, "отброшено")
+        log_sampled(logger, logging.DEBUG, 1.0, "ниже уровня")
+        log_sampled(logger, logging.INFO, 1.0, "Кэш для %s", "2024-01-01", cache="hit")
+
+    assert [record.getMessage() for record in caplog.records] == ["Кэш для 2024-01-01"]
+    assert caplog.records[0].sample_rate == 1.0
+    assert caplog.records[0].cache == "hit"
+
+
+_FORK_SCRIPT = """
+import logging, os, sys
+from analyzerservice.src.log_config import setup_logging, stop_logging
+
+setup_logging(level="INFO", fmt="text", log_file=sys.argv[1])
+pid = os.fork()
+if pid == 0:
+    logging.getLogger("analyzerservice.child").warning("запись дочернего процесса")
+    stop_logging()
+    os._exit(0)
+os.waitpid(pid, 0)
+logging.getLogger("analyzerservice.parent").warning("запись родителя")
+stop_logging()
+"""
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork недоступен")
+def test_forked_child_restarts_listener(tmp_path):
+    log_file = tmp_path / "fork.log"
+    subprocess.run([sys.executable, "-c", _FORK_SCRIPT, str(log_file)], check=True, capture_output=True)
+
+    lines = log_file.read_text().splitlines()
+    assert any("запись дочернего процесса" in line for line in lines)
+    assert any("запись родителя" in line for line in lines)
@@ -0,0 +1,67 @@
+import os
+import time
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from analyzerservice.src import celery_app
+from analyzerservice.src.cache import ReportCache
+from analyzerservice.web import metrics_api
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_cache_lookup_counts_hits_and_misses():
+    cache = ReportCache(redis_url="redis://localhost:6379/0")
+    cache.redis = MagicMock()
+    cache.redis.get.side_effect = ['{"report": "r", "analysis_id": 1}', None]
+    hits, misses = _sample("report_cache_requests_total", result="hit"), _sample("report_cache_requests_total", result="miss")
+
+    await cache.get_cached_entry("prompt", date(2024, 1, 1))
+    await cache.get_cached_entry("prompt", date(2024, 1, 2))
+
+    assert _sample("report_cache_requests_total", result="hit") == hits + 1
+    assert _sample("report_cache_requests_total", result="miss") == misses + 1
+
+
+def test_task_signals_record_queue_wait_and_run_time():
+    headers = {}
+    celery_app._stamp_headers(headers=headers)
+    task = SimpleNamespace(name="generate_report", request=SimpleNamespace(get=headers.get, eta=None))
+    waits = _sample("celery_task_queue_wait_seconds_count", task="generate_report")
+    runs = _sample("celery_task_run_seconds_count", task="generate_report", state="SUCCESS")
+
+    celery_app._observe_queue_wait(task_id="task-id", task=task)
+    time.sleep(0.01)
+    celery_app._observe_run_time(task_id="task-id", task=task, state="SUCCESS")
+
+    assert _sample("celery_task_queue_wait_seconds_count", task="generate_report") == waits + 1
+    assert _sample("celery_task_run_seconds_count", task="generate_report", state="SUCCESS") == runs + 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_prometheus_text():
+    response = await metrics_api.get_metrics()
+
+    assert response.media_type.startswith("text/plain")
+    assert b"report_cache_requests_total" in response.body
+
+
+def test_clear_multiproc_dir_keeps_current_process_files(tmp_path, mocker):
+    from analyzerservice import metrics
+
+    mocker.patch.object(metrics, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    own = [tmp_path / f"counter_{os.getpid()}.db", tmp_path / f"gauge_livesum_{os.getpid()}.db"]
+    stale = [tmp_path / "counter_999999.db", tmp_path / "histogram_1.db"]
+    for path in own + stale:
+        path.write_bytes(b"")
+
+    metrics.clear_multiproc_dir()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(path.name for path in own)
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from analyzerservice import profiling
+from analyzerservice.web.middleware import ProfilingMiddleware
+
+
+@pytest.fixture
+def profile_dir(mocker, tmp_path):
+    mocker.patch.object(profiling, "PROFILING_TOKEN", "secret")
+    mocker.patch.object(profiling, "PROFILING_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_is_authorized_requires_configured_token(mocker):
+    mocker.patch.object(profiling, "PROFILING_TOKEN", "")
+    assert profiling.is_authorized("") is False
+
+    mocker.patch.object(profiling, "PROFILING_TOKEN", "secret")
+    assert profiling.is_authorized("secret") is True
+    assert profiling.is_authorized("wrong") is False
+    assert profiling.is_authorized(None) is False
+
+
+def test_sampling_profiler_writes_folded_stacks(profile_dir):
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    worker.start()
+    profiler = profiling.SamplingProfiler("task demo", [worker.ident], interval=0.001).start()
+    time.sleep(0.05)
+    profiler.stop()
+    stop.set()
+    worker.join()
+
+    path = profiler.write()
+
+    assert os.path.dirname(path) == str(profile_dir)
+    lines = open(path).read().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert stack.startswith("busy;")
+    assert "_busy_loop" in stack
+    assert int(count) > 0
+
+
+def test_profiler_records_awaiting_task(profile_dir):
+    async def waiting():
+        await asyncio.sleep(0.05)
+
+    async def run():
+        task = asyncio.create_task(waiting())
+        await asyncio.sleep(0)
+        profiler = profiling.SamplingProfiler("wait", [threading.get_ident()], task=task, interval=0.001).start()
+        await task
+        profiler.stop()
+        return profiler
+
+    profiler = asyncio.run(run())
+
+    assert any("waiting" in stack and stack.endswith("[await]") for stack in profiler.samples)
+
+
+def test_middleware_rejects_wrong_token(profile_dir):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    client = TestClient(app)
+
+    assert client.get("/ping").status_code == 200
+    assert client.get("/ping", headers={"x-profile": "wrong"}).status_code == 403
+
+    response = client.get("/ping", params={"profile": "secret"})
+    assert response.status_code == 200
+    assert os.path.exists(response.headers["x-profile-file"])
+
+
+def test_task_profiled_when_requested_by_request(profile_dir, mocker):
+    from types import SimpleNamespace
+
+    from analyzerservice.src import celery_app
+
+    headers = {"id": "task-id"}
+    token = profiling.profile_tasks.set(True)
+    try:
+        celery_app._stamp_headers(headers=headers)
+    finally:
+        profiling.profile_tasks.reset(token)
+
+    task = SimpleNamespace(name="generate_report", request=SimpleNamespace(get=headers.get, eta=None))
+    celery_app._observe_queue_wait(task_id="task-id", task=task)
+    time.sleep(0.02)
+    celery_app._observe_run_time(task_id="task-id", task=task, state="SUCCESS")
+
+    assert "secret" not in headers["profile"]
+    assert len(os.listdir(profile_dir)) == 1
+    assert profiling.try_acquire()
+    profiling.release()
+
+
+def test_task_flag_bound_to_task_and_expiry(profile_dir, mocker):
+    flag = profiling.sign_task_flag("task-id")
+
+    assert profiling.verify_task_flag("task-id", flag) is True
+    assert profiling.verify_task_flag("other-task", flag) is False
+    assert profiling.verify_task_flag("task-id", "secret") is False
+
+    mocker.patch.object(profiling.time, "time", return_value=time.time() + profiling._TASK_FLAG_TTL + 1)
+    assert profiling.verify_task_flag("task-id", flag) is False
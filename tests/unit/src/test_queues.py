@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from analyzerservice.config import CELERY_QUEUES
+from analyzerservice.errors import FeedUnavailable
+from analyzerservice.src import celery_app
+
+
+def test_tasks_are_routed_by_request_type():
+    route = celery_app.celery_app.amqp.router.route
+    assert route({}, "generate_report")["queue"].name == "interactive"
+    assert route({}, "warm_report_cache")["queue"].name == "bulk"
+    assert route({}, "generate_report_batch")["queue"].name == "bulk"
+    assert route({}, "ingest_xml")["queue"].name == "ingest"
+
+
+def test_worker_uses_queue_profile():
+    conf = SimpleNamespace(worker_concurrency=None, worker_prefetch_multiplier=4)
+    celery_app._configure_worker_for_queue(conf=conf, options={"queues": ["bulk"]})
+
+    assert conf.worker_concurrency == CELERY_QUEUES["bulk"]["concurrency"]
+    assert conf.worker_prefetch_multiplier == CELERY_QUEUES["bulk"]["prefetch_multiplier"]
+
+
+def test_worker_on_several_queues_keeps_defaults():
+    conf = SimpleNamespace(worker_concurrency=None, worker_prefetch_multiplier=4)
+    celery_app._configure_worker_for_queue(conf=conf, options={"queues": ["bulk", "ingest"]})
+
+    assert conf.worker_concurrency is None
+
+
+@pytest.mark.asyncio
+async def test_get_queue_depths_sums_priority_queues(mocker):
+    pipe = MagicMock()
+    threads = []
+    pipe.execute.side_effect = lambda: threads.append(threading.get_ident()) or [1] * (10 * len(CELERY_QUEUES))
+    mocker.patch.object(celery_app.cache.redis, "pipeline", return_value=pipe)
+
+    depths = await celery_app.get_queue_depths()
+
+    assert depths == {queue: 10 for queue in CELERY_QUEUES}
+    pipe.llen.assert_any_call("bulk:9")
+    assert threads and threads[0] != threading.get_ident()
+
+
+@pytest.mark.parametrize("status, error", [(503, FeedUnavailable), (404, httpx.HTTPStatusError)])
+def test_ingest_task_retries_only_server_errors(mocker, status, error):
+    request = httpx.Request("GET", "http://feed/sales.xml")
+    failure = httpx.HTTPStatusError("feed", request=request, response=httpx.Response(status, request=request))
+    mocker.patch.object(celery_app.data_service, "ingest_feed", AsyncMock(side_effect=failure))
+    mocker.patch.object(celery_app.worker_loop, "run", side_effect=lambda coro, timeout=None: asyncio.run(coro))
+
+    with pytest.raises(error):
+        celery_app.ingest_xml_task("http://feed/sales.xml")
+    assert issubclass(error, celery_app.ingest_xml_task.autoretry_for) == (status >= 500)
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from analyzerservice.errors import RateLimited
+from analyzerservice.src.rate_limiter import LLMRateLimiter
+
+
+@pytest.fixture
+def limiter():
+    limiter = LLMRateLimiter(redis_url="redis://localhost:6379/0", max_wait=1.0)
+    limiter._script = MagicMock()
+    return limiter
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_until_bucket_refills(limiter, mocker):
+    sleep = mocker.patch("analyzerservice.src.rate_limiter.asyncio.sleep", AsyncMock())
+    limiter._script.side_effect = [200, 0]
+
+    await limiter.acquire(100)
+
+    assert limiter._script.call_count == 2
+    sleep.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_acquire_raises_when_wait_exceeds_limit(limiter):
+    limiter._script.return_value = 5000
+
+    with pytest.raises(RateLimited) as exc_info:
+        await limiter.acquire(100)
+    assert exc_info.value.retry_after >= 5
+
+
+def test_estimate_tokens():
+    assert LLMRateLimiter.estimate_tokens("x" * 400, 1024) == 1124
+
+
+@pytest.mark.asyncio
+async def test_acquire_serves_waiters_in_arrival_order(limiter):
+    levels = iter([300, 0, 0])
+    granted = []
+
+    def script(keys, args):
+        # Корзина пуста при первом обращении, затем наполняется
+        return next(levels)
+
+    limiter._script = MagicMock(side_effect=script)
+
+    async def call(name):
+        await limiter.acquire(100)
+        granted.append(name)
+
+    first = asyncio.create_task(call("first"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(call("second"))
+    await asyncio.gather(first, second)
+
+    assert granted == ["first", "second"]
+    assert limiter._script.call_count == 3
@@ -0,0 +1,51 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock
+
+from analyzerservice.src import celery_app
+
+
+@pytest.mark.asyncio
+async def test_dispatch_report_range_skips_cached_and_empty_dates(mocker):
+    mocker.patch.object(
+        celery_app.service, "construct_prompts_by_range",
+        AsyncMock(return_value={date(2024, 1, 1): "p1", date(2024, 1, 2): "p2", date(2024, 1, 4): "p4"})
+    )
+    mocker.patch.object(
+        celery_app.cache, "get_cached_report",
+        AsyncMock(side_effect=[("report", True), (None, False), (None, False)])
+    )
+    chord = mocker.patch.object(celery_app, "chord")
+    chord.return_value.return_value = SimpleNamespace(id="summary-id", parent=SimpleNamespace(id="group-id"))
+
+    dispatched = await celery_app.dispatch_report_range(date(2024, 1, 1), date(2024, 1, 4))
+
+    assert dispatched == {
+        "task_id": "summary-id",
+        "group_id": "group-id",
+        "queued": ["2024-01-02", "2024-01-04"],
+        "cached": ["2024-01-01"],
+        "no_data": ["2024-01-03"],
+    }
+    header = chord.call_args.args[0]
+    assert sorted(date_str for task in header.tasks for date_str in task.args[0]) == dispatched["queued"]
+
+
+def test_summarize_report_range_merges_dates(mocker):
+    mocker.patch.object(celery_app.service, "construct_period_prompt", AsyncMock(return_value="period"))
+    mocker.patch.object(celery_app.cache, "get_cached_entry", AsyncMock(return_value=(None, False)))
+    mocker.patch.object(celery_app, "_generate_and_store", AsyncMock(return_value=("summary", 7)))
+    mocker.patch.object(celery_app.worker_loop, "run", side_effect=lambda coro, timeout=None: asyncio.run(coro))
+
+    result = celery_app.summarize_report_range_task(
+        [[{"date": "2024-01-02", "source": "generated"}]],
+        "2024-01-01", "2024-01-02",
+        [{"date": "2024-01-01", "source": "cache"}],
+    )
+
+    assert result["analysis_id"] == 7
+    assert result["source"] == "generated"
+    assert [item["date"] for item in result["dates"]] == ["2024-01-01", "2024-01-02"]
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from analyzerservice.src import celery_app
+from analyzerservice.src.report_stream import ReportStream
+
+
+@pytest.mark.asyncio
+async def test_stream_llm_publishes_chunks(mocker):
+    async def chunks(prompt):
+        for text in ("Отчёт ", "готов"):
+            yield text
+
+    mocker.patch.object(celery_app.rate_limiter, "acquire", AsyncMock())
+    mocker.patch.object(celery_app.llm_backend, "stream", chunks)
+    publish = mocker.patch.object(celery_app.report_stream, "publish", AsyncMock())
+
+    report = await celery_app._stream_llm("prompt", "task-id")
+
+    assert report == "Отчёт готов"
+    assert [call.kwargs["text"] for call in publish.await_args_list] == ["Отчёт ", "готов"]
+    assert "ttft_ms" in publish.await_args_list[0].kwargs
+
+
+@pytest.mark.asyncio
+async def test_read_stops_after_done():
+    report_stream = ReportStream(redis_url="redis://localhost:6379/0")
+    report_stream._async_redis = AsyncMock()
+    report_stream._async_redis.xread.side_effect = [
+        [["report_stream:task-id", [("1-0", {"type": "chunk", "text": "a"})]]],
+        [],
+        [["report_stream:task-id", [("2-0", {"type": "done", "source": "generated"})]]],
+    ]
+
+    events = [event async for event in report_stream.read("task-id")]
+
+    assert [event["type"] for event in events] == ["chunk", "done"]
+
+
+@pytest.mark.asyncio
+async def test_publish_runs_redis_off_the_event_loop():
+    report_stream = ReportStream(redis_url="redis://localhost:6379/0")
+    report_stream.redis = MagicMock()
+    pipe = report_stream.redis.pipeline.return_value
+    threads = []
+    pipe.execute.side_effect = lambda: threads.append(threading.get_ident())
+
+    await report_stream.publish("task-id", "chunk", text="a")
+
+    pipe.xadd.assert_called_once_with("report_stream:task-id", {"type": "chunk", "text": "a"})
+    pipe.expire.assert_called_once_with("report_stream:task-id", report_stream.ttl)
+    assert threads and threads[0] != threading.get_ident()
+    report_stream.redis.xadd.assert_not_called()
+    report_stream.redis.expire.assert_not_called()
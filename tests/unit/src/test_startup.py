@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+# Верхние границы времени запуска веб-процесса, сек; переопределяются для медленных CI
+IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", "3.0"))
+FIRST_REQUEST_BUDGET = float(os.getenv("STARTUP_FIRST_REQUEST_BUDGET", "1.0"))
+
+_BENCHMARK = """
+import json, sys, time
+started = time.perf_counter()
+from analyzerservice.src.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(app)
+requested = time.perf_counter()
+status = client.get("/openapi.json").status_code
+finished = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - started,
+    "first_request_s": finished - requested,
+    "status": status,
+    "gemini_loaded": "google.generativeai" in sys.modules,
+    "heavy_modules": sorted(name for name in ("google.api_core", "grpc", "google.protobuf") if name in sys.modules),
+}))
+"""
+
+
+def _run_benchmark():
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1", "LOG_LEVEL": "WARNING"}
+    env.pop("GEMINI_API", None)
+    result = subprocess.run(
+        [sys.executable, "-c", _BENCHMARK], env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_web_startup_is_lazy_and_fast():
+    benchmark = _run_benchmark()
+
+    assert benchmark["gemini_loaded"] is False
+    assert benchmark["heavy_modules"] == []
+    assert benchmark["status"] == 200
+    assert benchmark["import_s"] < IMPORT_BUDGET, benchmark
+    assert benchmark["first_request_s"] < FIRST_REQUEST_BUDGET, benchmark
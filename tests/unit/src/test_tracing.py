@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import pytest
+
+from analyzerservice import tracing
+from analyzerservice.src import celery_app
+
+
+@pytest.fixture
+def exported(mocker):
+    spans = []
+    mocker.patch.object(tracing, "TRACE_SAMPLE_RATE", 1.0)
+    mocker.patch.object(tracing, "_export", spans.append)
+    return spans
+
+
+def test_nested_spans_share_trace(exported):
+    with tracing.start_span("parent") as parent:
+        with tracing.start_span("child", date="2024-01-01"):
+            pass
+
+    child, root = exported
+    assert child["trace_id"] == root["trace_id"] == parent.trace_id
+    assert child["parent_id"] == root["span_id"]
+    assert child["attributes"] == {"date": "2024-01-01"}
+
+
+def test_unsampled_trace_is_not_exported(mocker):
+    spans = []
+    mocker.patch.object(tracing, "TRACE_SAMPLE_RATE", 0.0)
+    mocker.patch.object(tracing, "_export", spans.append)
+
+    with tracing.start_span("parent") as parent:
+        with tracing.start_span("child") as child:
+            assert child is parent
+
+    assert parent.traceparent.endswith("-00")
+    assert spans == []
+
+
+def test_trace_context_passes_through_task_headers(exported):
+    headers = {}
+    with tracing.start_span("POST /report-generator/") as request_span:
+        celery_app._stamp_headers(headers=headers)
+
+    task = SimpleNamespace(name="generate_report", request=SimpleNamespace(get=headers.get, eta=None))
+    celery_app._observe_queue_wait(task_id="task-id", task=task)
+    celery_app._observe_run_time(task_id="task-id", task=task, state="SUCCESS")
+
+    task_span = exported[-1]
+    assert task_span["name"] == "celery.task generate_report"
+    assert task_span["trace_id"] == request_span.trace_id
+    assert task_span["parent_id"] == request_span.span_id
+    assert tracing.current_span() is None
@@ -0,0 +1,71 @@
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+from analyzerservice.src import celery_app
+from analyzerservice.src.warmup import WarmupTracker
+
+
+@pytest.fixture
+def tracker():
+    tracker = WarmupTracker(redis_url="redis://localhost:6379/0", daily_budget=2)
+    tracker.redis = MagicMock()
+    return tracker
+
+
+@pytest.mark.asyncio
+async def test_try_consume_budget_exhausted(tracker):
+    tracker.redis.incr.return_value = 3
+    assert await tracker.try_consume_budget() is False
+    tracker.redis.decr.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_try_consume_budget_allowed(tracker):
+    tracker.redis.incr.return_value = 1
+    assert await tracker.try_consume_budget() is True
+    tracker.redis.expire.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_warm_report_cache_skips_cached_and_respects_budget(mocker):
+    mocker.patch.object(celery_app.service, "construct_prompt_by_date", AsyncMock(return_value="prompt"))
+    mocker.patch.object(
+        celery_app.cache, "get_cached_report",
+        AsyncMock(side_effect=[("report", True), (None, False), (None, False)])
+    )
+    mocker.patch.object(celery_app.warmup, "set_status", AsyncMock())
+    mocker.patch.object(celery_app.warmup, "try_consume_budget", AsyncMock(side_effect=[True, False]))
+    generate = mocker.patch.object(celery_app, "_generate_and_store", AsyncMock(return_value="report"))
+
+    summary = await celery_app.warm_report_cache([date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3)])
+
+    assert summary == {
+        "generated": ["2024-01-02"],
+        "cached": ["2024-01-01"],
+        "skipped": ["2024-01-03"],
+        "failed": [],
+    }
+    generate.assert_awaited_once_with("prompt", date(2024, 1, 2), backend=celery_app.bulk_llm_backend)
+
+
+@pytest.mark.asyncio
+async def test_warm_report_cache_releases_budget_of_failed_generation(mocker):
+    mocker.patch.object(celery_app.service, "construct_prompt_by_date", AsyncMock(return_value="prompt"))
+    mocker.patch.object(celery_app.cache, "get_cached_report", AsyncMock(return_value=(None, False)))
+    mocker.patch.object(celery_app.warmup, "set_status", AsyncMock())
+    mocker.patch.object(celery_app.warmup, "try_consume_budget", AsyncMock(return_value=True))
+    release = mocker.patch.object(celery_app.warmup, "release_budget", AsyncMock())
+    mocker.patch.object(celery_app, "_generate_and_store", AsyncMock(side_effect=RuntimeError("LLM недоступна")))
+
+    summary = await celery_app.warm_report_cache([date(2024, 1, 1)])
+
+    assert summary["failed"] == ["2024-01-01"]
+    release.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_release_budget_decrements_counter(tracker):
+    await tracker.release_budget()
+
+    tracker.redis.decr.assert_called_once_with(tracker._budget_key())
@@ -0,0 +1,104 @@
+import asyncio
+import signal
+import threading
+
+import pytest
+from unittest.mock import AsyncMock
+
+from analyzerservice.src.worker_loop import WorkerLoop
+
+
+@pytest.fixture
+def worker_loop(mocker):
+    mocker.patch("analyzerservice.src.worker_loop.dispose_engine", AsyncMock())
+    worker_loop = WorkerLoop(concurrency=2)
+    yield worker_loop
+    worker_loop.stop()
+
+
+def test_run_reuses_single_loop(worker_loop):
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    assert worker_loop.run(current_loop()) is worker_loop.run(current_loop())
+
+
+def test_run_overlaps_tasks_up_to_concurrency(worker_loop):
+    running = 0
+    peak = 0
+
+    async def slow_call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+
+    threads = [threading.Thread(target=worker_loop.run, args=(slow_call(),)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == 2
+
+
+def test_run_keeps_caller_context(worker_loop):
+    from analyzerservice import tracing
+
+    async def current_span():
+        return tracing.current_span()
+
+    with tracing.start_span("celery.task") as span:
+        assert worker_loop.run(current_span()) is span
+
+
+def test_run_cancels_coroutine_when_caller_is_interrupted(worker_loop):
+    from celery.exceptions import SoftTimeLimitExceeded
+
+    started, cancelled = threading.Event(), threading.Event()
+
+    async def slow_call():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    def interrupt(signum, frame):
+        raise SoftTimeLimitExceeded()
+
+    previous = signal.signal(signal.SIGALRM, interrupt)
+    signal.setitimer(signal.ITIMER_REAL, 0.1)
+    try:
+        with pytest.raises(SoftTimeLimitExceeded):
+            worker_loop.run(slow_call())
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+    assert started.is_set()
+    assert cancelled.wait(1)
+
+
+def test_run_enforces_timeout_on_loop(worker_loop):
+    from celery.exceptions import SoftTimeLimitExceeded
+
+    cancelled = threading.Event()
+
+    async def slow_call():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def own_timeout():
+        raise TimeoutError("upstream")
+
+    with pytest.raises(SoftTimeLimitExceeded):
+        worker_loop.run(slow_call(), timeout=0.05)
+    assert cancelled.is_set()
+    with pytest.raises(TimeoutError, match="upstream"):
+        worker_loop.run(own_timeout(), timeout=5)
@@ -12,4 +12,11 @@ async def test_trigger_report_generation_error(mocker):
     with pytest.raises(HTTPException) as exc_info:
         await report_generation_api.trigger_report_generation(target_date)
     assert exc_info.value.status_code == 500
-    assert "Ошибка при запуске задачи: Test Exception" in exc_info.value.detail
\ No newline at end of file
+    assert "Ошибка при запуске задачи: Test Exception" in exc_info.value.detail
+
+@pytest.mark.asyncio
+async def test_trigger_range_report_generation_invalid_range():
+    """Tests that an inverted date range is rejected."""
+    with pytest.raises(HTTPException) as exc_info:
+        await report_generation_api.trigger_range_report_generation(date(2024, 5, 16), date(2024, 5, 1))
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,44 @@
+import json
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+from analyzerservice.model.schemas import SalesAnalyticsSchema, SalesTotalsSchema
+from analyzerservice.web import analytics_api
+
+
+@pytest.fixture
+def service(mocker):
+    mocker.patch.object(analytics_api.service, "get_sales_etag", mocker.AsyncMock(return_value='"v1"'))
+    return mocker.patch.object(analytics_api.service, "get_sales_analytics", mocker.AsyncMock(
+        return_value=SalesAnalyticsSchema(
+            start_date=date(2024, 1, 1), end_date=date(2024, 1, 31), group_by="month",
+            totals=SalesTotalsSchema(revenue=10.0, quantity=1, rows=1), categories={}, periods=[]
+        )
+    ))
+
+
+@pytest.mark.asyncio
+async def test_sales_analytics_returns_etag(service):
+    response = await analytics_api.get_sales_analytics(date(2024, 1, 1), date(2024, 1, 31), "month", None)
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"v1"'
+    assert json.loads(response.body)["totals"]["revenue"] == 10.0
+
+
+@pytest.mark.asyncio
+async def test_sales_analytics_not_modified(service):
+    response = await analytics_api.get_sales_analytics(date(2024, 1, 1), date(2024, 1, 31), "month", 'W/"v0", "v1"')
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == '"v1"'
+    service.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_sales_analytics_invalid_range():
+    with pytest.raises(HTTPException) as exc_info:
+        await analytics_api.get_sales_analytics(date(2024, 2, 1), date(2024, 1, 1), "day", None)
+    assert exc_info.value.status_code == 400
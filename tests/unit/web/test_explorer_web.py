@@ -7,6 +7,7 @@ from datetime import date
 from fastapi import HTTPException
 from sqlalchemy import select
 
+from analyzerservice.errors import FeedError
 from analyzerservice.model.schemas import ProductSchema
 from analyzerservice.web import data_loading_api
 from analyzerservice.data.dbbase import async_session, Product
@@ -82,3 +83,15 @@ async def test_delete_product_missing():
         await data_loading_api.delete_product(0)
     assert e.value.status_code == 404
     assert "Id 0 not found" in e.value.detail
+
+@pytest.mark.asyncio
+async def test_get_xml_from_url_feed_error(mocker):
+    mocker.patch.object(
+        data_loading_api.service, "ingest_feed", mocker.AsyncMock(side_effect=FeedError("документ не содержит продуктов"))
+    )
+
+    with pytest.raises(HTTPException) as e:
+        await data_loading_api.get_xml_from_url("http://feed/sales.xml")
+
+    assert e.value.status_code == 400
+    assert "документ не содержит продуктов" in e.value.detail
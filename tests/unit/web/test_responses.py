@@ -0,0 +1,28 @@
+import json
+from datetime import date
+from unittest.mock import AsyncMock
+
+import pytest
+
+from analyzerservice.model.schemas import ProductSchema
+from analyzerservice.web import data_loading_api
+from analyzerservice.web.responses import FastJSONResponse
+
+
+@pytest.mark.asyncio
+async def test_get_all_serializes_without_revalidation(mocker):
+    products = [ProductSchema(product_id=1, date_sell=date(2024, 1, 1), name="Product A", quantity=2, price=1.5)]
+    mocker.patch.object(data_loading_api.service, "get_all", AsyncMock(return_value=products))
+
+    response = await data_loading_api.get_all()
+
+    assert isinstance(response, FastJSONResponse)
+    assert json.loads(response.body) == [products[0].model_dump(mode="json")]
+
+
+def test_render_plain_data_and_models():
+    response = FastJSONResponse({"date": date(2024, 1, 1), "totals": {1: 2.5}})
+    assert json.loads(response.body) == {"date": "2024-01-01", "totals": {"1": 2.5}}
+
+    product = ProductSchema(product_id=1, date_sell=date(2024, 1, 1), name="Product A", quantity=2, price=1.5)
+    assert json.loads(FastJSONResponse({"items": [product]}).body) == {"items": [product.model_dump(mode="json")]}